@@ -1,27 +1,178 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import requests
-import socket
-import psutil
-import speedtest
-import whois
-import dns.resolver
-from PIL import Image, ImageTk
-import io
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import time
 import threading
-import uuid
-import json
-from geopy.geocoders import Nominatim
-import folium
-from folium import plugins
 import webbrowser
 import os
-import platform
-import subprocess
-import ipaddress
+from netmaster.paths import data_file
+from netmaster.uiqueue import UpdateQueue
+from netmaster import engine
+
+# matplotlib, folium, requests and the scanner modules are imported where
+# they are first used so the window appears without waiting for them
+
+class VirtualTable(ttk.Frame):
+    """Treeview that only materializes the visible rows of a TableModel
+
+    Rows are set by key with apply()/upsert(); scrolling, sorting and
+    filtering re-render the same pool of items instead of rebuilding them.
+    """
+
+    def __init__(self, parent, columns, headings=None, widths=None, height=10, filter_box=False,
+                 limit=None):
+        super().__init__(parent)
+        from netmaster.table import TableModel
+        
+        self.model = TableModel(columns, limit)
+        self.columns = list(columns)
+        self.headings = list(headings or columns)
+        self.visible = height
+        self.first = 0
+        self.items = []
+        self.row_keys = []
+        self.shown = []
+        self.selected_key = None
+        try:
+            self.rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 25)
+        except (tk.TclError, ValueError):
+            self.rowheight = 25
+        
+        self.count_label = None
+        if filter_box:
+            bar = ttk.Frame(self)
+            bar.pack(fill=tk.X, pady=(0, 5))
+            ttk.Label(bar, text="Filter:", style='Subtitle.TLabel').pack(side=tk.LEFT)
+            self.filter_var = tk.StringVar()
+            self.filter_var.trace_add("write", lambda *args: self.set_filter(self.filter_var.get()))
+            ttk.Entry(bar, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+            self.count_label = ttk.Label(bar, text="0 rows", style='Data.TLabel')
+            self.count_label.pack(side=tk.RIGHT)
+        
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings",
+                                 height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for index, column in enumerate(self.columns):
+            self.tree.heading(column, text=self.headings[index],
+                              command=lambda index=index: self.sort_by(index))
+            if widths:
+                self.tree.column(column, width=widths[index], anchor=tk.W)
+        
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.scroll(1, "pages"))
+        self.scroll_step = 3
+
+    def apply(self, rows):
+        """Replace the contents with rows ({key: values}), diffing by key"""
+        counts = self.model.apply(rows)
+        self.render()
+        return counts
+
+    def upsert(self, rows):
+        """Insert or update rows ({key: values}) without removing others"""
+        counts = self.model.update(rows)
+        self.render()
+        return counts
+
+    def clear(self):
+        self.model.clear()
+        self.first = 0
+        self.render()
+
+    def set_filter(self, text):
+        self.model.set_filter(text)
+        self.first = 0
+        self.render()
+
+    def sort_by(self, column):
+        """Sort by a column; clicking the same heading again reverses it"""
+        reverse = self.model.sort_column == column and not self.model.reverse
+        self.model.set_sort(column, reverse)
+        for index, column_id in enumerate(self.columns):
+            arrow = (" ▼" if reverse else " ▲") if index == column else ""
+            self.tree.heading(column_id, text=self.headings[index] + arrow)
+        self.first = 0
+        self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar callback: moveto a fraction, or scroll by units/pages"""
+        if action == "moveto":
+            self.first = int(float(amount) * len(self.model))
+            self.render()
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount, unit):
+        step = max(1, self.visible - 1) if unit == "pages" else self.scroll_step
+        self.first += amount * step
+        self.render()
+        return "break"
+
+    def on_resize(self, event):
+        """Size the item pool to the rows that fit in the widget"""
+        header = self.rowheight
+        if self.items:
+            box = self.tree.bbox(self.items[0])
+            if box:
+                header = box[1]
+        visible = max(1, (event.height - header) // self.rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.items:
+            self.selected_key = self.row_keys[self.items.index(selection[0])]
+
+    def render(self):
+        """Show the visible window of the model, reusing the existing items"""
+        total = len(self.model)
+        self.first = max(0, min(self.first, total - self.visible))
+        rows = self.model.window(self.first, self.visible)
+        
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert("", tk.END, values=()))
+            self.shown.append(None)
+        if len(self.items) > len(rows):
+            self.tree.delete(*self.items[len(rows):])
+            del self.items[len(rows):]
+            del self.shown[len(rows):]
+        
+        self.row_keys = [key for key, values in rows]
+        for index, (key, values) in enumerate(rows):
+            # Only touch items whose text actually changed
+            if self.shown[index] != values:
+                self.tree.item(self.items[index], values=values)
+                self.shown[index] = values
+        
+        # Keep the selection on its row rather than on a screen position
+        if self.selected_key in self.row_keys:
+            self.tree.selection_set(self.items[self.row_keys.index(self.selected_key)])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        if self.count_label is not None:
+            if self.model.filter_text:
+                text = f"{total} of {self.model.total} rows"
+            else:
+                text = f"{total} rows"
+            if self.model.dropped:
+                text += f" (newest kept, {self.model.dropped} older dropped)"
+            self.count_label.config(text=text)
+
 
 class NetworkMasterPro:
     def __init__(self, root):
@@ -37,7 +188,29 @@ class NetworkMasterPro:
             "https://ipapi.co/json/",
             "https://api.myip.com"
         ]
-        self.api_delay = 1.5  # Rate limiting
+        # HTTP pool, lookup cache and public IP lookup are created on first use
+        self._http = None
+        self._lookup_service = None
+        self._ip_lookup = None
+        self.bulk_lookup = None
+        
+        # Port scanner configuration
+        self.scan_concurrency = 500
+        self.scan_timeout = 1.0
+        self.port_scanner = None
+        
+        # Result tables keep the newest rows only; a stream file gets every row
+        self.table_limit = 10000
+        self.export_paths = {}
+        
+        # Device discovery configuration
+        self.device_scanner = None
+        
+        # Bulk DNS resolver configuration
+        self.dns_concurrency = 200
+        self.bulk_resolver = None
+        self.bulk_dns_file = None
+        self.dns_benchmark = None
         #https://github.com/SaeedForouzandeh/Network-Master
         # Initialize results storage
         self.results = {
@@ -49,15 +222,106 @@ class NetworkMasterPro:
             "location": {}
         }
         
+        # Per-stage wall-clock seconds of the last full scan
+        self.scan_timings = {}
+        
+        # Live interface traffic: sampling rate (s) and seconds of history shown
+        self.traffic_interval = 0.1
+        self.traffic_history = 60
+        self.traffic_monitor = None
+        self.traffic_plot = None
+        
+        # Top talkers by process / remote host, refreshed every few seconds
+        self.talkers_interval = 2.0
+        self.talkers_count = 8
+        self.connection_monitor = None
+        self.talkers_plot = None
+        
+        # Latency monitor: probe interval (s), samples kept per target, lines charted
+        self.latency_interval = 1.0
+        self.latency_timeout = 2.0
+        self.latency_window = 300
+        self.latency_lines = 8
+        self.latency_monitor = None
+        self.latency_plot = None
+        
+        # Path tracer: rounds every interval (s), TTLs probed until the target answers
+        self.trace_interval = 1.0
+        self.trace_max_hops = 30
+        self.path_tracer = None
+        
+        # Speed test history on disk; the chart asks for at most this many points
+        self.speed_history = None
+        self.history_points = 500
+        self.history_plot = None
+        
+        # Self-hosted throughput test: port of our own server, client run and server
+        self.throughput_port = 5201
+        self.throughput_test = None
+        self.throughput_server = None
+        
+        # Prometheus /metrics endpoint fed by scans and speed tests, served when
+        # NETWORKMASTER_METRICS_PORT is set (e.g. 9790)
+        self.metrics_port = os.environ.get("NETWORKMASTER_METRICS_PORT", "")
+        self.metrics = None
+        self.metrics_server = None
+        
+        # Worker threads queue widget updates here; drained on the Tk thread each frame
+        self.ui = UpdateQueue()
+        self.ui_frame_ms = 16
+        
         # Build UI
         self.create_main_container()
         self.create_sidebar()
         self.create_main_content()
         self.create_status_bar()
+        self._drain_ui()
+        self.start_metrics()
         
         # Start initial scans
         self.run_initial_scans()
 
+    def start_metrics(self):
+        """Serve /metrics if a port is configured"""
+        if not self.metrics_port:
+            return
+        from netmaster.metrics import Metrics, MetricsServer
+        
+        try:
+            self.metrics = Metrics()
+            self.metrics_server = MetricsServer(self.metrics, port=int(self.metrics_port)).start()
+        except (OSError, ValueError) as e:
+            print(f"Error starting the metrics endpoint: {e}")
+            self.metrics = None
+
+    @property
+    def http(self):
+        """One keep-alive connection pool shared by every API call"""
+        if self._http is None:
+            from netmaster.httpclient import get_client
+            self._http = get_client()
+        return self._http
+
+    @property
+    def lookup_service(self):
+        """Geolocation / IP lookups cached in memory and on disk"""
+        if self._lookup_service is None:
+            from netmaster.iplookup import IPLookupService
+            self._lookup_service = IPLookupService(client=self.http)
+        return self._lookup_service
+
+    @property
+    def ip_lookup(self):
+        """Providers raced with staggered starts; each has its own token bucket"""
+        if self._ip_lookup is None:
+            from netmaster.publicip import PublicIPLookup
+            self._ip_lookup = PublicIPLookup(self.api_services,
+                                             hedge_delay=0.25,
+                                             rate=0.5,
+                                             burst=2,
+                                             get=self.http.get)
+        return self._ip_lookup
+
     def center_window(self):
         """Center the window on screen"""
         self.root.update_idletasks()
@@ -234,6 +498,17 @@ class NetworkMasterPro:
                                       text="Loading...",
                                       style='Data.TLabel')
         self.quick_ip_label.pack(anchor=tk.W)
+        
+        self.http_pool_label = ttk.Label(self.quick_ip_frame,
+                                       text="HTTP pool: idle",
+                                       style='Data.TLabel')
+        self.http_pool_label.pack(anchor=tk.W, pady=(5, 0))
+        
+        self.lookup_cache_label = ttk.Label(self.quick_ip_frame,
+                                          text="Lookup cache: empty",
+                                          style='Data.TLabel')
+        self.lookup_cache_label.pack(anchor=tk.W)
+        self.update_client_stats()
         #https://github.com/SaeedForouzandeh/Network-Master
         # Full scan button
         scan_btn = ttk.Button(sidebar,
@@ -276,15 +551,39 @@ class NetworkMasterPro:
         self.notebook.add(self.tabs["geo"], text="📍 Geolocation")
         self.notebook.add(self.tabs["security"], text="🛡️ Security")
         
-        # Initialize tab contents
-        self.init_dashboard_tab()
-        self.init_ip_info_tab()
-        self.init_network_tools_tab()
-        self.init_dns_tools_tab()
-        self.init_speed_test_tab()
-        self.init_devices_tab()
-        self.init_geolocation_tab()
-        self.init_security_tab()
+        # Tab contents are built the first time a tab is shown, then
+        # filled from the latest results
+        self.tab_builders = {
+            "dashboard": (self.init_dashboard_tab, None),
+            "ip_info": (self.init_ip_info_tab, self.update_ip_info),
+            "network": (self.init_network_tools_tab, None),
+            "dns": (self.init_dns_tools_tab, None),
+            "speed": (self.init_speed_test_tab, self.update_speed_labels),
+            "devices": (self.init_devices_tab, self.update_devices),
+            "geo": (self.init_geolocation_tab, self.update_geolocation),
+            "security": (self.init_security_tab, None)
+        }
+        self.built_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.build_tab("dashboard")
+
+    def build_tab(self, name):
+        """Create a tab's widgets if they don't exist yet"""
+        if name in self.built_tabs:
+            return
+        self.built_tabs.add(name)
+        init, refresh = self.tab_builders[name]
+        init()
+        if refresh:
+            refresh()
+
+    def on_tab_changed(self, event):
+        """Build the newly selected tab on first view"""
+        selected = self.notebook.select()
+        for name, frame in self.tabs.items():
+            if str(frame) == selected:
+                self.build_tab(name)
+                break
 
     def create_status_bar(self):
         """Create status bar at bottom"""
@@ -301,9 +600,48 @@ class NetworkMasterPro:
         self.update_status("Ready")
 
     def update_status(self, message):
-        """Update status bar with timestamp"""
+        """Update status bar with timestamp (from any thread)"""
         timestamp = time.strftime("%H:%M:%S")
-        self.status_var.set(f"{timestamp} | {message}")
+        self.ui.post(self.status_var.set, f"{timestamp} | {message}", key="status")
+
+    def _drain_ui(self):
+        """Apply updates queued by worker threads, one frame's worth at a time"""
+        # Reschedule first so a dialog opened by an update doesn't stall the queue
+        self.root.after(self.ui_frame_ms, self._drain_ui)
+        self.ui.drain()
+
+    def set_text(self, widget, text):
+        """Set a widget's text from any thread; only the latest value is drawn"""
+        self.ui.post(lambda: widget.config(text=text), key=(str(widget), "text"))
+
+    def append_text(self, widget, text):
+        """Append to a text box from any thread; appends are batched per frame"""
+        self.ui.append((str(widget), "append"), lambda chunks: self._insert_text(widget, chunks), text)
+
+    def _insert_text(self, widget, chunks):
+        widget.insert(tk.END, "".join(chunks))
+        widget.see(tk.END)
+
+    def show_error(self, title, message):
+        """Show an error dialog from any thread"""
+        self.ui.post(lambda: messagebox.showerror(title, message))
+
+    def refresh(self, update):
+        """Run a tab refresh method on the Tk thread, once per frame at most"""
+        self.ui.post(update, key=update.__name__)
+
+    def update_client_stats(self):
+        """Show HTTP pool and lookup cache counters in the sidebar"""
+        stats = self._http.pool_stats() if self._http else {"requests": 0}
+        if stats["requests"]:
+            self.http_pool_label.config(
+                text=f"HTTP pool: {stats['hits']} hit / {stats['misses']} miss")
+        
+        cache = self._lookup_service.stats() if self._lookup_service else {"hits": 0, "misses": 0}
+        if cache["hits"] or cache["misses"]:
+            self.lookup_cache_label.config(
+                text=f"Lookup cache: {cache['hit_rate']:.0%} hits ({cache['entries']} entries)")
+        self.root.after(2000, self.update_client_stats)
 
     # Tab navigation methods
     def show_dashboard(self):
@@ -381,18 +719,70 @@ class NetworkMasterPro:
             label.pack(anchor=tk.W)
             setattr(self, f"dashboard_{key}_label", label)
         
+        charts_frame = ttk.Frame(tab)
+        charts_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        # Top talkers chart
+        talkers_frame = ttk.Frame(charts_frame)
+        talkers_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(10, 0))
+        
+        talkers_header = ttk.Frame(talkers_frame)
+        talkers_header.pack(fill=tk.X)
+        
+        ttk.Label(talkers_header,
+                text="Traffic Distribution",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.talkers_mode = ttk.Combobox(talkers_header,
+                                       values=["By process", "By remote host"],
+                                       state="readonly",
+                                       width=16)
+        self.talkers_mode.set("By process")
+        self.talkers_mode.pack(side=tk.RIGHT, padx=5)
+        self.talkers_mode.bind("<<ComboboxSelected>>", lambda e: self.update_talkers_chart())
+        
+        self.talkers_label = ttk.Label(talkers_frame,
+                                     text="",
+                                     style='Data.TLabel')
+        self.talkers_label.pack(anchor=tk.W)
+        
+        self.talkers_graph = tk.Canvas(talkers_frame,
+                                     bg=self.colors['primary'],
+                                     highlightthickness=0,
+                                     width=420)
+        self.talkers_graph.pack(fill=tk.BOTH, expand=True, pady=5)
+        
         # Network graph
-        graph_frame = ttk.Frame(tab)
-        graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        graph_frame = ttk.Frame(charts_frame)
+        graph_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        ttk.Label(graph_frame,
+        graph_header = ttk.Frame(graph_frame)
+        graph_header.pack(fill=tk.X)
+        
+        ttk.Label(graph_header,
                 text="Network Traffic",
-                style='Subtitle.TLabel').pack(anchor=tk.W)
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.traffic_iface = ttk.Combobox(graph_header,
+                                        values=["All interfaces"],
+                                        state="readonly",
+                                        width=24,
+                                        postcommand=self.update_traffic_interfaces)
+        self.traffic_iface.set("All interfaces")
+        self.traffic_iface.pack(side=tk.RIGHT, padx=5)
+        
+        self.traffic_rate_label = ttk.Label(graph_header,
+                                          text="",
+                                          style='Data.TLabel')
+        self.traffic_rate_label.pack(side=tk.RIGHT, padx=10)
         
         self.dashboard_graph = tk.Canvas(graph_frame,
                                        bg=self.colors['primary'],
                                        highlightthickness=0)
         self.dashboard_graph.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # Start sampling once the window is up; matplotlib loads with the graph
+        self.root.after(200, self.start_traffic_monitor)
 
     def init_ip_info_tab(self):
         """Initialize IP info tab"""
@@ -428,15 +818,11 @@ class NetworkMasterPro:
                                style='TButton')
         refresh_btn.pack(side=tk.RIGHT)
         
-        self.public_ip_tree = ttk.Treeview(public_frame,
-                                         columns=("Property", "Value"),
-                                         show="headings",
-                                         height=12)
-        self.public_ip_tree.heading("Property", text="Property")
-        self.public_ip_tree.heading("Value", text="Value")
-        self.public_ip_tree.column("Property", width=200, anchor=tk.W)
-        self.public_ip_tree.column("Value", width=400, anchor=tk.W)
-        self.public_ip_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.public_ip_table = VirtualTable(public_frame,
+                                            columns=("Property", "Value"),
+                                            widths=(200, 400),
+                                            height=12)
+        self.public_ip_table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Initialize local IP section
         local_header = ttk.Frame(local_frame)
@@ -452,15 +838,11 @@ class NetworkMasterPro:
                                      style='TButton')
         refresh_local_btn.pack(side=tk.RIGHT)
         
-        self.local_ip_tree = ttk.Treeview(local_frame,
-                                        columns=("Property", "Value"),
-                                        show="headings",
-                                        height=12)
-        self.local_ip_tree.heading("Property", text="Property")
-        self.local_ip_tree.heading("Value", text="Value")
-        self.local_ip_tree.column("Property", width=200, anchor=tk.W)
-        self.local_ip_tree.column("Value", width=400, anchor=tk.W)
-        self.local_ip_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.local_ip_table = VirtualTable(local_frame,
+                                           columns=("Property", "Value"),
+                                           widths=(200, 400),
+                                           height=12)
+        self.local_ip_table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Initialize IP Tools section
         tools_header = ttk.Frame(tools_frame)
@@ -504,9 +886,9 @@ class NetworkMasterPro:
         analysis_frame = ttk.Frame(tab)
         analysis_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Ping test section
+        # Latency monitor section
         ping_section = ttk.LabelFrame(analysis_frame,
-                                    text=" Ping Test ",
+                                    text=" Latency Monitor ",
                                     style='TFrame')
         ping_section.pack(fill=tk.X, pady=5)
         
@@ -514,25 +896,105 @@ class NetworkMasterPro:
         ping_frame.pack(fill=tk.X, pady=5, padx=5)
         
         ttk.Label(ping_frame,
-                text="Target:",
+                text="Targets:",
                 style='Subtitle.TLabel').pack(side=tk.LEFT)
         
         self.ping_target = ttk.Entry(ping_frame)
-        self.ping_target.insert(0, "8.8.8.8")
+        self.ping_target.insert(0, "8.8.8.8 1.1.1.1 9.9.9.9")
         self.ping_target.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        ping_btn = ttk.Button(ping_frame,
-                            text="Ping",
-                            command=self.run_ping_test,
-                            style='Accent.TButton')
-        ping_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Label(ping_frame,
+                text="Interval (s):",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
         
-        self.ping_result = scrolledtext.ScrolledText(ping_section,
-                                                   height=5,
-                                                   bg=self.colors['primary'],
-                                                   fg=self.colors['light'],
-                                                   insertbackground=self.colors['light'])
-        self.ping_result.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+        self.ping_interval = ttk.Spinbox(ping_frame, from_=0.1, to=60, increment=0.1, width=5)
+        self.ping_interval.set(self.latency_interval)
+        self.ping_interval.pack(side=tk.LEFT, padx=5)
+        
+        self.ping_btn = ttk.Button(ping_frame,
+                                 text="Start",
+                                 command=self.run_ping_test,
+                                 style='Accent.TButton')
+        self.ping_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.ping_summary = ttk.Label(ping_section,
+                                    text="",
+                                    style='Data.TLabel')
+        self.ping_summary.pack(anchor=tk.W, padx=5)
+        
+        ping_body = ttk.Frame(ping_section)
+        ping_body.pack(fill=tk.X, pady=5, padx=5)
+        
+        self.ping_table = VirtualTable(ping_body,
+                                       columns=("Target", "Address", "Sent", "Loss", "Min",
+                                                "Avg", "P95", "P99", "Jitter", "Last"),
+                                       widths=(130, 110, 50, 55, 50, 50, 50, 50, 50, 50),
+                                       height=5)
+        self.ping_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.ping_graph = ttk.Frame(ping_body)
+        self.ping_graph.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        
+        # Path tracer section
+        trace_section = ttk.LabelFrame(analysis_frame,
+                                     text=" Path Trace (MTR) ",
+                                     style='TFrame')
+        trace_section.pack(fill=tk.X, pady=5)
+        
+        trace_frame = ttk.Frame(trace_section)
+        trace_frame.pack(fill=tk.X, pady=5, padx=5)
+        
+        ttk.Label(trace_frame,
+                text="Targets:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.trace_target = ttk.Entry(trace_frame)
+        self.trace_target.insert(0, "8.8.8.8 1.1.1.1")
+        self.trace_target.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        ttk.Label(trace_frame,
+                text="Max hops:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.trace_hops = ttk.Spinbox(trace_frame, from_=1, to=64, width=4)
+        self.trace_hops.set(self.trace_max_hops)
+        self.trace_hops.pack(side=tk.LEFT, padx=5)
+        
+        self.trace_btn = ttk.Button(trace_frame,
+                                  text="Start",
+                                  command=self.run_path_trace,
+                                  style='Accent.TButton')
+        self.trace_btn.pack(side=tk.LEFT, padx=5)
+        
+        trace_options = ttk.Frame(trace_section)
+        trace_options.pack(fill=tk.X, padx=5)
+        
+        ttk.Label(trace_options,
+                text="Show path to:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.trace_view = ttk.Combobox(trace_options, state="readonly", width=30)
+        self.trace_view.pack(side=tk.LEFT, padx=5)
+        self.trace_view.bind("<<ComboboxSelected>>", lambda e: self.show_trace_path())
+        
+        self.trace_summary = ttk.Label(trace_options,
+                                     text="",
+                                     style='Data.TLabel')
+        self.trace_summary.pack(side=tk.LEFT, padx=5)
+        
+        self.trace_table = VirtualTable(trace_section,
+                                        columns=("Hop", "Address", "Name", "Loss", "Sent",
+                                                 "Last", "Avg", "Best", "Worst", "Jitter"),
+                                        widths=(40, 120, 200, 60, 50, 55, 55, 55, 55, 55),
+                                        height=6)
+        self.trace_table.pack(fill=tk.X, pady=5, padx=5)
+        
+        from netmaster.traceroute import SUPPORTED, UNSUPPORTED
+        if not SUPPORTED:
+            # No ICMP error queue here: keep the section, but say why it is off
+            for widget in (self.trace_target, self.trace_hops, self.trace_btn, self.trace_view):
+                widget.config(state=tk.DISABLED)
+            self.trace_summary.config(text=UNSUPPORTED)
         
         # Port scanner section
         port_section = ttk.LabelFrame(analysis_frame,
@@ -551,18 +1013,65 @@ class NetworkMasterPro:
         self.port_target.insert(0, "localhost")
         self.port_target.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        port_btn = ttk.Button(port_frame,
-                            text="Scan Ports",
-                            command=self.run_port_scan,
-                            style='Accent.TButton')
-        port_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Label(port_frame,
+                text="Ports:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
         
-        self.port_result = scrolledtext.ScrolledText(port_section,
-                                                   height=5,
-                                                   bg=self.colors['primary'],
-                                                   fg=self.colors['light'],
-                                                   insertbackground=self.colors['light'])
-        self.port_result.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+        self.port_range = ttk.Entry(port_frame, width=18)
+        self.port_range.insert(0, "1-1024")
+        self.port_range.pack(side=tk.LEFT, padx=5)
+        
+        self.port_scan_btn = ttk.Button(port_frame,
+                                      text="Scan Ports",
+                                      command=self.run_port_scan,
+                                      style='Accent.TButton')
+        self.port_scan_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.port_stop_btn = ttk.Button(port_frame,
+                                      text="Stop",
+                                      command=self.stop_port_scan,
+                                      style='TButton',
+                                      state=tk.DISABLED)
+        self.port_stop_btn.pack(side=tk.LEFT, padx=5)
+        
+        port_options = ttk.Frame(port_section)
+        port_options.pack(fill=tk.X, pady=(0, 5), padx=5)
+        
+        ttk.Label(port_options,
+                text="Concurrency:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.port_concurrency = ttk.Spinbox(port_options, from_=1, to=10000, width=7)
+        self.port_concurrency.set(self.scan_concurrency)
+        self.port_concurrency.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(port_options,
+                text="Timeout (s):",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.port_timeout = ttk.Spinbox(port_options, from_=0.1, to=30, increment=0.1, width=5)
+        self.port_timeout.set(self.scan_timeout)
+        self.port_timeout.pack(side=tk.LEFT, padx=5)
+        
+        self.port_show_closed = tk.BooleanVar(value=False)
+        ttk.Checkbutton(port_options,
+                      text="Show closed",
+                      variable=self.port_show_closed).pack(side=tk.LEFT, padx=5)
+        
+        self.add_export_control(port_options, "ports")
+        
+        self.port_summary = ttk.Label(port_section,
+                                    text="",
+                                    style='Data.TLabel')
+        self.port_summary.pack(anchor=tk.W, padx=5)
+        
+        self.port_table = VirtualTable(port_section,
+                                       columns=("Host", "Port", "State"),
+                                       widths=(250, 100, 150),
+                                       height=5,
+                                       filter_box=True,
+                                       limit=self.table_limit)
+        self.port_table.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
 
     def init_dns_tools_tab(self):
         """Initialize DNS tools tab"""
@@ -575,6 +1084,14 @@ class NetworkMasterPro:
         lookup_frame = ttk.Frame(dns_notebook)
         dns_notebook.add(lookup_frame, text="🔍 DNS Lookup")
         
+        # Bulk resolve frame
+        bulk_frame = ttk.Frame(dns_notebook)
+        dns_notebook.add(bulk_frame, text="📋 Bulk Resolve")
+        
+        # Resolver benchmark frame
+        bench_frame = ttk.Frame(dns_notebook)
+        dns_notebook.add(bench_frame, text="⏱️ Resolver Benchmark")
+        
         # DNS leak test frame
         leak_frame = ttk.Frame(dns_notebook)
         dns_notebook.add(leak_frame, text="🛡️ DNS Leak Test")
@@ -620,6 +1137,125 @@ class NetworkMasterPro:
                                                   insertbackground=self.colors['light'])
         self.dns_result.pack(fill=tk.BOTH, expand=True, pady=5)
         
+        # Bulk resolve section
+        bulk_header = ttk.Frame(bulk_frame)
+        bulk_header.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(bulk_header,
+                text="Bulk DNS Resolve",
+                style='Title.TLabel').pack(side=tk.LEFT)
+        
+        bulk_options = ttk.Frame(bulk_frame)
+        bulk_options.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(bulk_options,
+                text="Types:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.bulk_dns_types = ttk.Entry(bulk_options, width=18)
+        self.bulk_dns_types.insert(0, "A AAAA")
+        self.bulk_dns_types.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(bulk_options,
+                text="Servers:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.bulk_dns_servers = ttk.Entry(bulk_options, width=24)
+        self.bulk_dns_servers.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(bulk_options,
+                text="Concurrency:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.bulk_dns_concurrency = ttk.Spinbox(bulk_options, from_=1, to=2000, width=6)
+        self.bulk_dns_concurrency.set(self.dns_concurrency)
+        self.bulk_dns_concurrency.pack(side=tk.LEFT, padx=5)
+        
+        self.bulk_dns_btn = ttk.Button(bulk_options,
+                                     text="Resolve",
+                                     command=self.run_bulk_dns,
+                                     style='Accent.TButton')
+        self.bulk_dns_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(bulk_options,
+                 text="Load File...",
+                 command=self.load_bulk_dns_file,
+                 style='TButton').pack(side=tk.LEFT)
+        
+        self.add_export_control(bulk_options, "bulk_dns")
+        
+        self.bulk_dns_names = scrolledtext.ScrolledText(bulk_frame,
+                                                      height=5,
+                                                      bg=self.colors['primary'],
+                                                      fg=self.colors['light'],
+                                                      insertbackground=self.colors['light'])
+        self.bulk_dns_names.insert(tk.END, "example.com\ngoogle.com\n")
+        self.bulk_dns_names.pack(fill=tk.X, pady=5)
+        # Typing names replaces a loaded file
+        self.bulk_dns_names.bind("<Key>", lambda e: self.set_bulk_dns_file(None))
+        
+        self.bulk_dns_summary = ttk.Label(bulk_frame,
+                                        text="One name per line, or load a file",
+                                        style='Data.TLabel')
+        self.bulk_dns_summary.pack(anchor=tk.W)
+        
+        self.bulk_dns_table = VirtualTable(bulk_frame,
+                                           columns=("Name", "Type", "Status", "Answers", "TTL", "ms"),
+                                           widths=(220, 60, 90, 320, 60, 70),
+                                           filter_box=True,
+                                           limit=self.table_limit)
+        self.bulk_dns_table.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # Resolver benchmark section
+        from netmaster.dnsbench import CANDIDATES
+        
+        bench_header = ttk.Frame(bench_frame)
+        bench_header.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(bench_header,
+                text="Nameserver Benchmark",
+                style='Title.TLabel').pack(side=tk.LEFT)
+        
+        bench_options = ttk.Frame(bench_frame)
+        bench_options.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(bench_options,
+                text="Candidates:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.dns_bench_servers = ttk.Entry(bench_options)
+        self.dns_bench_servers.insert(0, " ".join(CANDIDATES))
+        self.dns_bench_servers.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        ttk.Label(bench_options,
+                text="Warm rounds:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.dns_bench_rounds = ttk.Spinbox(bench_options, from_=1, to=50, width=4)
+        self.dns_bench_rounds.set(3)
+        self.dns_bench_rounds.pack(side=tk.LEFT, padx=5)
+        
+        self.dns_bench_btn = ttk.Button(bench_options,
+                                      text="Run Benchmark",
+                                      command=self.run_dns_benchmark,
+                                      style='Accent.TButton')
+        self.dns_bench_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.dns_bench_progress = ttk.Label(bench_frame,
+                                          text="Configured nameservers are always included",
+                                          style='Data.TLabel')
+        self.dns_bench_progress.pack(anchor=tk.W)
+        
+        self.dns_bench_table = VirtualTable(bench_frame,
+                                            columns=("Rank", "Server", "Cold p50", "Warm p50",
+                                                     "Warm p95", "Warm p99", "Timeouts", "Errors",
+                                                     "Expected"),
+                                            headings=("#", "Server", "Cold p50 (ms)", "Warm p50",
+                                                      "Warm p95", "Warm p99", "Timeouts", "Errors",
+                                                      "Expected (ms)"),
+                                            widths=(40, 180, 100, 80, 80, 80, 80, 70, 100))
+        self.dns_bench_table.pack(fill=tk.BOTH, expand=True, pady=5)
+        
         # DNS leak test section
         leak_header = ttk.Frame(leak_frame)
         leak_header.pack(fill=tk.X, pady=10)
@@ -628,11 +1264,11 @@ class NetworkMasterPro:
                 text="DNS Leak Test",
                 style='Title.TLabel').pack(side=tk.LEFT)
         
-        leak_btn = ttk.Button(leak_frame,
-                            text="Run DNS Leak Test",
-                            command=self.run_dns_leak_test,
-                            style='Accent.TButton')
-        leak_btn.pack(pady=10)
+        self.leak_btn = ttk.Button(leak_frame,
+                                 text="Run DNS Leak Test",
+                                 command=self.run_dns_leak_test,
+                                 style='Accent.TButton')
+        self.leak_btn.pack(pady=10)
         
         self.leak_result = scrolledtext.ScrolledText(leak_frame,
                                                    height=10,
@@ -710,6 +1346,104 @@ class NetworkMasterPro:
                                    text="Not connected",
                                    style='Data.TLabel')
         self.server_info.pack(side=tk.RIGHT)
+        
+        # Recorded results, charted from the hourly / daily rollups for long ranges
+        history_section = ttk.LabelFrame(speed_frame,
+                                       text=" History ",
+                                       style='TFrame')
+        history_section.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        history_frame = ttk.Frame(history_section)
+        history_frame.pack(fill=tk.X, pady=5, padx=5)
+        
+        ttk.Label(history_frame,
+                text="Range:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.history_range = ttk.Combobox(history_frame,
+                                          values=["24 hours", "7 days", "30 days", "90 days",
+                                                  "1 year", "All"],
+                                          state="readonly", width=10)
+        self.history_range.set("30 days")
+        self.history_range.pack(side=tk.LEFT, padx=5)
+        self.history_range.bind("<<ComboboxSelected>>",
+                                lambda event: self.update_speed_history())
+        
+        self.history_label = ttk.Label(history_frame,
+                                     text="No speed tests recorded yet",
+                                     style='Data.TLabel')
+        self.history_label.pack(side=tk.LEFT, padx=5)
+        
+        self.history_graph = ttk.Frame(history_section)
+        self.history_graph.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Self-hosted throughput test
+        lan_section = ttk.LabelFrame(speed_frame,
+                                   text=" LAN Throughput (self-hosted) ",
+                                   style='TFrame')
+        lan_section.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        lan_frame = ttk.Frame(lan_section)
+        lan_frame.pack(fill=tk.X, pady=5, padx=5)
+        
+        ttk.Label(lan_frame,
+                text="Server:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.lan_host = ttk.Entry(lan_frame)
+        self.lan_host.insert(0, "127.0.0.1")
+        self.lan_host.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        ttk.Label(lan_frame,
+                text="Streams:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.lan_streams = ttk.Spinbox(lan_frame, from_=1, to=128, width=4)
+        self.lan_streams.set(4)
+        self.lan_streams.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(lan_frame,
+                text="Seconds:",
+                style='Subtitle.TLabel').pack(side=tk.LEFT)
+        
+        self.lan_duration = ttk.Spinbox(lan_frame, from_=1, to=3600, width=5)
+        self.lan_duration.set(10)
+        self.lan_duration.pack(side=tk.LEFT, padx=5)
+        
+        self.lan_direction = ttk.Combobox(lan_frame, values=["Upload", "Download"],
+                                          state="readonly", width=10)
+        self.lan_direction.set("Upload")
+        self.lan_direction.pack(side=tk.LEFT, padx=5)
+        
+        self.lan_btn = ttk.Button(lan_frame,
+                                text="Run",
+                                command=self.run_lan_throughput,
+                                style='Accent.TButton')
+        self.lan_btn.pack(side=tk.LEFT, padx=5)
+        
+        server_options = ttk.Frame(lan_section)
+        server_options.pack(fill=tk.X, padx=5)
+        
+        self.lan_serve_btn = ttk.Button(server_options,
+                                      text="Start Server",
+                                      command=self.toggle_throughput_server,
+                                      style='TButton')
+        self.lan_serve_btn.pack(side=tk.LEFT)
+        
+        self.lan_server_label = ttk.Label(server_options,
+                                        text=f"Run the server here so other hosts can test "
+                                             f"against port {self.throughput_port}",
+                                        style='Data.TLabel')
+        self.lan_server_label.pack(side=tk.LEFT, padx=5)
+        
+        self.lan_log = scrolledtext.ScrolledText(lan_section,
+                                               height=6,
+                                               bg=self.colors['primary'],
+                                               fg=self.colors['light'],
+                                               insertbackground=self.colors['light'])
+        self.lan_log.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+        
+        self.update_speed_history()
 
     def init_devices_tab(self):
         """Initialize devices tab"""
@@ -718,24 +1452,24 @@ class NetworkMasterPro:
         devices_frame = ttk.Frame(tab)
         devices_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.devices_tree = ttk.Treeview(devices_frame,
-                                       columns=("IP", "MAC", "Hostname", "Vendor"),
-                                       show="headings")
-        self.devices_tree.heading("IP", text="IP Address")
-        self.devices_tree.heading("MAC", text="MAC Address")
-        self.devices_tree.heading("Hostname", text="Hostname")
-        self.devices_tree.heading("Vendor", text="Vendor")
-        self.devices_tree.column("IP", width=150)
-        self.devices_tree.column("MAC", width=150)
-        self.devices_tree.column("Hostname", width=200)
-        self.devices_tree.column("Vendor", width=250)
-        self.devices_tree.pack(fill=tk.BOTH, expand=True)
-        
-        scan_btn = ttk.Button(devices_frame,
+        self.devices_table = VirtualTable(devices_frame,
+                                          columns=("IP", "MAC", "Hostname", "Vendor"),
+                                          headings=("IP Address", "MAC Address", "Hostname", "Vendor"),
+                                          widths=(150, 150, 200, 250),
+                                          filter_box=True,
+                                          limit=self.table_limit)
+        self.devices_table.pack(fill=tk.BOTH, expand=True)
+        
+        devices_bar = ttk.Frame(devices_frame)
+        devices_bar.pack(pady=10)
+        
+        scan_btn = ttk.Button(devices_bar,
                             text="Scan Network Devices",
                             command=self.scan_network_devices_gui,
                             style='Accent.TButton')
-        scan_btn.pack(pady=10)
+        scan_btn.pack(side=tk.LEFT)
+        
+        self.add_export_control(devices_bar, "devices")
 
     def init_geolocation_tab(self):
         """Initialize geolocation tab"""
@@ -760,18 +1494,31 @@ class NetworkMasterPro:
                            style='Accent.TButton')
         geo_btn.pack(side=tk.LEFT)
         
+        self.bulk_geo_btn = ttk.Button(input_frame,
+                                     text="Bulk from File...",
+                                     command=self.run_bulk_lookup,
+                                     style='TButton')
+        self.bulk_geo_btn.pack(side=tk.LEFT, padx=5)
+        
+        offline_btn = ttk.Button(input_frame,
+                               text="Offline DB...",
+                               command=self.load_offline_db,
+                               style='TButton')
+        offline_btn.pack(side=tk.LEFT)
+        
+        self.bulk_progress = ttk.Label(geo_frame,
+                                     text="",
+                                     style='Data.TLabel')
+        self.bulk_progress.pack(anchor=tk.W)
+        
         results_frame = ttk.Frame(geo_frame)
         results_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.geo_tree = ttk.Treeview(results_frame,
-                                    columns=("Property", "Value"),
-                                    show="headings",
-                                    height=8)
-        self.geo_tree.heading("Property", text="Property")
-        self.geo_tree.heading("Value", text="Value")
-        self.geo_tree.column("Property", width=150)
-        self.geo_tree.column("Value", width=300)
-        self.geo_tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.geo_table = VirtualTable(results_frame,
+                                      columns=("Property", "Value"),
+                                      widths=(150, 300),
+                                      height=8)
+        self.geo_table.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         
         self.map_frame = ttk.Frame(results_frame)
         self.map_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
@@ -819,51 +1566,22 @@ class NetworkMasterPro:
         self.results["ip_info"] = self.get_public_ip_info()
         
         # Update UI
-        self.update_dashboard()
-        
-        if "ip" in self.results["ip_info"]:
-            self.root.after(0, lambda: self.quick_ip_label.config(
-                text=self.results["ip_info"]["ip"]))
+        self.refresh(self.update_dashboard)
+        self.refresh(self.update_quick_ip)
         
         self.update_status("Initial scans completed")
 
     def get_public_ip_info(self):
-        """Get public IP info with API fallback handling"""
-        for service in self.api_services:
-            try:
-                response = requests.get(service, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    time.sleep(self.api_delay)  # Rate limiting
-                    return data
-            except:
-                continue
-        return {"error": "Could not fetch IP info"}
+        """Get public IP info from the fastest responding provider"""
+        from netmaster.records import to_record
+        
+        return to_record("ip_info", engine.get_public_ip_info(self.ip_lookup))
 
     def get_network_info(self):
         """Get detailed network information"""
-        try:
-            hostname = socket.gethostname()
-            local_ip = socket.gethostbyname(hostname)
-            mac = ":".join(["{:02x}".format((uuid.getnode() >> elements) & 0xff) 
-                           for elements in range(5, -1, -1)])
-            
-            interfaces = psutil.net_if_addrs()
-            stats = psutil.net_if_stats()
-            connection_type = "Wi-Fi" if "Wi-Fi" in interfaces else "Ethernet" if "Ethernet" in interfaces else "Unknown"
-            speed = next((s.speed for s in stats.values() if s.speed > 0), 0)
-
-            return {
-                "hostname": hostname,
-                "local_ip": local_ip,
-                "mac_address": mac,
-                "connection_type": connection_type,
-                "speed": f"{speed} Mbps",
-                "interfaces": {iface: [addr._asdict() for addr in addrs] 
-                              for iface, addrs in interfaces.items()}
-            }
-        except Exception as e:
-            return {"error": str(e)}
+        from netmaster.records import to_record
+        
+        return to_record("network_info", engine.get_network_info())
 
     def refresh_ip_info(self):
         """Refresh public IP information"""
@@ -873,11 +1591,8 @@ class NetworkMasterPro:
         """Thread for refreshing IP info"""
         self.update_status("Refreshing IP information...")
         self.results["ip_info"] = self.get_public_ip_info()
-        self.update_ip_info()
-        
-        if "ip" in self.results["ip_info"]:
-            self.root.after(0, lambda: self.quick_ip_label.config(
-                text=self.results["ip_info"]["ip"]))
+        self.refresh(self.update_ip_info)
+        self.refresh(self.update_quick_ip)
         
         self.update_status("IP information refreshed")
 
@@ -889,7 +1604,7 @@ class NetworkMasterPro:
         """Thread for refreshing local network info"""
         self.update_status("Refreshing local network information...")
         self.results["network_info"] = self.get_network_info()
-        self.update_ip_info()
+        self.refresh(self.update_ip_info)
         self.update_status("Local network information refreshed")
 
     def run_full_scan(self):
@@ -906,91 +1621,402 @@ class NetworkMasterPro:
 
     def _full_scan_thread(self):
         """Thread for full scan"""
-        try:
-            # IP and network info
-            self.results["ip_info"] = self.get_public_ip_info()
-            self.results["network_info"] = self.get_network_info()
-            
-            # DNS info
-            self.results["dns_info"] = self.get_dns_info()
-            
-            # Speed test
-            self.results["speed_test"] = self.run_speed_test()
-            
-            # Network devices
-            self.results["devices"] = self.scan_network_devices()
-            
-            # Geolocation
-            if "ip" in self.results["ip_info"]:
-                self.results["location"] = self.get_geolocation(self.results["ip_info"]["ip"])
+        # Tab refreshers to run as soon as each stage finishes
+        refreshers = {
+            "ip_info": [self.update_dashboard_ip, self.update_ip_info, self.update_quick_ip],
+            "network_info": [self.update_dashboard_network, self.update_ip_info],
+            "speed_test": [self.update_speed_labels, self.update_speed_history],
+            "devices": [self.update_devices],
+            "location": [self.update_geolocation],
+        }
+        
+        def on_stage_done(name, result, error, seconds):
+            from netmaster.records import to_record
             
-            # Update all UI elements
-            self.update_all_tabs()
+            self.results[name] = to_record(name, result if error is None else {"error": str(error)})
+            if self.metrics is not None:
+                self.metrics.record_stage(name, seconds, error is not None or "error" in self.results[name])
+                if name == "speed_test" and error is None:
+                    self.metrics.record_speed(result)
+            self.update_status(f"Full scan: {name.replace('_', ' ')} done in {seconds:.1f}s")
+            for update in refreshers.get(name, []):
+                self.refresh(update)
+        
+        try:
+            _, self.scan_timings = engine.full_scan(on_stage_done,
+                                                    public_ip=self.get_public_ip_info,
+                                                    geolocate=self.get_geolocation,
+                                                    location=self.results["location"],
+                                                    history=self.get_speed_history())
             
-            if "ip" in self.results["ip_info"]:
-                self.root.after(0, lambda: self.quick_ip_label.config(
-                    text=self.results["ip_info"]["ip"]))
+            # Redraw the dashboard once everything is in
+            self.refresh(self.update_dashboard)
             
-            self.update_status("Full scan completed successfully")
+            stages = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.scan_timings.items()
+                               if name != "total")
+            changes = self.compare_snapshot()
+            self.update_status(f"Full scan completed in {self.scan_timings['total']:.1f}s ({stages})"
+                               + (f"; since the last scan: {changes}" if changes else ""))
         except Exception as e:
-            messagebox.showerror("Scan Error", f"An error occurred during scan:\n{str(e)}")
+            self.show_error("Scan Error", f"An error occurred during scan:\n{str(e)}")
             self.update_status(f"Scan failed: {str(e)}")
         finally:
             # Re-enable scan button
-            self.root.after(0, lambda: [child.config(state=tk.NORMAL) 
-                                      for child in self.main_frame.winfo_children() 
-                                      if isinstance(child, ttk.Button) and "Scan" in child.cget("text")])
+            self.ui.post(lambda: [child.config(state=tk.NORMAL) 
+                                  for child in self.main_frame.winfo_children() 
+                                  if isinstance(child, ttk.Button) and "Scan" in child.cget("text")])
+
+    def compare_snapshot(self):
+        """Diff the results against the last full scan's, then keep them as the new baseline"""
+        from netmaster.records import Snapshot, diff, summarize
+        
+        path = data_file("last_scan.nms")
+        snapshot = Snapshot.from_results(self.results)
+        previous = None
+        try:
+            if os.path.exists(path):
+                previous = Snapshot.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading the last scan: {e}")
+        try:
+            snapshot.save(path)
+        except OSError as e:
+            print(f"Error saving the scan: {e}")
+        self.results["changes"] = diff(previous, snapshot) if previous else []
+        return summarize(self.results["changes"])
 
     def run_ping_test(self):
-        """Run ping test and display results"""
-        target = self.ping_target.get()
-        if not target:
+        """Start or stop the continuous latency monitor"""
+        if self.latency_monitor is not None:
+            self.latency_monitor.stop()
+            self.ping_btn.config(text="Stopping...")
+            return
+        
+        from netmaster.latency import LatencyMonitor, split_targets
+        
+        targets = split_targets(self.ping_target.get())
+        if not targets:
             messagebox.showerror("Error", "Please enter a target to ping")
             return
+        try:
+            interval = float(self.ping_interval.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid interval: {str(e)}")
+            return
+        
+        self.update_status(f"Monitoring latency to {len(targets)} target(s)...")
+        self.ping_table.clear()
+        self.ping_summary.config(text="Resolving targets...")
+        self.reset_latency_chart()
+        self.ping_btn.config(text="Stop")
+        
+        self.latency_monitor = LatencyMonitor(targets, interval=interval,
+                                              timeout=self.latency_timeout,
+                                              window=self.latency_window)
+        threading.Thread(target=self._latency_thread,
+                         args=(self.latency_monitor,), daemon=True).start()
+        self._latency_tick(self.latency_monitor)
+
+    def _latency_thread(self, monitor):
+        """Thread running the latency monitor until it is stopped"""
+        try:
+            self.results["latency"] = monitor.run()
+            self.update_status("Latency monitor stopped")
+        except Exception as e:
+            self.set_text(self.ping_summary, f"Latency monitor failed: {str(e)}")
+            self.update_status(f"Latency monitor failed: {str(e)}")
+        finally:
+            self.ui.post(self.update_latency_view, monitor)
+            self.latency_monitor = None
+            self.set_text(self.ping_btn, "Start")
+
+    def _latency_tick(self, monitor):
+        """Refresh the latency table and chart until that monitor finishes"""
+        if monitor is not self.latency_monitor:
+            return
+        self.update_latency_view(monitor)
+        self.root.after(1000, self._latency_tick, monitor)
+
+    def update_latency_view(self, monitor):
+        """Show per-target latency statistics; the chart only while the tab is visible"""
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+        
+        rows = {}
+        for row in monitor.summary():
+            if "error" in row:
+                rows[row["target"]] = (row["target"], row["error"]) + ("-",) * 8
+            else:
+                rows[row["target"]] = (row["target"], row["address"], row["sent"],
+                                       f"{row['loss']:.1%}", ms(row["min"]), ms(row["mean"]),
+                                       ms(row["p95"]), ms(row["p99"]), ms(row["jitter"]),
+                                       ms(row["last"]))
+        self.ping_table.apply(rows)
+        if monitor.method:
+            self.ping_summary.config(
+                text=f"{monitor.method.upper()} probes to {len(monitor.stats)} target(s) every "
+                     f"{monitor.interval:g}s, {monitor.rounds} round(s)")
+        if self.notebook.select() == str(self.tabs["network"]):
+            self.update_latency_chart(monitor)
+
+    def create_latency_plot(self):
+        """Build the round trip time chart"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        fig = Figure(figsize=(5, 2.2), facecolor=self.colors['primary'])
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(self.colors['primary'])
+        ax.set_ylabel("RTT (ms)", color='white', fontsize=8)
+        ax.tick_params(axis='x', colors='white', labelsize=8)
+        ax.tick_params(axis='y', colors='white', labelsize=8)
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['light'])
+        fig.subplots_adjust(left=0.12, right=0.97, bottom=0.15, top=0.95)
+        
+        canvas = FigureCanvasTkAgg(fig, master=self.ping_graph)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return {"figure": fig, "axes": ax, "canvas": canvas, "lines": {}}
+
+    def reset_latency_chart(self):
+        """Drop the lines of a previous run"""
+        if self.latency_plot:
+            for line in self.latency_plot["lines"].values():
+                line.remove()
+            self.latency_plot["lines"] = {}
+            self.latency_plot["canvas"].draw_idle()
+
+    def update_latency_chart(self, monitor):
+        """Plot the recent round trips of the first few targets; losses leave gaps"""
+        import math
+        
+        try:
+            if self.latency_plot is None:
+                try:
+                    self.latency_plot = self.create_latency_plot()
+                except Exception as e:
+                    # No matplotlib: the table still shows everything
+                    self.latency_plot = {}
+                    print(f"Error creating latency chart: {e}")
+            plot = self.latency_plot
+            if not plot:
+                return
+            
+            ax = plot["axes"]
+            peak = 1.0
+            for target in list(monitor.stats)[:self.latency_lines]:
+                times, rtts = monitor.series(target)
+                line = plot["lines"].get(target)
+                if line is None:
+                    line, = ax.plot([], [], linewidth=1, label=target)
+                    plot["lines"][target] = line
+                    ax.legend(loc="upper left", facecolor=self.colors['primary'],
+                              labelcolor='white', fontsize=7)
+                line.set_data(times, rtts)
+                peak = max([peak] + [rtt for rtt in rtts if not math.isnan(rtt)])
+            ax.set_xlim(-monitor.window * monitor.interval, 0)
+            ax.set_ylim(0, peak * 1.2)
+            plot["canvas"].draw_idle()
+        except Exception as e:
+            print(f"Error updating latency chart: {e}")
+
+    def run_path_trace(self):
+        """Start or stop tracing the paths to the given targets"""
+        if self.path_tracer is not None:
+            self.path_tracer.stop()
+            self.trace_btn.config(text="Stopping...")
+            return
         
-        self.update_status(f"Pinging {target}...")
-        self.ping_result.delete(1.0, tk.END)
+        from netmaster.latency import split_targets
+        from netmaster.traceroute import PathTracer
         
+        targets = split_targets(self.trace_target.get())
+        if not targets:
+            messagebox.showerror("Error", "Please enter a target to trace")
+            return
+        try:
+            max_hops = int(self.trace_hops.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid hop limit: {str(e)}")
+            return
+        
+        self.update_status(f"Tracing {len(targets)} path(s)...")
+        self.trace_table.clear()
+        self.trace_view.config(values=targets)
+        self.trace_view.set(targets[0])
+        self.trace_summary.config(text="Resolving targets...")
+        self.trace_btn.config(text="Stop")
+        
+        self.path_tracer = PathTracer(targets, max_hops=max_hops, interval=self.trace_interval)
+        threading.Thread(target=self._path_trace_thread,
+                         args=(self.path_tracer,), daemon=True).start()
+        self._trace_tick(self.path_tracer)
+
+    def _path_trace_thread(self, tracer):
+        """Thread running the path tracer until it is stopped"""
         try:
-            param = "-n" if platform.system().lower() == "windows" else "-c"
-            count = "4"
-            command = ["ping", param, count, target]
-            output = subprocess.check_output(command, universal_newlines=True)
-            self.ping_result.insert(tk.END, output)
-            self.update_status(f"Ping to {target} completed")
+            self.results["traceroute"] = tracer.run()
+            self.update_status("Path trace stopped")
         except Exception as e:
-            self.ping_result.insert(tk.END, f"Ping failed: {str(e)}")
-            self.update_status(f"Ping to {target} failed")
+            self.set_text(self.trace_summary, f"Path trace failed: {str(e)}")
+            self.update_status(f"Path trace failed: {str(e)}")
+        finally:
+            self.ui.post(self.show_trace_path, tracer)
+            self.path_tracer = None
+            self.set_text(self.trace_btn, "Start")
+
+    def _trace_tick(self, tracer):
+        """Refresh the hop table until that tracer finishes"""
+        if tracer is not self.path_tracer:
+            return
+        self.show_trace_path(tracer)
+        self.root.after(1000, self._trace_tick, tracer)
+
+    def show_trace_path(self, tracer=None):
+        """Show per-hop statistics of the path picked in the selector"""
+        tracer = tracer or self.path_tracer
+        if tracer is None:
+            return
+        
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+        
+        paths = tracer.summary()
+        selected = self.trace_view.get()
+        rows = {}
+        for path in paths:
+            if path["target"] != selected:
+                continue
+            if "error" in path:
+                rows[0] = (0, path["error"]) + ("-",) * 8
+                continue
+            for hop in path["hops"]:
+                rows[hop["ttl"]] = (hop["ttl"], hop["address"] or "???", hop["name"] or "",
+                                    f"{hop['loss']:.1%}", hop["sent"], ms(hop["last"]),
+                                    ms(hop["mean"]), ms(hop["min"]), ms(hop["max"]),
+                                    ms(hop["jitter"]))
+        self.trace_table.apply(rows)
+        if tracer.rounds:
+            reached = [path for path in paths if path.get("reached")]
+            self.trace_summary.config(
+                text=f"Round {tracer.rounds}: {len(reached)}/{len(paths)} target(s) reached")
 
     def run_port_scan(self):
-        """Run basic port scan"""
+        """Start a non-blocking port scan over the given targets and ports"""
         target = self.port_target.get()
         if not target:
             messagebox.showerror("Error", "Please enter a target to scan")
             return
         
+        from netmaster.portscan import PortScanner, parse_ports
+        
+        try:
+            ports = parse_ports(self.port_range.get())
+            concurrency = int(self.port_concurrency.get())
+            timeout = float(self.port_timeout.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid scan settings: {str(e)}")
+            return
+        
         self.update_status(f"Scanning ports on {target}...")
-        self.port_result.delete(1.0, tk.END)
+        self.port_table.clear()
+        self.port_summary.config(text=f"Scanning {len(ports)} port(s) on {target}...")
+        self.port_scan_btn.config(state=tk.DISABLED)
+        self.port_stop_btn.config(state=tk.NORMAL)
+        
+        self.port_scanner = PortScanner(concurrency=concurrency, timeout=timeout)
+        threading.Thread(target=self._port_scan_thread,
+                         args=(self.port_scanner, target, ports, self.port_show_closed.get()),
+                         daemon=True).start()
+
+    def stop_port_scan(self):
+        """Stop the running port scan"""
+        if self.port_scanner:
+            self.port_scanner.stop()
+            self.update_status("Stopping port scan...")
+
+    def _port_scan_thread(self, scanner, target, ports, show_closed):
+        """Thread for port scanning"""
+        from netmaster.portscan import OPEN, FILTERED, ERROR, CSV_FIELDS
+        from netmaster.records import PortTable
+        
+        # Every probe is kept (7 bytes each); the table only shows the interesting ones
+        self.results["ports"] = table = PortTable()
+        sink = self.open_export("ports", CSV_FIELDS)
+        
+        def on_result(host, port, state):
+            table.add(host, port, state)
+            if sink is not None:
+                sink.write({"host": host, "port": port, "state": state})
+            if state == OPEN or state == FILTERED or state == ERROR or show_closed:
+                self.ui.append("ports", self._show_ports, ((host, port), (host, port, state)))
+        
+        def on_error(host, message):
+            if sink is not None:
+                sink.write({"host": host, "error": message})
+            self.ui.append("ports", self._show_ports, ((host, ""), (host, "", f"unresolved: {message}")))
         
         try:
-            common_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 3306, 3389]
-            
-            self.port_result.insert(tk.END, f"Scanning common ports on {target}:\n\n")
-            
-            for port in common_ports:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex((target, port))
-                if result == 0:
-                    self.port_result.insert(tk.END, f"Port {port}: OPEN\n")
-                else:
-                    self.port_result.insert(tk.END, f"Port {port}: closed\n")
-                sock.close()
-            
+            summary = scanner.scan(target, ports, on_result, on_error)
+            self.set_text(self.port_summary,
+                          f"Scanned {summary['scanned']} ports on {summary['hosts']} host(s) "
+                          f"in {summary['elapsed']:.2f}s ({summary['rate']:.0f} ports/s): "
+                          f"{len(summary['open'])} open, {summary['closed']} closed, "
+                          f"{summary['filtered']} filtered"
+                          + (f", {len(summary['unresolved'])} unresolved" if summary['unresolved'] else ""))
             self.update_status(f"Port scan on {target} completed")
         except Exception as e:
-            self.port_result.insert(tk.END, f"Port scan failed: {str(e)}")
+            self.set_text(self.port_summary, f"Port scan failed: {str(e)}")
             self.update_status(f"Port scan on {target} failed")
+        finally:
+            if sink is not None:
+                sink.close()
+            if self.port_scanner is scanner:
+                self.port_scanner = None
+            self.ui.post(self._port_scan_done)
+
+    def _show_ports(self, results):
+        """Add a batch of port results, keyed by (host, port)"""
+        self.port_table.upsert(dict(results))
+
+    def _port_scan_done(self):
+        """Reset the scan buttons once no scan is running"""
+        if self.port_scanner is None:
+            self.port_scan_btn.config(state=tk.NORMAL)
+            self.port_stop_btn.config(state=tk.DISABLED)
+
+    def add_export_control(self, parent, name):
+        """'Stream to File...' button and label for the scan called name"""
+        label = ttk.Label(parent, text="", style='Data.TLabel')
+        ttk.Button(parent,
+                 text="Stream to File...",
+                 command=lambda: self.choose_export(name, label),
+                 style='TButton').pack(side=tk.LEFT, padx=5)
+        label.pack(side=tk.LEFT)
+
+    def choose_export(self, name, label):
+        """Pick the file the next runs of a scan stream to; cancel stops streaming"""
+        output = filedialog.asksaveasfilename(title="Stream results to",
+                                              defaultextension=".ndjson",
+                                              filetypes=[("NDJSON", "*.ndjson"), ("CSV", "*.csv")])
+        if output:
+            self.export_paths[name] = output
+            label.config(text=f"-> {os.path.basename(output)}")
+        else:
+            self.export_paths.pop(name, None)
+            label.config(text="")
+
+    def open_export(self, name, fields=None):
+        """FileSink for a scan's chosen stream file, or None"""
+        output = self.export_paths.get(name)
+        if not output:
+            return None
+        from netmaster.sinks import FileSink
+        try:
+            return FileSink(output, fields=fields)
+        except OSError as e:
+            self.show_error("Export Error", f"Cannot write {output}:\n{str(e)}")
+            return None
 
     def run_dns_lookup(self):
         """Perform DNS lookup"""
@@ -1004,46 +2030,188 @@ class NetworkMasterPro:
         self.update_status(f"Performing {record_type} lookup for {domain}...")
         self.dns_result.delete(1.0, tk.END)
         
+        threading.Thread(target=self._dns_lookup_thread,
+                         args=(domain, record_type), daemon=True).start()
+
+    def _dns_lookup_thread(self, domain, record_type):
+        """Thread for a single DNS lookup (shared, cached resolver)"""
         try:
-            resolver = dns.resolver.Resolver()
-            answers = resolver.resolve(domain, record_type)
-            
-            self.dns_result.insert(tk.END, f"{record_type} records for {domain}:\n\n")
-            for rdata in answers:
-                self.dns_result.insert(tk.END, f"{rdata}\n")
+            answers = engine.dns_lookup(domain, record_type)
             
+            self.append_text(self.dns_result,
+                             f"{record_type} records for {domain}:\n\n" +
+                             "".join(f"{rdata}\n" for rdata in answers))
             self.update_status(f"DNS lookup for {domain} completed")
         except Exception as e:
-            self.dns_result.insert(tk.END, f"DNS lookup failed: {str(e)}")
+            self.append_text(self.dns_result, f"DNS lookup failed: {str(e)}")
             self.update_status(f"DNS lookup for {domain} failed")
 
+    def run_dns_benchmark(self):
+        """Rank the configured and candidate nameservers by latency, or stop"""
+        if self.dns_benchmark is not None:
+            self.dns_benchmark.stop()
+            self.update_status("Stopping nameserver benchmark...")
+            return
+        
+        from netmaster.dnsbench import NameserverBenchmark
+        
+        try:
+            rounds = int(self.dns_bench_rounds.get())
+        except ValueError:
+            messagebox.showerror("Error", "Rounds must be a number")
+            return
+        
+        servers = self.dns_bench_servers.get().replace(",", " ").split()
+        self.dns_bench_table.clear()
+        self.dns_bench_btn.config(text="Stop")
+        self.update_status("Benchmarking nameservers...")
+        
+        self.dns_benchmark = NameserverBenchmark(servers, rounds=rounds)
+        threading.Thread(target=self._dns_benchmark_thread,
+                         args=(self.dns_benchmark,), daemon=True).start()
+
+    def _dns_benchmark_thread(self, bench):
+        """Thread for the nameserver benchmark"""
+        done = {}
+        
+        def on_progress(server, count, total):
+            done[server] = (count, total)
+            finished = sum(count for count, total in done.values())
+            planned = sum(total for count, total in done.values())
+            self.set_text(self.dns_bench_progress,
+                          f"{finished}/{planned} queries across {len(done)} servers...")
+        
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+        
+        try:
+            results = bench.run(on_progress)
+            rows = {result["server"]: (result["rank"], result["server"],
+                                       ms(result["cold"]["p50"]), ms(result["warm"]["p50"]),
+                                       ms(result["warm"]["p95"]), ms(result["warm"]["p99"]),
+                                       result["timeouts"], result["errors"],
+                                       ms(result["expected_ms"]))
+                    for result in results}
+            self.ui.post(self.dns_bench_table.apply, rows, key="dns_bench_rows")
+            if results:
+                self.set_text(self.dns_bench_progress,
+                              f"Fastest: {results[0]['server']} "
+                              f"({ms(results[0]['expected_ms'])} ms expected per query)")
+            self.results["dns_benchmark"] = results
+            self.update_status("Nameserver benchmark completed")
+        except Exception as e:
+            self.set_text(self.dns_bench_progress, f"Benchmark failed: {str(e)}")
+            self.update_status(f"Nameserver benchmark failed: {str(e)}")
+        finally:
+            self.dns_benchmark = None
+            self.set_text(self.dns_bench_btn, "Run Benchmark")
+
+    def set_bulk_dns_file(self, path):
+        """Resolve names from path instead of the text box (None to undo)"""
+        if path == self.bulk_dns_file:
+            return
+        self.bulk_dns_file = path
+        self.bulk_dns_summary.config(
+            text=f"Names from {os.path.basename(path)}" if path else "One name per line, or load a file")
+
+    def load_bulk_dns_file(self):
+        """Pick a file of names for the bulk resolver"""
+        path = filedialog.askopenfilename(title="Names to resolve",
+                                          filetypes=[("Text files", "*.txt *.csv *.log"),
+                                                     ("All files", "*.*")])
+        if path:
+            self.set_bulk_dns_file(path)
+
+    def run_bulk_dns(self):
+        """Resolve many names x record types concurrently, or stop a running job"""
+        if self.bulk_resolver is not None:
+            self.bulk_resolver.stop()
+            self.update_status("Stopping bulk DNS resolve...")
+            return
+        
+        from netmaster.resolver import BulkResolver
+        
+        types = self.bulk_dns_types.get().replace(",", " ").split() or ["A"]
+        servers = self.bulk_dns_servers.get().replace(",", " ").split() or None
+        try:
+            concurrency = int(self.bulk_dns_concurrency.get())
+        except ValueError:
+            messagebox.showerror("Error", "Concurrency must be a number")
+            return
+        
+        source = self.bulk_dns_file
+        if source is None:
+            source = self.bulk_dns_names.get(1.0, tk.END).splitlines()
+        
+        self.bulk_dns_table.clear()
+        self.bulk_dns_summary.config(text="Resolving...")
+        self.bulk_dns_btn.config(text="Stop")
+        self.update_status(f"Resolving {' '.join(types)} records...")
+        
+        self.bulk_resolver = BulkResolver(servers, concurrency=concurrency)
+        threading.Thread(target=self._bulk_dns_thread,
+                         args=(self.bulk_resolver, source, types), daemon=True).start()
+
+    def _bulk_dns_thread(self, resolver, source, types):
+        """Thread for bulk DNS resolution; rows stream into the table"""
+        from netmaster.resolver import CSV_FIELDS, read_names, format_summary
+        
+        done = 0
+        sink = self.open_export("bulk_dns", CSV_FIELDS)
+        
+        def on_row(row):
+            nonlocal done
+            done += 1
+            if sink is not None:
+                sink.write(row)
+            values = (row["domain"], row["type"], row["status"],
+                      ", ".join(row.get("answers", [])), row.get("ttl", ""), row["ms"])
+            self.ui.append("bulk_dns", self._show_bulk_dns, ((row["domain"], row["type"]), values))
+            self.set_text(self.bulk_dns_summary, f"{done} queries answered...")
+        
+        try:
+            if isinstance(source, str):
+                with open(source, encoding="utf-8", errors="replace") as lines:
+                    summary = resolver.resolve(read_names(lines), types, on_row)
+            else:
+                summary = resolver.resolve(read_names(source), types, on_row)
+            self.set_text(self.bulk_dns_summary, format_summary(summary))
+            self.update_status(f"Bulk DNS resolve finished: {summary['queries']} queries")
+        except Exception as e:
+            self.set_text(self.bulk_dns_summary, f"Bulk resolve failed: {str(e)}")
+            self.update_status(f"Bulk DNS resolve failed: {str(e)}")
+        finally:
+            if sink is not None:
+                sink.close()
+            self.bulk_resolver = None
+            self.set_text(self.bulk_dns_btn, "Resolve")
+
+    def _show_bulk_dns(self, rows):
+        """Add a batch of bulk DNS results, keyed by (name, type)"""
+        self.bulk_dns_table.upsert(dict(rows))
+
     def run_dns_leak_test(self):
         """Perform DNS leak test"""
         self.update_status("Running DNS leak test...")
+        self.leak_btn.config(state=tk.DISABLED)
         self.leak_result.delete(1.0, tk.END)
         
+        threading.Thread(target=self._dns_leak_thread, daemon=True).start()
+
+    def _dns_leak_thread(self):
+        """Thread for the DNS leak test"""
+        from netmaster.dnsleak import BashWsEndpoint, DNSLeakTest, format_report
+        
         try:
-            test_servers = [
-                "https://api.ipify.org",
-                "https://icanhazip.com",
-                "https://ident.me",
-                "https://ifconfig.me"
-            ]
-            
-            self.leak_result.insert(tk.END, "DNS Leak Test Results:\n\n")
-            
-            for server in test_servers:
-                try:
-                    ip = requests.get(server, timeout=5).text.strip()
-                    self.leak_result.insert(tk.END, f"{server}: {ip}\n")
-                except Exception as e:
-                    self.leak_result.insert(tk.END, f"{server}: Error - {str(e)}\n")
-            
-            self.leak_result.insert(tk.END, "\nIf all IPs match, no DNS leak detected.")
-            self.update_status("DNS leak test completed")
+            report = DNSLeakTest(BashWsEndpoint(self.http)).run()
+            self.results["dns_leak"] = report
+            self.append_text(self.leak_result, format_report(report))
+            self.update_status(f"DNS leak test completed in {report['elapsed']:.2f}s")
         except Exception as e:
-            self.leak_result.insert(tk.END, f"DNS leak test failed: {str(e)}")
+            self.append_text(self.leak_result, f"DNS leak test failed: {str(e)}\n")
             self.update_status("DNS leak test failed")
+        finally:
+            self.ui.post(lambda: self.leak_btn.config(state=tk.NORMAL))
 
     def run_speed_test_gui(self):
         """Run speed test with GUI updates"""
@@ -1058,97 +2226,173 @@ class NetworkMasterPro:
 
     def _speed_test_thread(self):
         """Thread for speed test"""
+        from netmaster.records import to_record
+        
+        labels = {
+            "server": self.server_info,
+            "download": self.download_speed,
+            "upload": self.upload_speed,
+            "ping": self.ping_speed,
+        }
+        units = {"download": "Mbps", "upload": "Mbps", "ping": "ms"}
+        
+        def on_progress(stage, value):
+            text = f"{value:.2f} {units[stage]}" if stage in units else value
+            self.set_text(labels[stage], text)
+        
         try:
-            st = speedtest.Speedtest()
-            
-            # Get best server
-            self.root.after(0, lambda: self.server_info.config(text="Finding best server..."))
-            st.get_best_server()
-            self.root.after(0, lambda: self.server_info.config(
-                text=f"{st.results.server['name']} ({st.results.server['country']})"
-            ))
-            
-            # Test download speed
-            self.root.after(0, lambda: self.download_speed.config(text="Testing..."))
-            download_speed = st.download() / 1_000_000  # Convert to Mbps
-            self.root.after(0, lambda: self.download_speed.config(
-                text=f"{download_speed:.2f} Mbps"
-            ))
-            
-            # Test upload speed
-            self.root.after(0, lambda: self.upload_speed.config(text="Testing..."))
-            upload_speed = st.upload() / 1_000_000  # Convert to Mbps
-            self.root.after(0, lambda: self.upload_speed.config(
-                text=f"{upload_speed:.2f} Mbps"
-            ))
-            
-            # Get ping
-            ping = st.results.ping
-            self.root.after(0, lambda: self.ping_speed.config(
-                text=f"{ping:.2f} ms"
-            ))
+            self.set_text(self.server_info, "Finding best server...")
+            result = engine.run_speed_test(on_progress, self.get_speed_history())
+            if "error" in result:
+                raise RuntimeError(result["error"])
             
             # Save results
-            self.results["speed_test"] = {
-                "download": f"{download_speed:.2f} Mbps",
-                "upload": f"{upload_speed:.2f} Mbps",
-                "ping": f"{ping:.2f} ms",
-                "server": st.results.server['name']
-            }
+            self.results["speed_test"] = to_record("speed_test", result)
+            if self.metrics is not None:
+                self.metrics.record_speed(result)
+            self.refresh(self.update_speed_history)
             
             self.update_status("Speed test completed")
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Speed Test Error", 
-                f"An error occurred during speed test:\n{str(e)}"
-            ))
+            self.show_error("Speed Test Error", f"An error occurred during speed test:\n{str(e)}")
             self.update_status(f"Speed test failed: {str(e)}")
         finally:
-            self.root.after(0, lambda: self.speed_test_btn.config(state=tk.NORMAL))
+            self.ui.post(lambda: self.speed_test_btn.config(state=tk.NORMAL))
+
+    def run_lan_throughput(self):
+        """Start or stop a throughput test against our own server"""
+        if self.throughput_test is not None:
+            self.throughput_test.stop()
+            self.lan_btn.config(text="Stopping...")
+            return
+        
+        from netmaster.throughput import ThroughputTest
+        
+        host = self.lan_host.get().strip()
+        if not host:
+            messagebox.showerror("Error", "Please enter the server to test against")
+            return
+        try:
+            streams = int(self.lan_streams.get())
+            duration = float(self.lan_duration.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid test settings: {str(e)}")
+            return
+        
+        reverse = self.lan_direction.get() == "Download"
+        self.throughput_test = ThroughputTest(host, self.throughput_port, streams=streams,
+                                              duration=duration, reverse=reverse)
+        self.update_status(f"Testing throughput to {host}...")
+        self.lan_log.delete(1.0, tk.END)
+        self.lan_btn.config(text="Stop")
+        self.server_info.config(text=f"{host}:{self.throughput_port} ({streams} streams)")
+        (self.download_speed if reverse else self.upload_speed).config(text="Testing...")
+        
+        threading.Thread(target=self._lan_throughput_thread,
+                         args=(self.throughput_test,), daemon=True).start()
+
+    def _lan_throughput_thread(self, test):
+        """Thread for the self-hosted throughput test"""
+        from netmaster.throughput import DOWNLOAD, format_interval
+        
+        label = self.download_speed if test.direction == DOWNLOAD else self.upload_speed
+        
+        def on_interval(row):
+            self.append_text(self.lan_log, format_interval(row) + "\n")
+            self.set_text(label, f"{row['mbps']:.2f} Mbps")
+        
+        try:
+            summary = test.run(on_interval)
+            self.results["lan_throughput"] = summary
+            self.set_text(label, f"{summary['mbps']:.2f} Mbps")
+            errors = f", {len(summary['errors'])} stream error(s)" if summary["errors"] else ""
+            self.append_text(self.lan_log,
+                             f"\n{summary['direction'].title()}: {summary['mbps']:.2f} Mbps over "
+                             f"{summary['streams']} stream(s) in {summary['seconds']:.1f}s{errors}\n")
+            self.update_status("Throughput test completed")
+        except Exception as e:
+            self.set_text(label, "Failed")
+            self.append_text(self.lan_log, f"Throughput test failed: {str(e)}\n")
+            self.update_status(f"Throughput test failed: {str(e)}")
+        finally:
+            self.throughput_test = None
+            self.set_text(self.lan_btn, "Run")
+
+    def toggle_throughput_server(self):
+        """Serve throughput tests on this machine, or stop serving"""
+        from netmaster.throughput import ThroughputServer
+        
+        if self.throughput_server is not None:
+            self.throughput_server.stop()
+            self.throughput_server = None
+            self.lan_serve_btn.config(text="Start Server")
+            self.lan_server_label.config(text="Server stopped")
+            return
+        try:
+            self.throughput_server = ThroughputServer(port=self.throughput_port).start()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not start the server: {str(e)}")
+            return
+        self.lan_serve_btn.config(text="Stop Server")
+        self.lan_server_label.config(text=f"Serving on port {self.throughput_port}")
 
     def scan_network_devices_gui(self):
         """Scan for network devices with GUI updates"""
+        if self.device_scanner is not None:
+            return
+        
         self.update_status("Scanning network devices...")
         
         # Clear previous results
-        for item in self.devices_tree.get_children():
-            self.devices_tree.delete(item)
+        self.devices_table.clear()
         
-        # Show loading message
-        self.devices_tree.insert("", tk.END, values=("Scanning...", "", "", ""))
+        from netmaster.discovery import DeviceScanner
         
-        threading.Thread(target=self._scan_devices_thread, daemon=True).start()
+        self.device_scanner = DeviceScanner()
+        threading.Thread(target=self._scan_devices_thread,
+                         args=(self.device_scanner,), daemon=True).start()
 
-    def _scan_devices_thread(self):
+    def _scan_devices_thread(self, scanner):
         """Thread for scanning network devices"""
+        from netmaster.discovery import CSV_FIELDS as DEVICE_FIELDS, default_network
+        from netmaster.records import to_record
+        
+        def on_device(device):
+            self.ui.append("devices", self._show_devices, dict(device))
+        
         try:
-            local_ip = socket.gethostbyname(socket.gethostname())
-            network_prefix = ".".join(local_ip.split(".")[:3])
-            
-            self.root.after(0, lambda: self.devices_tree.delete(*self.devices_tree.get_children()))
+            local = default_network()
+            if local is None:
+                raise RuntimeError("No active IPv4 interface found")
+            iface, address, network = local
+            self.update_status(f"Sweeping {network} on {iface}...")
             
-            # Simulate finding devices
-            devices = [
-                {"ip": f"{network_prefix}.1", "mac": "00:11:22:33:44:55", "hostname": "router", "vendor": "Cisco Systems"},
-                {"ip": f"{network_prefix}.100", "mac": "AA:BB:CC:DD:EE:FF", "hostname": "my-pc", "vendor": "Apple"},
-                {"ip": f"{network_prefix}.101", "mac": "11:22:33:44:55:66", "hostname": "phone", "vendor": "Samsung"},
-                {"ip": f"{network_prefix}.102", "mac": "22:33:44:55:66:77", "hostname": "tablet", "vendor": "Apple"}
-            ]
-            
-            for device in devices:
-                self.root.after(0, lambda d=device: self.devices_tree.insert(
-                    "", tk.END, values=(d["ip"], d["mac"], d["hostname"], d["vendor"])
-                ))
+            devices = scanner.sweep(network, on_device)
             
             # Save results
-            self.results["devices"] = devices
-            self.update_status(f"Found {len(devices)} network devices")
+            self.results["devices"] = to_record("devices", devices)
+            # Devices are re-sent as names resolve, so the file gets the final list
+            sink = self.open_export("devices", DEVICE_FIELDS)
+            if sink is not None:
+                with sink:
+                    for device in devices:
+                        sink.write(dict(device))
+            self.update_status(f"Found {len(devices)} network devices on {network}")
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Scan Error", 
-                f"An error occurred during device scan:\n{str(e)}"
-            ))
+            self.show_error("Scan Error", f"An error occurred during device scan:\n{str(e)}")
             self.update_status(f"Device scan failed: {str(e)}")
+        finally:
+            if self.device_scanner is scanner:
+                self.device_scanner = None
+
+    def _show_devices(self, devices):
+        """Insert or refresh a batch of discovered devices, keyed by IP"""
+        # A device is re-sent once its name or MAC is known; the latest wins
+        self.devices_table.upsert({device["ip"]: self.device_row(device) for device in devices})
+
+    def device_row(self, device):
+        return (device.get("ip", ""), device.get("mac", ""),
+                device.get("hostname", ""), device.get("vendor", ""))
 
     def locate_ip(self):
         """Geolocate an IP address"""
@@ -1160,53 +2404,124 @@ class NetworkMasterPro:
         self.update_status(f"Locating IP: {ip}...")
         
         # Clear previous results
-        for item in self.geo_tree.get_children():
-            self.geo_tree.delete(item)
+        self.geo_table.clear()
         
         threading.Thread(target=self._locate_ip_thread, args=(ip,), daemon=True).start()
 
     def _locate_ip_thread(self, ip):
         """Thread for geolocating IP"""
+        from netmaster.iplookup import ProviderError
+        from netmaster.records import to_record
+        
         try:
-            response = requests.get(f"https://ipinfo.io/{ip}/json", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = to_record("location", self.lookup_service.locate(ip))
+            
+            # Display in treeview
+            rows = self.property_rows(data, ["readme", "ip"])
+            self.ui.post(self.geo_table.apply, rows, key="geo_rows")
+            
+            # Create map if coordinates available
+            if "loc" in data:
+                lat, lon = map(float, data["loc"].split(","))
                 
-                # Display in treeview
-                for key, value in data.items():
-                    if key not in ["readme", "ip"]:
-                        self.root.after(0, lambda k=key, v=value: self.geo_tree.insert(
-                            "", tk.END, values=(k.capitalize(), v)
-                        ))
+                import folium
+                m = folium.Map(location=[lat, lon], zoom_start=10)
+                folium.Marker([lat, lon], popup=ip).add_to(m)
                 
-                # Create map if coordinates available
-                if "loc" in data:
-                    lat, lon = map(float, data["loc"].split(","))
-                    
-                    m = folium.Map(location=[lat, lon], zoom_start=10)
-                    folium.Marker([lat, lon], popup=ip).add_to(m)
-                    
-                    map_file = os.path.join(os.getcwd(), "temp_map.html")
-                    m.save(map_file)
-                    
-                    webbrowser.open(f"file://{map_file}")
+                map_file = os.path.join(os.getcwd(), "temp_map.html")
+                m.save(map_file)
                 
-                # Save results
-                self.results["location"] = data
-                self.update_status(f"Location found for IP: {ip}")
-            else:
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Location Error", 
-                    f"Could not locate IP: {ip}\nStatus code: {response.status_code}"
-                ))
-                self.update_status(f"Failed to locate IP: {ip}")
+                webbrowser.open(f"file://{map_file}")
+            
+            # Save results
+            self.results["location"] = data
+            self.update_status(f"Location found for IP: {ip}")
+        except ProviderError as e:
+            self.show_error("Location Error", f"Could not locate IP: {ip}\n{str(e)}")
+            self.update_status(f"Failed to locate IP: {ip}")
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Location Error", 
-                f"An error occurred during geolocation:\n{str(e)}"
-            ))
+            self.show_error("Location Error", f"An error occurred during geolocation:\n{str(e)}")
             self.update_status(f"Geolocation failed: {str(e)}")
 
+    def load_offline_db(self):
+        """Load (and compile if needed) an offline IP range database"""
+        path = filedialog.askopenfilename(title="Offline IP range database",
+                                          filetypes=[("Range database", "*.nmdb"),
+                                                     ("Range CSV", "*.csv *.tsv"),
+                                                     ("All files", "*.*")])
+        if path:
+            threading.Thread(target=self._load_offline_db_thread, args=(path,), daemon=True).start()
+
+    def _load_offline_db_thread(self, path):
+        """Thread for compiling and loading the offline database"""
+        try:
+            if not path.lower().endswith(".nmdb"):
+                from netmaster.geodb import compile_csv
+                
+                self.update_status(f"Compiling {os.path.basename(path)}...")
+                target = data_file("geo.nmdb")
+                # The current database may be mapped from target; release it first
+                self.lookup_service.unload_offline()
+                compile_csv(path, target)
+                path = target
+            self.lookup_service.load_offline(path)
+            ipv4, ipv6 = self.lookup_service.offline.counts
+            self.update_status(f"Offline database loaded: {ipv4} IPv4 / {ipv6} IPv6 ranges")
+        except Exception as e:
+            self.show_error("Offline Database Error", f"Could not load offline database:\n{str(e)}")
+            self.update_status(f"Offline database failed: {str(e)}")
+
+    def run_bulk_lookup(self):
+        """Enrich a file of IP addresses into NDJSON or CSV"""
+        if self.bulk_lookup is not None:
+            self.bulk_lookup.stop()
+            self.update_status("Stopping bulk lookup...")
+            return
+        
+        source = filedialog.askopenfilename(title="IP addresses to look up",
+                                            filetypes=[("Text / log files", "*.txt *.log *.csv"),
+                                                       ("All files", "*.*")])
+        if not source:
+            return
+        output = filedialog.asksaveasfilename(title="Save results as",
+                                              defaultextension=".ndjson",
+                                              filetypes=[("NDJSON", "*.ndjson"), ("CSV", "*.csv")])
+        if not output:
+            return
+        
+        from netmaster.bulk import BulkLookup
+        
+        self.bulk_lookup = BulkLookup(service=self.lookup_service)
+        self.bulk_geo_btn.config(text="Stop Bulk")
+        threading.Thread(target=self._bulk_lookup_thread,
+                         args=(self.bulk_lookup, source, output), daemon=True).start()
+
+    def _bulk_lookup_thread(self, bulk, source, output):
+        """Thread for bulk IP lookup"""
+        from netmaster.bulk import CSV_FIELDS, count_unique, format_progress
+        from netmaster.sinks import FileSink
+        
+        def on_progress(stats):
+            self.set_text(self.bulk_progress, format_progress(stats))
+        
+        try:
+            self.update_status(f"Counting addresses in {os.path.basename(source)}...")
+            total = count_unique(source)
+            self.update_status(f"Looking up {total} addresses...")
+            
+            with open(source, encoding="utf-8", errors="replace") as src, \
+                    FileSink(output, fields=CSV_FIELDS) as dst:
+                stats = bulk.run(src, dst, total=total, progress=on_progress)
+            
+            self.update_status(f"Bulk lookup finished: {stats['done']} addresses, "
+                               f"{stats['errors']} errors -> {os.path.basename(output)}")
+        except Exception as e:
+            self.show_error("Bulk Lookup Error", f"An error occurred during bulk lookup:\n{str(e)}")
+            self.update_status(f"Bulk lookup failed: {str(e)}")
+        finally:
+            self.bulk_lookup = None
+            self.set_text(self.bulk_geo_btn, "Bulk from File...")
+
     def lookup_ip(self):
         """Lookup IP information"""
         ip = self.ip_lookup_entry.get()
@@ -1221,42 +2536,27 @@ class NetworkMasterPro:
 
     def _lookup_ip_thread(self, ip):
         """Thread for IP lookup"""
+        from netmaster.iplookup import PROVIDERS
+        
+        output = self.ip_lookup_result
         try:
-            services = [
-                ("ipinfo.io", f"https://ipinfo.io/{ip}/json"),
-                ("ipapi.co", f"https://ipapi.co/{ip}/json/")
-            ]
-            
-            self.root.after(0, lambda: self.ip_lookup_result.insert(
-                tk.END, f"IP Lookup Results for {ip}:\n\n"))
+            self.append_text(output, f"IP Lookup Results for {ip}:\n\n")
             
-            for name, url in services:
+            for name in PROVIDERS:
                 try:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        self.root.after(0, lambda n=name, d=data: self.ip_lookup_result.insert(
-                            tk.END, f"=== {n} ===\n"))
-                        
-                        for key, value in data.items():
-                            if key not in ["readme", "ip"]:
-                                self.root.after(0, lambda k=key, v=value: self.ip_lookup_result.insert(
-                                    tk.END, f"{k.capitalize()}: {v}\n"))
-                        
-                        self.root.after(0, lambda: self.ip_lookup_result.insert(
-                            tk.END, "\n"))
-                    else:
-                        self.root.after(0, lambda n=name: self.ip_lookup_result.insert(
-                            tk.END, f"{n} returned status code {response.status_code}\n\n"))
+                    data = self.lookup_service.lookup(ip, provider=name)
+                    
+                    lines = [f"=== {name} ===\n"]
+                    for key, value in data.items():
+                        if key not in ["readme", "ip"]:
+                            lines.append(f"{key.capitalize()}: {value}\n")
+                    self.append_text(output, "".join(lines) + "\n")
                 except Exception as e:
-                    self.root.after(0, lambda n=name, e=e: self.ip_lookup_result.insert(
-                        tk.END, f"Error with {n}: {str(e)}\n\n"))
+                    self.append_text(output, f"Error with {name}: {str(e)}\n\n")
             
             self.update_status(f"IP lookup completed for {ip}")
         except Exception as e:
-            self.root.after(0, lambda: self.ip_lookup_result.insert(
-                tk.END, f"IP lookup failed: {str(e)}\n"))
+            self.append_text(output, f"IP lookup failed: {str(e)}\n")
             self.update_status(f"IP lookup failed: {str(e)}")
 
     def run_security_scan(self):
@@ -1279,8 +2579,8 @@ class NetworkMasterPro:
             
             # Check 2: DNS servers
             self.security_result.insert(tk.END, "\n2. DNS Servers:\n")
-            if "dns_info" in self.results and "DNS Servers" in self.results["dns_info"]:
-                for dns_server in self.results["dns_info"]["DNS Servers"]:
+            if "dns_info" in self.results and "nameservers" in self.results["dns_info"]:
+                for dns_server in self.results["dns_info"]["nameservers"]:
                     self.security_result.insert(tk.END, f"- {dns_server}\n")
             else:
                 self.security_result.insert(tk.END, "- No DNS information available\n")
@@ -1304,73 +2604,150 @@ class NetworkMasterPro:
 
     def get_dns_info(self):
         """Get DNS information"""
-        try:
-            resolver = dns.resolver.Resolver()
-            nameservers = resolver.nameservers
-            
-            test_domain = "google.com"
-            a_record = str(resolver.resolve(test_domain, "A")[0])
-            
-            return {
-                "DNS Servers": nameservers,
-                f"{test_domain} A Record": a_record
-            }
-        except Exception as e:
-            return {"error": str(e)}
+        from netmaster.records import to_record
+        
+        return to_record("dns_info", engine.get_dns_info())
 
     def run_speed_test(self):
         """Run speed test and return results"""
-        try:
-            st = speedtest.Speedtest()
-            st.get_best_server()
+        from netmaster.records import to_record
+        
+        return to_record("speed_test", engine.run_speed_test(history=self.get_speed_history()))
+
+    def get_speed_history(self):
+        """The on-disk speed test history, opened on first use (None if unavailable)"""
+        if self.speed_history is None:
+            from netmaster.history import SpeedHistory
             
-            return {
-                "download": f"{st.download() / 1_000_000:.2f} Mbps",
-                "upload": f"{st.upload() / 1_000_000:.2f} Mbps",
-                "ping": f"{st.results.ping:.2f} ms",
-                "server": st.results.server['name']
-            }
-        except Exception as e:
-            return {"error": str(e)}
+            try:
+                self.speed_history = SpeedHistory()
+            except Exception as e:
+                print(f"Error opening speed history: {e}")
+                self.speed_history = False
+        return self.speed_history or None
 
     def scan_network_devices(self):
-        """Scan for network devices (simulated)"""
-        try:
-            local_ip = socket.gethostbyname(socket.gethostname())
-            network_prefix = ".".join(local_ip.split(".")[:3])
-            
-            return [
-                {"ip": f"{network_prefix}.1", "mac": "00:11:22:33:44:55", "hostname": "router", "vendor": "Cisco Systems"},
-                {"ip": f"{network_prefix}.100", "mac": "AA:BB:CC:DD:EE:FF", "hostname": "my-pc", "vendor": "Apple"},
-                {"ip": f"{network_prefix}.101", "mac": "11:22:33:44:55:66", "hostname": "phone", "vendor": "Samsung"},
-                {"ip": f"{network_prefix}.102", "mac": "22:33:44:55:66:77", "hostname": "tablet", "vendor": "Apple"}
-            ]
-        except Exception as e:
-            return {"error": str(e)}
+        """Sweep the local subnet and return the live devices"""
+        from netmaster.records import to_record
+        
+        return to_record("devices", engine.scan_network_devices())
 
     def get_geolocation(self, ip):
         """Get geolocation for an IP address"""
-        try:
-            response = requests.get(f"https://ipinfo.io/{ip}/json", timeout=10)
-            if response.status_code == 200:
-                return response.json()
-            return {"error": f"Status code {response.status_code}"}
-        except Exception as e:
-            return {"error": str(e)}
+        from netmaster.records import to_record
+        
+        return to_record("location", engine.get_geolocation(ip, self.lookup_service))
 
     def update_dashboard(self):
         """Update dashboard tab"""
         self.update_dashboard_ip()
         self.update_dashboard_network()
-        
+        self.update_speed_labels()
+
+    def update_speed_labels(self):
+        """Show the latest speed test figures"""
         if "speed_test" in self.results:
             speed = self.results["speed_test"]
             if "download" in speed:
-                self.download_speed.config(text=speed["download"])
+                self.dashboard_download_label.config(text=f"{speed['download']:.2f} Mbps")
             if "upload" in speed:
-                self.upload_speed.config(text=speed["upload"])
-        
-        self.update_network_graph()
+                self.dashboard_upload_label.config(text=f"{speed['upload']:.2f} Mbps")
+            if "speed" not in self.built_tabs:
+                return
+            if "download" in speed:
+                self.download_speed.config(text=f"{speed['download']:.2f} Mbps")
+            if "upload" in speed:
+                self.upload_speed.config(text=f"{speed['upload']:.2f} Mbps")
+            if "ping" in speed:
+                self.ping_speed.config(text=f"{speed['ping']:.2f} ms")
+            if "server" in speed:
+                self.server_info.config(text=speed["server"])
+
+    def create_history_plot(self):
+        """Build the speed history chart"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        fig = Figure(figsize=(5, 2.2), facecolor=self.colors['primary'])
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(self.colors['primary'])
+        ax.set_ylabel("Mbps", color='white', fontsize=8)
+        ax.tick_params(axis='x', colors='white', labelsize=8)
+        ax.tick_params(axis='y', colors='white', labelsize=8)
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['light'])
+        ax.xaxis_date()
+        fig.subplots_adjust(left=0.1, right=0.97, bottom=0.15, top=0.95)
+        
+        download, = ax.plot([], [], color=self.colors['accent'], linewidth=1, marker='.',
+                            markersize=3, label="Download")
+        upload, = ax.plot([], [], color=self.colors['warning'], linewidth=1, marker='.',
+                          markersize=3, label="Upload")
+        ax.legend(loc="upper left", facecolor=self.colors['primary'], labelcolor='white',
+                  fontsize=7)
+        
+        canvas = FigureCanvasTkAgg(fig, master=self.history_graph)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return {"figure": fig, "axes": ax, "canvas": canvas, "lines": (download, upload),
+                "bands": []}
+
+    def update_speed_history(self):
+        """Chart the recorded speed tests in the selected range"""
+        if "speed" not in self.built_tabs:
+            return
+        history = self.get_speed_history()
+        if history is None or not len(history):
+            return
+        try:
+            from datetime import datetime
+            from netmaster.history import RAW
+            
+            days = {"24 hours": 1, "7 days": 7, "30 days": 30, "90 days": 90, "1 year": 365}
+            span = days.get(self.history_range.get())
+            start = time.time() - span * 86400 if span else None
+            # Only the range on screen is read, from the coarsest file that fits
+            resolution, rows = history.query(start, None, self.history_points)
+            if resolution == RAW:
+                self.history_label.config(text=f"{len(rows)} test(s)")
+            else:
+                tests = sum(row["count"] for row in rows)
+                self.history_label.config(text=f"{tests} test(s), {resolution} averages "
+                                               f"with min-max bands")
+            
+            if self.history_plot is None:
+                try:
+                    self.history_plot = self.create_history_plot()
+                except Exception as e:
+                    # No matplotlib: the label still counts the tests
+                    self.history_plot = {}
+                    print(f"Error creating history chart: {e}")
+            plot = self.history_plot
+            if not plot:
+                return
+            
+            ax = plot["axes"]
+            for band in plot["bands"]:
+                band.remove()
+            plot["bands"] = []
+            times = [datetime.fromtimestamp(row["time"]) for row in rows]
+            for line, metric in zip(plot["lines"], ("download", "upload")):
+                line.set_data(times, [row[metric] for row in rows])
+                if resolution != RAW:
+                    plot["bands"].append(ax.fill_between(
+                        times, [row[f"{metric}_min"] for row in rows],
+                        [row[f"{metric}_max"] for row in rows],
+                        color=line.get_color(), alpha=0.2, linewidth=0))
+            ax.relim()
+            ax.autoscale_view()
+            ax.set_ylim(bottom=0)
+            plot["canvas"].draw_idle()
+        except Exception as e:
+            print(f"Error updating speed history: {e}")
+
+    def update_quick_ip(self):
+        """Show the public IP in the sidebar"""
+        if "ip" in self.results["ip_info"]:
+            self.quick_ip_label.config(text=self.results["ip_info"]["ip"])
 
     def update_dashboard_ip(self):
         """Update IP info on dashboard"""
@@ -1384,55 +2761,256 @@ class NetworkMasterPro:
             text += f"{self.results['network_info'].get('local_ip', '')}"
             self.dashboard_connection_label.config(text=text)
 
-    def update_network_graph(self):
-        """Update network graph visualization"""
+    def start_traffic_monitor(self):
+        """Start sampling interface counters and drawing the live graph"""
+        from netmaster.traffic import TrafficMonitor
+        
+        try:
+            window = int(self.traffic_history / self.traffic_interval)
+            self.traffic_monitor = TrafficMonitor(interval=self.traffic_interval,
+                                                  window=window).start()
+        except Exception as e:
+            self.traffic_rate_label.config(text=f"Traffic monitor unavailable: {e}")
+            return
+        self._traffic_tick()
+        self.start_connection_monitor()
+
+    def start_connection_monitor(self):
+        """Start attributing connections and bandwidth to processes and hosts"""
+        from netmaster.connections import ConnectionMonitor
+        
+        self.connection_monitor = ConnectionMonitor(interval=self.talkers_interval).start()
+        self._talkers_tick()
+
+    def _talkers_tick(self):
+        """Refresh the top talkers chart while the dashboard is visible"""
+        if self.notebook.select() == str(self.tabs["dashboard"]):
+            self.update_talkers_chart()
+        self.root.after(int(self.talkers_interval * 1000), self._talkers_tick)
+
+    def create_talkers_plot(self):
+        """Build the persistent top-N bar chart"""
+        from matplotlib.figure import Figure
+        from matplotlib.ticker import FuncFormatter
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from netmaster.traffic import format_rate
+        
+        fig = Figure(figsize=(4.2, 4), facecolor=self.colors['primary'])
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(self.colors['primary'])
+        ax.invert_yaxis()
+        ax.tick_params(axis='x', colors='white', labelsize=8)
+        ax.tick_params(axis='y', colors='white', labelsize=8)
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['light'])
+        
+        positions = list(range(self.talkers_count))
+        rx_bars = ax.barh(positions, [0] * self.talkers_count, color=self.colors['accent'],
+                          label="Download")
+        tx_bars = ax.barh(positions, [0] * self.talkers_count, color=self.colors['warning'],
+                          label="Upload")
+        ax.set_yticks(positions)
+        ax.legend(loc="lower right", facecolor=self.colors['primary'], labelcolor='white',
+                  fontsize=8)
+        fig.subplots_adjust(left=0.38, right=0.97)
+        
+        canvas = FigureCanvasTkAgg(fig, master=self.talkers_graph)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return {
+            "figure": fig,
+            "axes": ax,
+            "canvas": canvas,
+            "rx": rx_bars,
+            "tx": tx_bars,
+            "rate_formatter": FuncFormatter(lambda value, pos: format_rate(value)),
+            "count_formatter": FuncFormatter(lambda value, pos: f"{value:.0f}")
+        }
+
+    def update_talkers_chart(self):
+        """Show the busiest processes or remote hosts from the last sample"""
+        monitor = self.connection_monitor
+        if monitor is None:
+            return
         try:
-            fig, ax = plt.subplots(figsize=(8, 4), facecolor=self.colors['primary'])
-            ax.set_facecolor(self.colors['primary'])
+            from matplotlib.ticker import MaxNLocator
             
-            devices = ["Router", "PC", "Phone", "Tablet", "IoT"]
-            traffic = [45, 30, 15, 5, 5]
+            if self.talkers_plot is None:
+                try:
+                    self.talkers_plot = self.create_talkers_plot()
+                except Exception as e:
+                    self.talkers_plot = {}
+                    print(f"Error creating talkers chart: {e}")
             
-            colors = [self.colors['accent'], self.colors['success'], 
-                     self.colors['warning'], self.colors['info'], 
-                     self.colors['danger']]
+            by_host = self.talkers_mode.get() == "By remote host"
+            if by_host:
+                rows = monitor.top_remotes(self.talkers_count)
+            else:
+                rows = monitor.top_processes(self.talkers_count)
+            self.talkers_label.config(
+                text=f"{monitor.connections} sockets, {len(monitor.processes)} processes, "
+                     f"{len(monitor.remotes)} hosts (+{monitor.opened} / -{monitor.closed})"
+                     + ("" if monitor.exact else ", rates estimated"))
+            plot = self.talkers_plot
+            if not plot:
+                return
+            
+            # Nothing moving: rank by connection count instead
+            by_rate = any(row["rx"] + row["tx"] for row in rows)
+            if not by_rate:
+                rows = (monitor.top_remotes(self.talkers_count, "connections") if by_host
+                        else monitor.top_processes(self.talkers_count, "connections"))
+            labels = []
+            for i in range(self.talkers_count):
+                row = rows[i] if i < len(rows) else None
+                rx = row["rx"] if row and by_rate else (row["connections"] if row else 0)
+                tx = row["tx"] if row and by_rate else 0
+                plot["rx"][i].set_width(rx)
+                plot["tx"][i].set_x(rx)
+                plot["tx"][i].set_width(tx)
+                if row is None:
+                    labels.append("")
+                else:
+                    if by_host:
+                        name = row["host"]
+                    else:
+                        name = f"{row['name']} ({row['pid']})" if row["pid"] else row["name"]
+                    labels.append(name if len(name) <= 24 else name[:23] + "…")
+            
+            ax = plot["axes"]
+            ax.set_yticklabels(labels)
+            peak = max([bar.get_x() + bar.get_width() for bar in plot["tx"]] + [1])
+            ax.set_xlim(0, peak * 1.1)
+            ax.get_legend().set_visible(by_rate)
+            if by_rate:
+                ax.xaxis.set_major_formatter(plot["rate_formatter"])
+                ax.xaxis.set_major_locator(MaxNLocator(4))
+                ax.set_xlabel("Throughput", color='white', fontsize=8)
+            else:
+                ax.xaxis.set_major_formatter(plot["count_formatter"])
+                ax.xaxis.set_major_locator(MaxNLocator(4, integer=True))
+                ax.set_xlabel("Connections", color='white', fontsize=8)
+            plot["canvas"].draw_idle()
+        except Exception as e:
+            print(f"Error updating talkers chart: {e}")
+
+    def _traffic_tick(self):
+        """Redraw the traffic graph while the dashboard is visible"""
+        if self.notebook.select() == str(self.tabs["dashboard"]):
+            self.update_network_graph()
+        self.root.after(int(self.traffic_interval * 1000), self._traffic_tick)
+
+    def update_traffic_interfaces(self):
+        """Refresh the interface list of the traffic graph"""
+        if self.traffic_monitor:
+            self.traffic_iface.config(values=["All interfaces"] + self.traffic_monitor.interfaces)
+
+    def create_traffic_plot(self):
+        """Build the one figure the traffic graph is drawn into"""
+        import numpy
+        from matplotlib.figure import Figure
+        from matplotlib.ticker import FuncFormatter
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from netmaster.traffic import format_rate
+        
+        fig = Figure(figsize=(8, 4), facecolor=self.colors['primary'])
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(self.colors['primary'])
+        ax.set_xlim(-self.traffic_history, 0)
+        ax.set_ylim(0, 1000)
+        ax.set_xlabel("Seconds ago", color='white')
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda value, pos: format_rate(value)))
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['light'])
+        
+        # Animated lines are left out of full redraws and blitted on top
+        rx_line, = ax.plot([], [], color=self.colors['accent'], label="Download", animated=True)
+        tx_line, = ax.plot([], [], color=self.colors['warning'], label="Upload", animated=True)
+        ax.legend(loc="upper left", facecolor=self.colors['primary'], labelcolor='white')
+        
+        canvas = FigureCanvasTkAgg(fig, master=self.dashboard_graph)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        plot = {
+            "figure": fig,
+            "axes": ax,
+            "canvas": canvas,
+            "lines": (rx_line, tx_line),
+            "buffer": numpy.empty((self.traffic_monitor.window, 3)),
+            "background": None
+        }
+        
+        def on_draw(event):
+            plot["background"] = canvas.copy_from_bbox(ax.bbox)
+            ax.draw_artist(rx_line)
+            ax.draw_artist(tx_line)
+        
+        canvas.mpl_connect("draw_event", on_draw)
+        canvas.draw()
+        return plot
+
+    def update_network_graph(self):
+        """Update network graph visualization"""
+        if self.traffic_monitor is None:
+            return
+        try:
+            from netmaster.traffic import format_rate
             
-            bars = ax.bar(devices, traffic, color=colors)
-            ax.set_title("Network Traffic Distribution", color='white', pad=20)
-            ax.set_ylabel("Traffic (%)", color='white')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
+            if self.traffic_plot is None:
+                try:
+                    self.traffic_plot = self.create_traffic_plot()
+                except Exception as e:
+                    # No matplotlib: keep showing the current rates as text
+                    self.traffic_plot = {}
+                    print(f"Error creating graph: {e}")
+            plot = self.traffic_plot
             
-            for spine in ax.spines.values():
-                spine.set_color(self.colors['light'])
+            nic = self.traffic_iface.get()
+            nic = None if nic == "All interfaces" else nic
+            times, rx, tx = self.traffic_monitor.series(nic, out=plot.get("buffer"))
+            if not len(times):
+                return
+            self.traffic_rate_label.config(text=f"↓ {format_rate(rx[-1])}   ↑ {format_rate(tx[-1])}")
+            if not plot:
+                return
             
-            if hasattr(self, 'dashboard_graph_canvas'):
-                self.dashboard_graph_canvas.get_tk_widget().destroy()
+            rx_line, tx_line = plot["lines"]
+            rx_line.set_data(times, rx)
+            tx_line.set_data(times, tx)
             
-            self.dashboard_graph_canvas = FigureCanvasTkAgg(fig, master=self.dashboard_graph)
-            self.dashboard_graph_canvas.draw()
-            self.dashboard_graph_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            ax, canvas = plot["axes"], plot["canvas"]
+            peak = max(rx.max(), tx.max(), 1000)
+            top = ax.get_ylim()[1]
+            if peak > top or peak < top / 4 or plot["background"] is None:
+                # Rescaling changes the ticks, so redraw everything once
+                ax.set_ylim(0, peak * 1.25)
+                canvas.draw()
+            else:
+                canvas.restore_region(plot["background"])
+                ax.draw_artist(rx_line)
+                ax.draw_artist(tx_line)
+                canvas.blit(ax.bbox)
         except Exception as e:
             print(f"Error updating graph: {e}")
 
     def update_ip_info(self):
         """Update IP information tab"""
+        if "ip_info" not in self.built_tabs:
+            return
+        
         if "ip_info" in self.results:
-            for item in self.public_ip_tree.get_children():
-                self.public_ip_tree.delete(item)
-            
-            for key, value in self.results["ip_info"].items():
-                if key not in ["readme", "ip"]:
-                    self.public_ip_tree.insert("", tk.END, values=(key.capitalize(), value))
+            self.public_ip_table.apply(self.property_rows(self.results["ip_info"], ["readme", "ip"]))
         
         if "network_info" in self.results:
-            for item in self.local_ip_tree.get_children():
-                self.local_ip_tree.delete(item)
-            
-            net_info = self.results["network_info"]
-            for key, value in net_info.items():
-                if key not in ["interfaces"]:
-                    self.local_ip_tree.insert("", tk.END, values=(key.capitalize(), value))
+            rows = self.property_rows(self.results["network_info"], ["interfaces"])
+            if "speed" in rows:
+                rows["speed"] = ("Speed", f"{rows['speed'][1]} Mbps")
+            self.local_ip_table.apply(rows)
+
+    def property_rows(self, data, skip):
+        """Key a dict's entries by name for a Property/Value table"""
+        return {key: (key.capitalize(), value) for key, value in data.items() if key not in skip}
 
     def update_all_tabs(self):
         """Update all tabs with latest data"""
@@ -1443,27 +3021,20 @@ class NetworkMasterPro:
 
     def update_devices(self):
         """Update connected devices tab"""
+        if "devices" not in self.built_tabs:
+            return
+        
         if "devices" in self.results and isinstance(self.results["devices"], list):
-            for item in self.devices_tree.get_children():
-                self.devices_tree.delete(item)
-            
-            for device in self.results["devices"]:
-                self.devices_tree.insert("", tk.END, values=(
-                    device.get("ip", ""),
-                    device.get("mac", ""),
-                    device.get("hostname", ""),
-                    device.get("vendor", "")
-                ))
+            self.devices_table.apply({device.get("ip", ""): self.device_row(device)
+                                      for device in self.results["devices"]})
 
     def update_geolocation(self):
         """Update geolocation tab"""
+        if "geo" not in self.built_tabs:
+            return
+        
         if "location" in self.results and self.results["location"]:
-            for item in self.geo_tree.get_children():
-                self.geo_tree.delete(item)
-            
-            for key, value in self.results["location"].items():
-                if key not in ["readme", "ip", "loc"]:
-                    self.geo_tree.insert("", tk.END, values=(key.capitalize(), value))
+            self.geo_table.apply(self.property_rows(self.results["location"], ["readme", "ip", "loc"]))
 
 if __name__ == "__main__":
     root = tk.Tk()
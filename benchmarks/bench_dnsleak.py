@@ -0,0 +1,51 @@
+"""Time the DNS leak test burst against one query after another
+
+Usage: python benchmarks/bench_dnsleak.py [paths] [rtt_ms]
+
+Runs a local stand-in authority that answers after `rtt_ms`, points
+`paths` nameserver paths at it and compares sending every nonce query in
+turn with DNSLeakTest's concurrent burst, checking that every query still
+shows up in the authoritative log.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.dnsleak import DNSLeakTest, LocalAuthority, format_report
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rtt = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    queries = 5
+
+    authority = LocalAuthority(delay=rtt)
+    try:
+        import dns.message
+        import dns.query
+
+        host, port = authority.server.host, authority.server.port
+        start = time.perf_counter()
+        for path in range(paths):
+            session_id, zone = authority.session()
+            for i in range(queries):
+                dns.query.udp(dns.message.make_query(f"q{i}.{zone}", "A"), host, timeout=2.0,
+                              port=port)
+        sequential = time.perf_counter() - start
+        print(f"{'one query after another':25} {sequential * 1000:8.0f} ms")
+
+        test = DNSLeakTest(authority, [authority.address] * paths, use_os=False, queries=queries)
+        report = test.run()
+        logged = sum(row["queries"] for row in report["resolvers"])
+        print(f"{'concurrent burst':25} {report['elapsed'] * 1000:8.0f} ms  "
+              f"({logged}/{paths * queries} queries logged)")
+        print()
+        print(format_report(report), end="")
+    finally:
+        authority.close()
+
+
+if __name__ == "__main__":
+    main()
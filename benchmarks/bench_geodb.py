@@ -0,0 +1,68 @@
+"""Measure offline range database open time and lookup throughput
+
+Usage: python benchmarks/bench_geodb.py [ranges] [lookups]
+"""
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.geodb import GeoDatabase, compile_csv, numpy
+
+
+def write_ranges(path, count):
+    """Synthetic, non-overlapping IPv4 ranges with a few hundred distinct records"""
+    step = (2 ** 32) // count
+    with open(path, "w") as f:
+        f.write("start_ip,end_ip,country,region,city,latitude,longitude,asn,org\n")
+        for i in range(count):
+            start = i * step
+            end = start + step // 2
+            f.write(f"{ipaddress.IPv4Address(start)},{ipaddress.IPv4Address(end)},"
+                    f"C{i % 200},R{i % 50},City{i % 300},1.0,2.0,{i % 400},Org {i % 400}\n")
+
+
+def main():
+    ranges = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "ranges.csv")
+        target = os.path.join(tmp, "ranges.nmdb")
+        write_ranges(source, ranges)
+
+        start = time.perf_counter()
+        compile_csv(source, target)
+        print(f"compile {ranges} ranges: {time.perf_counter() - start:.2f}s, "
+              f"{os.path.getsize(target) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        db = GeoDatabase(target)
+        print(f"open: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+        addresses = [random.getrandbits(32) for _ in range(lookups)]
+
+        sample = [ipaddress.IPv4Address(a) for a in addresses[:200000]]
+        start = time.perf_counter()
+        for ip in sample:
+            db._record_index(ip)
+        elapsed = time.perf_counter() - start
+        print(f"single lookups: {len(sample) / elapsed:,.0f}/s")
+
+        if numpy is not None:
+            batch = numpy.array(addresses, dtype=numpy.uint32)
+            start = time.perf_counter()
+            result = db.lookup_many(batch)
+            elapsed = time.perf_counter() - start
+            print(f"batch lookups: {len(batch) / elapsed:,.0f}/s "
+                  f"({int((result >= 0).sum())} matched)")
+            del result
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
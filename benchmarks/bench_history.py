@@ -0,0 +1,64 @@
+"""Chart a long speed test history from the rollups instead of every sample
+
+Usage: python benchmarks/bench_history.py [days] [tests_per_hour]
+
+Fills a temporary SpeedHistory with `days` of synthetic results, then
+compares reading and bucketing every raw sample (what a flat list of
+results would need) with SpeedHistory.query, which bisects the range and
+reads only the hourly or daily rollup records, for a few chart ranges.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.history import SpeedHistory
+
+
+def full_scan(history, start, span=86400):
+    """Decode every sample and average per day by hand"""
+    buckets = {}
+    for row in history.read_samples():
+        if row["time"] >= start:
+            bucket = buckets.setdefault(row["time"] - row["time"] % span, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += row["download"]
+    return [(when, total / count) for when, (count, total) in sorted(buckets.items())]
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    per_hour = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+    with tempfile.TemporaryDirectory() as path:
+        history = SpeedHistory(path)
+        now = time.time()
+        count = days * 24 * per_hour
+        start = time.perf_counter()
+        for i in range(count):
+            history.append(random.uniform(50, 100), random.uniform(5, 20), random.uniform(5, 40),
+                           "bench", when=now - days * 86400 + i * 3600 / per_hour)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(path, "speed.nmts"))
+        print(f"{count} tests appended in {elapsed:.2f}s ({count / elapsed:.0f}/s), "
+              f"{size / 1e6:.1f} MB raw\n")
+
+        for label, range_days in (("24 hours", 1), ("30 days", 30), ("1 year", 365),
+                                  (f"{days} days", days)):
+            begin = now - range_days * 86400
+            start = time.perf_counter()
+            rows = full_scan(history, begin)
+            scan = time.perf_counter() - start
+            start = time.perf_counter()
+            resolution, points = history.query(begin, None, 500)
+            query = time.perf_counter() - start
+            print(f"{label:>10}: full scan {scan * 1000:8.1f} ms ({len(rows)} days)   "
+                  f"query {query * 1000:6.2f} ms ({len(points)} {resolution} points)")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
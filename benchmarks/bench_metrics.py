@@ -0,0 +1,48 @@
+"""Cost of a /metrics scrape
+
+Usage: python benchmarks/bench_metrics.py [targets] [scrapes]
+
+Fills a Metrics registry as a monitor pinging `targets` hosts would, then
+times rendering it directly and scraping it over HTTP. Neither sends a
+probe: the work is formatting state that is already aggregated.
+"""
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.latency import BUCKETS
+from netmaster.metrics import Metrics, MetricsServer
+
+
+def main():
+    targets = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    scrapes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    metrics = Metrics()
+    summaries = [{"target": f"10.0.0.{i}", "sent": 10, "received": 9, "mean": 12.5,
+                  "histogram": [0, 0, 1, 4, 3, 1] + [0] * (len(BUCKETS) - 5)}
+                 for i in range(targets)]
+    for check in ("ip", "network", "dns", "devices", "ping", "speed", "scan"):
+        metrics.record({"time": time.time(), "check": check, "status": "ok", "seconds": 0.5,
+                        "result": {"download": 90, "upload": 10, "ping": 15} if check == "speed"
+                        else summaries if check == "ping" else {"results": {}, "timings": {}}})
+    text = metrics.render()
+    print(f"{targets} ping targets: {text.count(chr(10))} lines, {len(text) / 1000:.1f} kB")
+
+    start = time.perf_counter()
+    for _ in range(scrapes):
+        metrics.render()
+    print(f"{'render':8} {(time.perf_counter() - start) / scrapes * 1000:8.3f} ms")
+
+    with MetricsServer(metrics, "127.0.0.1", 0) as server:
+        url = f"http://{server.address}/metrics"
+        start = time.perf_counter()
+        for _ in range(scrapes):
+            urllib.request.urlopen(url).read()
+        print(f"{'HTTP':8} {(time.perf_counter() - start) / scrapes * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
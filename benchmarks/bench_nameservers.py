@@ -0,0 +1,57 @@
+"""Check the nameserver benchmark against stub resolvers with known delays
+
+Usage: python benchmarks/bench_nameservers.py [rounds]
+
+Starts three local stub resolvers that each answer a name slowly the first
+time (a cache miss) and quickly afterwards, one of them dropping 10% of
+queries, runs NameserverBenchmark against them and prints the ranking next
+to the delays that were injected.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.dnsbench import NameserverBenchmark, format_result
+from netmaster.stubdns import StubDNSServer
+
+# name: (cold ms, warm ms, loss)
+PROFILES = {"fast": (40, 2, 0.0), "slow": (120, 15, 0.0), "lossy": (30, 3, 0.1)}
+
+
+def cached_delay(cold_ms, warm_ms):
+    seen = set()
+
+    def delay(name, record_type):
+        base = warm_ms if (name, record_type) in seen else cold_ms
+        seen.add((name, record_type))
+        return base / 1000 * random.uniform(0.9, 1.3)
+    return delay
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    servers = {}
+    for name, (cold, warm, loss) in PROFILES.items():
+        servers[name] = StubDNSServer(delay=cached_delay(cold, warm), loss=loss).start()
+    try:
+        labels = {f"127.0.0.1:{server.port}": name for name, server in servers.items()}
+        bench = NameserverBenchmark(list(labels), rounds=rounds, timeout=0.5, include_system=False)
+        start = time.perf_counter()
+        results = bench.run()
+        elapsed = time.perf_counter() - start
+        for result in results:
+            cold, warm, loss = PROFILES[labels[result["server"]]]
+            print(f"{labels[result['server']]:6} (cold {cold} ms, warm {warm} ms, loss {loss:.0%})  "
+                  f"{format_result(result)}, expected {result['expected_ms']} ms")
+        queries = sum(result["queries"] for result in results)
+        print(f"{queries} queries against {len(results)} servers in {elapsed:.2f}s")
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Measure port scan throughput against a local listener farm
+
+Usage: python benchmarks/bench_portscan.py [listeners] [concurrency]
+"""
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.portscan import PortScanner
+
+
+def start_listeners(count):
+    """Open `count` listening sockets on random loopback ports"""
+    listeners = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(1024)
+        listeners.append(sock)
+    return listeners
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    listeners = start_listeners(count)
+    expected = {sock.getsockname()[1] for sock in listeners}
+
+    scanner = PortScanner(concurrency=concurrency, timeout=1.0)
+    summary = scanner.scan("127.0.0.1", "1-65535")
+    found = {port for _, port in summary["open"]}
+
+    print(f"Scanned {summary['scanned']} ports in {summary['elapsed']:.2f}s "
+          f"({summary['rate']:.0f} ports/s, concurrency {scanner.concurrency})")
+    print(f"Listeners found: {len(expected & found)}/{len(expected)}")
+
+    for sock in listeners:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare sequential vs hedged public IP lookup against a local latency stub
+
+Usage: python benchmarks/bench_public_ip.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.publicip import PublicIPLookup
+
+# path -> (delay in seconds, status)
+PROVIDERS = {
+    "/slow": (2.0, 200),
+    "/broken": (0.2, 500),
+    "/fast": (0.15, 200),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, status = PROVIDERS.get(self.path, (0, 404))
+        time.sleep(delay)
+        body = json.dumps({"ip": "203.0.113.7", "country": "ZZ"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def sequential(services, api_delay=1.5):
+    """The original behaviour: one provider at a time, then sleep"""
+    for service in services:
+        try:
+            response = requests.get(service, timeout=10)
+            if response.status_code == 200:
+                data = response.json()
+                time.sleep(api_delay)
+                return data
+        except Exception:
+            continue
+    return {"error": "Could not fetch IP info"}
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    services = [base + path for path in PROVIDERS]
+
+    start = time.perf_counter()
+    sequential(services)
+    print(f"sequential: {time.perf_counter() - start:.3f}s")
+
+    lookup = PublicIPLookup(services, rate=100, burst=100)
+    for _ in range(3):
+        start = time.perf_counter()
+        data = lookup.lookup()
+        print(f"hedged:     {time.perf_counter() - start:.3f}s via {lookup.last_provider} -> {data.get('ip')}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
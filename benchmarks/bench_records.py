@@ -0,0 +1,82 @@
+"""Memory and speed of typed result records for a large port scan
+
+Usage: python benchmarks/bench_records.py [hosts] [ports_per_host]
+
+Builds the same port scan result set three ways and measures it with
+tracemalloc: per-row dicts (like NDJSON rows), the (host, port, state)
+tuples keyed by (host, port) that the port table keeps, and a
+PortTable. Then times JSON against the binary snapshot format and
+diffing two scans, both for a rescan of the same probes and for scans
+whose probe order differs.
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.records import PortTable, Snapshot, diff, dumps, loads
+
+STATES = ["open"] * 2 + ["closed"] * 90 + ["filtered"] * 8
+
+
+def results(hosts, ports, seed):
+    rng = random.Random(seed)
+    for h in range(hosts):
+        host = f"10.0.{h // 256}.{h % 256}"
+        for port in range(1, ports + 1):
+            yield host, port, rng.choice(STATES)
+
+
+def measure(label, build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:28} {size / 1e6:8.2f} MB")
+    return value
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    value = func()
+    print(f"{label:28} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return value
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    ports = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rows = list(results(hosts, ports, 1))
+    print(f"{len(rows)} port results on {hosts} hosts\n")
+
+    # Fresh strings per row, as they arrive from the scanner
+    measure("list of dicts", lambda: [{"host": "%s" % host, "port": port, "state": "%s" % state}
+                                      for host, port, state in rows])
+    measure("dict of tuples (table rows)",
+            lambda: {("%s" % host, port): ("%s" % host, port, "%s" % state)
+                     for host, port, state in rows})
+    table = measure("PortTable", lambda: PortTable(rows))
+    print()
+
+    old = Snapshot(time=time.time(), ports=table)
+    text = timed("JSON encode", lambda: json.dumps(old.to_dict()))
+    timed("JSON decode", lambda: Snapshot.from_dict(json.loads(text)))
+    data = timed("binary encode", lambda: dumps(old))
+    timed("binary decode", lambda: loads(data))
+    print(f"{'size':28} JSON {len(text) / 1e6:.2f} MB, binary {len(data) / 1e6:.2f} MB\n")
+
+    rescan = Snapshot(time=time.time(), ports=PortTable(results(hosts, ports, 2)))
+    changes = timed("diff, same probes", lambda: diff(old, rescan))
+    shuffled = list(results(hosts, ports, 2))
+    random.shuffle(shuffled)
+    reordered = Snapshot(time=time.time(), ports=PortTable(shuffled))
+    timed("diff, different order", lambda: diff(old, reordered))
+    print(f"{len(changes)} ports changed state")
+
+
+if __name__ == "__main__":
+    main()
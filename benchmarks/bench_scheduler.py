@@ -0,0 +1,50 @@
+"""Overhead of the monitoring scheduler with many jobs
+
+Usage: python benchmarks/bench_scheduler.py [jobs] [seconds]
+
+Schedules `jobs` trivial checks every second (with jitter) for `seconds`
+and reports the CPU time the process used and that memory stays flat:
+rows go to a rotating FileSink and only the last row per job is kept.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.scheduler import Monitor
+from netmaster.sinks import FileSink
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as directory:
+        sink = FileSink(os.path.join(directory, "monitor.ndjson"), max_bytes=1000000, backups=2)
+        monitor = Monitor(sink)
+        for i in range(jobs):
+            monitor.add(f"check{i}", lambda: {"value": 1}, "1s", jitter=0.5)
+
+        tracemalloc.start()
+        cpu = time.process_time()
+        monitor.start()
+        time.sleep(seconds / 2)
+        middle = tracemalloc.get_traced_memory()[0]
+        time.sleep(seconds / 2)
+        monitor.stop()
+        used = time.process_time() - cpu
+        end = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        sink.close()
+    runs = sum(job.runs for job in monitor.jobs.values())
+    print(f"{jobs} jobs every 1s for {seconds:g}s: {runs} runs, {sink.rotations} rotations")
+    print(f"CPU {used:.2f}s ({used / seconds * 100:.1f}% of one core), "
+          f"{used / max(runs, 1) * 1e6:.0f} us per run")
+    print(f"traced memory {middle / 1e6:.2f} MB halfway, {end / 1e6:.2f} MB at the end")
+
+
+if __name__ == "__main__":
+    main()
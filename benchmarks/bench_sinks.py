@@ -0,0 +1,74 @@
+"""Throughput and memory of streaming result sinks
+
+Usage: python benchmarks/bench_sinks.py [rows]
+
+Writes the same port scan rows as NDJSON and CSV under each fsync policy
+and reports rows/s, then compares peak memory (tracemalloc) of keeping
+every row in a list and writing it at the end, as the exporters used to,
+with streaming the rows through a rotating FileSink.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.sinks import FORMATS, FSYNC_POLICIES, NDJSON, FileSink
+
+STATES = ["open", "closed", "closed", "closed", "filtered"]
+
+
+def rows(count):
+    for i in range(count):
+        yield {"host": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", "port": i % 65535 + 1,
+               "state": STATES[i % len(STATES)]}
+
+
+def throughput(path, count, format, fsync):
+    start = time.perf_counter()
+    with FileSink(path, format, fsync=fsync) as sink:
+        for row in rows(count):
+            sink.write(row)
+    seconds = time.perf_counter() - start
+    print(f"{format:7} fsync={fsync:6} {count / seconds:12,.0f} rows/s  "
+          f"{os.path.getsize(path) / 1e6:7.2f} MB")
+
+
+def peak(label, func):
+    tracemalloc.start()
+    func()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:28} {size / 1e6:8.2f} MB peak")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rows")
+        print(f"{count} rows\n")
+        for format in FORMATS:
+            for fsync in FSYNC_POLICIES:
+                throughput(path, count, format, fsync)
+        print()
+
+        def in_memory():
+            collected = list(rows(count))
+            with open(path, "w", encoding="utf-8") as f:
+                for row in collected:
+                    f.write(json.dumps(row) + "\n")
+
+        def streamed():
+            with FileSink(path, NDJSON, max_bytes=10 * 1000 * 1000, backups=2) as sink:
+                for row in rows(count):
+                    sink.write(row)
+
+        peak("list, then write", in_memory)
+        peak("FileSink (10 MB rotation)", streamed)
+
+
+if __name__ == "__main__":
+    main()
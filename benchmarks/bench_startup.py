@@ -0,0 +1,78 @@
+"""Measure GUI startup: module import cost and time to first frame
+
+Usage: python benchmarks/bench_startup.py [runs]
+
+The import breakdown comes from python -X importtime; the first-frame
+time (process start to the window being mapped) needs a display.
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_FRAME = """
+import sys, time, tkinter as tk
+sys.path.insert(0, {root!r})
+import NetworkMaster
+imported = time.time()
+root = tk.Tk()
+app = NetworkMaster.NetworkMasterPro(root)
+def mapped(event):
+    if event.widget is root:
+        print(imported, time.time(), flush=True)
+        root.after(0, root.destroy)
+root.bind("<Map>", mapped)
+root.mainloop()
+"""
+
+
+def import_breakdown(top=15):
+    """Cumulative import time of NetworkMaster and its slowest dependencies"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import NetworkMaster"],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    if proc.returncode:
+        print(proc.stderr.strip().splitlines()[-1])
+    return sorted(rows, reverse=True)[:top]
+
+
+def first_frame(runs):
+    """Seconds from process start to import done and to the first mapped frame"""
+    samples = []
+    for _ in range(runs):
+        start = time.time()
+        proc = subprocess.run([sys.executable, "-c", FIRST_FRAME.format(root=ROOT)],
+                              cwd=ROOT, capture_output=True, text=True, timeout=60)
+        if proc.returncode or not proc.stdout.strip():
+            return None, proc.stderr.strip().splitlines()[-1:] or ["no output"]
+        imported, mapped = map(float, proc.stdout.split())
+        samples.append((mapped - start, mapped - imported))
+    return samples, None
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("slowest imports (cumulative ms):")
+    for cumulative, name in import_breakdown():
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    samples, error = first_frame(runs)
+    if samples is None:
+        print(f"first frame: skipped ({error[0]})")
+        return
+    wall = sorted(s[0] for s in samples)
+    build = sorted(s[1] for s in samples)
+    print(f"first frame: median {wall[len(wall) // 2] * 1000:.0f} ms wall, "
+          f"{build[len(build) // 2] * 1000:.0f} ms after imports ({runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
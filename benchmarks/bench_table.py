@@ -0,0 +1,69 @@
+"""Measure the result-table model with a large scan result set
+
+Usage: python benchmarks/bench_table.py [rows] [changed]
+
+Loads `rows` device-style rows, re-applies the same result set with
+`changed` rows edited, added and removed (the diff a rescan produces),
+then sorts, filters and reads the visible window like the widget does.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.table import TableModel
+
+
+def device(i, tag=""):
+    ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+    return ip, (ip, f"00:1a:2b:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+                f"host-{i}{tag}", random.choice(["Cisco", "Apple", "Intel", "Unknown"]))
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:34} {(time.perf_counter() - start) * 1000:8.2f} ms  {result if result is not None else ''}")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 65536
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    random.seed(1)
+    rows = dict(device(i) for i in range(count))
+    model = TableModel(["IP", "MAC", "Hostname", "Vendor"])
+
+    timed(f"initial apply ({count} rows)", model.apply, rows)
+    timed("re-apply unchanged", model.apply, rows)
+
+    rescan = dict(rows)
+    for key in random.sample(list(rescan), changed):
+        del rescan[key]
+    for i in random.sample(range(count), changed):
+        key, values = device(i, "-renamed")
+        if key in rescan:
+            rescan[key] = values
+    rescan.update(device(i) for i in range(count, count + changed))
+    timed(f"re-apply with ~{changed} of each change", model.apply, rescan)
+
+    timed("sort by IP", model.set_sort, 0)
+    timed("sort by hostname, reversed", model.set_sort, 2, True)
+    timed("filter 'cisco'", model.set_filter, "cisco")
+    timed("filter 'host-1'", model.set_filter, "host-1")
+    timed("narrow filter to 'host-12'", model.set_filter, "host-12")
+    timed("diff ~50 rows into sorted view",
+          model.update, dict(device(i, "-again") for i in random.sample(range(count), 50)))
+    timed("clear filter", model.set_filter, "")
+
+    reads = 1000
+    start = time.perf_counter()
+    for i in range(reads):
+        model.window(random.randrange(len(model)), 30)
+    print(f"{'window of 30 rows':34} {(time.perf_counter() - start) / reads * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
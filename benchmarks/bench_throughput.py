@@ -0,0 +1,69 @@
+"""Compare loopback TCP throughput of buffer strategies and stream counts
+
+Usage: python benchmarks/bench_throughput.py [seconds] [block_kib]
+
+Runs a naive sender/receiver (a fresh bytes object for every send and
+recv) next to ThroughputTest with memoryview buffers, with sendfile, and
+with several parallel streams, all against a local ThroughputServer.
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.throughput import ThroughputServer, ThroughputTest
+
+
+def naive(seconds, block):
+    """Allocate per chunk on both ends, as a simple hand-written test would"""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    received = [0]
+
+    def sink():
+        conn, _ = listener.accept()
+        with conn:
+            while True:
+                chunk = conn.recv(block)
+                if not chunk:
+                    return
+                received[0] += len(chunk)
+
+    thread = threading.Thread(target=sink)
+    thread.start()
+    data = os.urandom(block * 2)
+    with socket.create_connection(listener.getsockname()) as sock:
+        start = time.monotonic()
+        offset = 0
+        while time.monotonic() - start < seconds:
+            sock.sendall(data[offset:offset + block])
+            offset = (offset + 4096) % block
+    thread.join()
+    elapsed = time.monotonic() - start
+    listener.close()
+    return received[0] * 8 / elapsed / 1e6
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    block = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else 128 * 1024
+
+    print(f"{'naive, 1 stream':32} {naive(seconds, block):10.0f} Mbps")
+    with ThroughputServer("127.0.0.1", 0) as server:
+        cases = [("memoryview, 1 stream", 1, False, False),
+                 ("sendfile, 1 stream", 1, True, False),
+                 ("sendfile, 4 streams", 4, True, False),
+                 ("sendfile, 4 streams, reverse", 4, True, True)]
+        for label, streams, zerocopy, reverse in cases:
+            test = ThroughputTest("127.0.0.1", server.port, streams=streams, duration=seconds,
+                                  block=block, zerocopy=zerocopy, reverse=reverse)
+            summary = test.run()
+            print(f"{label:32} {summary['mbps']:10.0f} Mbps  {summary['bytes'] / 1e9:.1f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Trace a multi-hop path built from network namespaces
+
+Usage: sudo python benchmarks/bench_traceroute.py [routers] [rounds]
+
+Builds client -> router x N -> server namespaces joined by veth pairs,
+with ICMP rate limiting off as in a lab except that every second router
+never answers (like many real routers), then runs itself again inside the
+client namespace to compare a classic hop-by-hop traceroute with
+PathTracer's parallel rounds. The namespaces are removed afterwards.
+Without root it only traces 127.0.0.1.
+"""
+import os
+import select
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.traceroute import (BASE_PORT, MSG_ERRQUEUE, PathTracer, format_path,
+                                  parse_error, trace_socket)
+
+PREFIX = "nmtrace"
+
+
+def sh(*command):
+    subprocess.run(command, check=True)
+
+
+def netns(name, *command):
+    sh("ip", "netns", "exec", name, *command)
+
+
+def build(routers):
+    """client (ns 0) .. server (ns routers + 1); returns the server address"""
+    names = [f"{PREFIX}{i}" for i in range(routers + 2)]
+    for name in names:
+        sh("ip", "netns", "add", name)
+        netns(name, "ip", "link", "set", "lo", "up")
+    for i in range(routers + 1):
+        left, right = f"{PREFIX}v{i}a", f"{PREFIX}v{i}b"
+        sh("ip", "link", "add", left, "netns", names[i], "type", "veth", "peer", "name", right,
+           "netns", names[i + 1])
+        netns(names[i], "ip", "addr", "add", f"10.99.{i}.1/24", "dev", left)
+        netns(names[i + 1], "ip", "addr", "add", f"10.99.{i}.2/24", "dev", right)
+        netns(names[i], "ip", "link", "set", left, "up")
+        netns(names[i + 1], "ip", "link", "set", right, "up")
+    for i, name in enumerate(names):
+        # Link k joins namespaces k and k + 1; route every other link's subnet
+        for link in range(routers + 1):
+            if link > i:
+                netns(name, "ip", "route", "add", f"10.99.{link}.0/24", "via", f"10.99.{i}.2")
+            elif link < i - 1:
+                netns(name, "ip", "route", "add", f"10.99.{link}.0/24", "via", f"10.99.{i - 1}.1")
+        if i > 0:
+            netns(name, "sysctl", "-qw", "net.ipv4.ip_forward=1")
+            netns(name, "sysctl", "-qw", "net.ipv4.icmp_ratelimit=0")
+        if i % 2 == 0 and i <= routers:
+            # A silent hop: no ICMP errors at all
+            netns(name, "sysctl", "-qw", "net.ipv4.icmp_msgs_per_sec=0")
+            netns(name, "sysctl", "-qw", "net.ipv4.icmp_msgs_burst=0")
+    return f"10.99.{routers}.2"
+
+
+def teardown(routers):
+    for i in range(routers + 2):
+        subprocess.run(["ip", "netns", "del", f"{PREFIX}{i}"], stderr=subprocess.DEVNULL)
+
+
+def hop_by_hop(target, max_hops, timeout=1.0):
+    """Classic traceroute: one probe per TTL, each waiting for the previous"""
+    sock = trace_socket(socket.AF_INET)
+    hops = []
+    try:
+        for ttl in range(1, max_hops + 1):
+            sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
+            sock.sendto(b"probe", (target, BASE_PORT + ttl - 1))
+            ready, _, _ = select.select([sock], [], [], timeout)
+            if not ready:
+                hops.append(None)
+                continue
+            _, ancdata, _, _ = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+            error = parse_error(socket.AF_INET, ancdata)
+            hops.append(error[2] if error else None)
+            if error and error[2] == target:
+                break
+    finally:
+        sock.close()
+    return hops
+
+
+def inner(target, routers, rounds):
+    max_hops = routers + 4
+    start = time.perf_counter()
+    hops = hop_by_hop(target, max_hops)
+    print(f"{'hop by hop':12} {(time.perf_counter() - start) * 1000:8.1f} ms  {hops}")
+
+    start = time.perf_counter()
+    PathTracer([target], max_hops=max_hops, timeout=1.0, resolve_names=False).run(rounds=1)
+    print(f"{'parallel':12} {(time.perf_counter() - start) * 1000:8.1f} ms  (one round)")
+
+    tracer = PathTracer([target, "127.0.0.1"], max_hops=max_hops, interval=0.1, timeout=1.0)
+    start = time.perf_counter()
+    rows = tracer.run(rounds=rounds)
+    print(f"{rounds} rounds over {len(rows)} targets in {time.perf_counter() - start:.2f}s\n")
+    for row in rows:
+        print(format_path(row))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--inner":
+        inner(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+    routers = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if os.geteuid() != 0:
+        print("Not root: tracing loopback only")
+        inner("127.0.0.1", 0, rounds)
+        return
+    teardown(routers)
+    try:
+        target = build(routers)
+        netns(f"{PREFIX}0", sys.executable, os.path.abspath(__file__), "--inner", target,
+              str(routers), str(rounds))
+    finally:
+        teardown(routers)
+
+
+if __name__ == "__main__":
+    main()
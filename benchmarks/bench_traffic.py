@@ -0,0 +1,63 @@
+"""Measure traffic monitor cost per sample and memory over a long run
+
+Usage: python benchmarks/bench_traffic.py [hours] [interfaces]
+
+Replays `hours` of 10 Hz samples against synthetic counters as fast as
+possible, reading the graph series every sample like the dashboard does,
+then times real psutil reads.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.traffic import TrafficMonitor, psutil_counters, numpy
+
+
+def synthetic(interfaces):
+    totals = {f"eth{i}": [0, 0] for i in range(interfaces)}
+    totals["lo"] = [0, 0]
+
+    def counters():
+        for value in totals.values():
+            value[0] += 125000
+            value[1] += 25000
+        return {nic: (rx, tx) for nic, (rx, tx) in totals.items()}
+    return counters
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    interfaces = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    samples = int(hours * 3600 * 10)
+
+    monitor = TrafficMonitor(interval=0.1, window=600, counters=synthetic(interfaces))
+    out = numpy.empty((monitor.window, 3))
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(samples):
+        monitor.sample(now=i * 0.1)
+        times, rx, tx = monitor.series(out=out)
+        if i == 1000:
+            baseline = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{samples} samples ({hours:g} h at 10 Hz, {interfaces + 1} interfaces): "
+          f"{elapsed / samples * 1e6:.1f} us per sample + series read")
+    print(f"memory after 1000 samples {baseline / 1024:.0f} KiB, "
+          f"at end {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB")
+
+    reads = 200
+    start = time.perf_counter()
+    for _ in range(reads):
+        psutil_counters()
+    print(f"psutil net_io_counters(pernic=True): "
+          f"{(time.perf_counter() - start) / reads * 1e6:.0f} us per read")
+
+
+if __name__ == "__main__":
+    main()
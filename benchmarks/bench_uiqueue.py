@@ -0,0 +1,52 @@
+"""Measure the UI update queue under a flood of worker results
+
+Usage: python benchmarks/bench_uiqueue.py [results]
+
+A worker thread posts `results` rows (batched appends), a status line and
+a progress label per row, while the main thread drains at ~60 fps like
+the Tk loop. Reports how many callbacks actually ran and the worst frame.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netmaster.uiqueue import UpdateQueue
+
+
+def main():
+    results = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    queue = UpdateQueue()
+    rows = []
+    labels = {}
+
+    def worker():
+        for i in range(results):
+            queue.append("rows", rows.extend, f"10.0.{i // 256 % 256}.{i % 256}:80 OPEN\n")
+            queue.post(labels.__setitem__, "status", f"{i} results", key="status")
+            queue.post(labels.__setitem__, "progress", i, key="progress")
+
+    thread = threading.Thread(target=worker)
+    start = time.perf_counter()
+    thread.start()
+    frames = 0
+    worst = 0.0
+    while thread.is_alive() or len(queue):
+        frame = time.perf_counter()
+        queue.drain()
+        worst = max(worst, time.perf_counter() - frame)
+        frames += 1
+        time.sleep(max(0.0, 0.016 - (time.perf_counter() - frame)))
+    elapsed = time.perf_counter() - start
+
+    stats = queue.stats()
+    assert len(rows) == results and labels["progress"] == results - 1
+    print(f"{stats['posted']} updates posted, {stats['ran']} callbacks ran "
+          f"({stats['coalesced']} coalesced) over {frames} frames in {elapsed:.2f}s")
+    print(f"worst drain: {worst * 1000:.2f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Network Master engine - probing code shared by the GUI and the CLI"""
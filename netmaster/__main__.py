@@ -0,0 +1,5 @@
+import sys
+
+from netmaster.cli import main
+
+sys.exit(main())
@@ -0,0 +1,183 @@
+"""Bulk IP enrichment: stream addresses in, stream NDJSON/CSV rows out
+
+Usage: python -m netmaster.bulk [input|-] [-o output] [--format ndjson|csv]
+"""
+import argparse
+import ipaddress
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from netmaster.iplookup import IPLookupService, DEFAULT_PROVIDER, PROVIDERS
+from netmaster.sinks import FSYNC_POLICIES, FORMATS, open_sink
+
+# Address-shaped text only, so timestamps, versions and MACs are never
+# candidates; ipaddress then just confirms octet ranges and the like
+_HEX = r"[0-9A-Fa-f]{1,4}"
+_IPV4 = r"(?:\d{1,3}\.){3}\d{1,3}"
+IP_PATTERN = re.compile(
+    rf"(?<![\w.:])(?:(?:{_HEX}:){{7}}{_HEX}|(?:{_HEX}:){{6}}{_IPV4}"
+    rf"|(?:{_HEX}(?::{_HEX}){{0,6}})?::(?:(?:{_HEX}:){{0,5}}{_IPV4}|{_HEX}(?::{_HEX}){{0,6}})?)"
+    rf"(?![\w:])"
+    # IPv4 may follow "ip:" and carry a ":port" or sentence-ending dot
+    rf"|(?<![\w.]){_IPV4}(?!\.?\w)")
+
+CSV_FIELDS = ["ip", "provider", "hostname", "city", "region", "country", "loc",
+              "org", "postal", "timezone", "error"]
+
+
+def extract_ips(line):
+    """Yield every valid IP address found in a line of text"""
+    for candidate in IP_PATTERN.findall(line):
+        try:
+            yield ipaddress.ip_address(candidate)
+        except ValueError:
+            continue
+
+
+def unique_ips(lines):
+    """Yield each IP address once, in first-seen order
+
+    Only the packed integers of addresses already seen are kept, never
+    the input lines themselves.
+    """
+    seen = set()
+    for line in lines:
+        for ip in extract_ips(line):
+            key = (ip.version, int(ip))
+            if key not in seen:
+                seen.add(key)
+                yield str(ip)
+
+
+def count_unique(path):
+    """First pass over a file to size the progress bar"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return sum(1 for _ in unique_ips(f))
+
+
+class BulkLookup:
+    """Fan lookups out over a bounded worker pool under provider rate limits"""
+
+    def __init__(self, service=None, provider=DEFAULT_PROVIDER, workers=16):
+        self.service = service or IPLookupService()
+        self.provider = provider
+        self.workers = max(1, int(workers))
+        self._stopped = False
+
+    def stop(self):
+        """Stop submitting new lookups"""
+        self._stopped = True
+
+    def _lookup(self, ip):
+        row = {"ip": ip, "provider": self.provider}
+        try:
+            data = self.service.lookup(ip, provider=self.provider)
+            row.update({k: v for k, v in data.items() if k not in ("ip", "readme")})
+        except Exception as e:
+            row["error"] = str(e)
+        return row
+
+    def run(self, lines, writer, total=None, progress=None, interval=0.5):
+        """Enrich every unique IP in lines and hand each row to writer.write
+
+        At most 2 x workers lookups are in flight, so memory stays flat
+        however long the input is. progress(stats) is called at most once
+        per interval seconds and once at the end.
+        """
+        self._stopped = False
+        stats = {"done": 0, "errors": 0, "total": total, "rate": 0.0, "eta": None,
+                 "elapsed": 0.0}
+        start = time.monotonic()
+        last_report = 0.0
+
+        def collect(futures):
+            nonlocal last_report
+            for future in futures:
+                row = future.result()
+                writer.write(row)
+                stats["done"] += 1
+                if "error" in row:
+                    stats["errors"] += 1
+            now = time.monotonic()
+            if progress and now - last_report >= interval:
+                last_report = now
+                progress(self._progress(stats, start))
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-lookup") as pool:
+            for ip in unique_ips(lines):
+                if self._stopped:
+                    break
+                if len(running) >= self.workers * 2:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    collect(done)
+                running.add(pool.submit(self._lookup, ip))
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+        self.service.cache.flush()
+
+        stats = self._progress(stats, start)
+        if progress:
+            progress(stats)
+        return stats
+
+    @staticmethod
+    def _progress(stats, start):
+        elapsed = time.monotonic() - start
+        stats["elapsed"] = round(elapsed, 2)
+        stats["rate"] = round(stats["done"] / elapsed, 1) if elapsed else 0.0
+        if stats["total"] and stats["rate"]:
+            stats["eta"] = round(max(0, stats["total"] - stats["done"]) / stats["rate"], 1)
+        return dict(stats)
+
+
+def format_progress(stats):
+    """Human readable one-line progress"""
+    total = f"/{stats['total']}" if stats["total"] else ""
+    eta = f", ETA {stats['eta']:.0f}s" if stats["eta"] is not None else ""
+    return f"{stats['done']}{total} IPs, {stats['errors']} errors, {stats['rate']:.1f}/s{eta}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m netmaster.bulk",
+                                     description="Enrich a stream of IP addresses")
+    parser.add_argument("input", nargs="?", default="-", help="file to read, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="file to write, or - for stdout")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("-p", "--provider", choices=sorted(PROVIDERS), default=DEFAULT_PROVIDER)
+    parser.add_argument("-w", "--workers", type=int, default=16)
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    parser.add_argument("--append", action="store_true", help="add to the output file")
+    parser.add_argument("--rotate", type=float, default=0, metavar="MB",
+                        help="start a new output file past this size")
+    parser.add_argument("--backups", type=int, default=5)
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="never")
+    args = parser.parse_args(argv)
+
+    total = count_unique(args.input) if args.input != "-" else None
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", errors="replace")
+    output = open_sink(args.output, args.format, CSV_FIELDS, max_bytes=int(args.rotate * 1e6),
+                       backups=args.backups, append=args.append, fsync=args.fsync)
+
+    def report(stats):
+        sys.stderr.write("\r" + format_progress(stats))
+        sys.stderr.flush()
+
+    try:
+        stats = BulkLookup(provider=args.provider, workers=args.workers).run(
+            source, output, total=total,
+            progress=None if args.quiet else report)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        output.close()
+    if not args.quiet:
+        sys.stderr.write("\n")
+    return 1 if stats["errors"] and stats["errors"] == stats["done"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
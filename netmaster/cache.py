@@ -0,0 +1,198 @@
+"""TTL + LRU lookup cache persisted to SQLite"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from netmaster.paths import data_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+# Prune expired and surplus rows on disk every this many writes
+PRUNE_EVERY = 256
+# Commit after this many writes or seconds, whichever comes first, so a
+# bulk run doesn't sync the disk once per lookup
+COMMIT_EVERY = 100
+COMMIT_INTERVAL = 5.0
+
+
+class LookupCache:
+    """Size-bounded LRU cache with per-entry TTL and SQLite persistence
+
+    Reads are served from memory, falling back to disk for entries the LRU
+    has evicted; writes also go to disk, committed in batches and at
+    close() or exit, so the cache survives restarts. Pass persist=False
+    for a memory-only cache.
+    """
+
+    def __init__(self, path=None, max_entries=4096, ttl=86400, max_disk_entries=100000,
+                 persist=True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()   # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._pending = 0
+        self._committed = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self._db = None
+        if persist:
+            self._db = sqlite3.connect(path or data_file("lookup_cache.sqlite"),
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(SCHEMA)
+            self._db.commit()
+            self._load()
+            atexit.register(self.close)
+
+    def _load(self):
+        """Warm memory with the most recently used unexpired rows"""
+        rows = self._db.execute(
+            "SELECT key, value, expires FROM cache WHERE expires > ? "
+            "ORDER BY updated DESC LIMIT ?", (time.time(), self.max_entries)).fetchall()
+        for key, value, expires in reversed(rows):
+            try:
+                self._entries[key] = (expires, json.loads(value))
+            except ValueError:
+                continue
+
+    def get(self, key, default=None):
+        """Return the cached value, or default if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_one(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires <= now:
+                self._entries.pop(key, None)
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.hits += 1
+            return value
+
+    def _load_one(self, key):
+        """Fetch an entry evicted from memory but still on disk"""
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], json.loads(row[1])
+        except ValueError:
+            return None
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key, value, ttl=None):
+        """Store value for ttl seconds (the cache default if None)"""
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires, updated) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires, now))
+                self._writes += 1
+                self._pending += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    self._prune(now)
+                if self._pending >= COMMIT_EVERY or \
+                        time.monotonic() - self._committed >= COMMIT_INTERVAL:
+                    self._commit()
+
+    def _commit(self):
+        self._db.commit()
+        self._pending = 0
+        self._committed = time.monotonic()
+
+    def flush(self):
+        """Commit writes still waiting for their batch"""
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._commit()
+
+    def _prune(self, now):
+        """Drop expired rows and keep the table within max_disk_entries"""
+        self._db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM cache WHERE key NOT IN "
+            "(SELECT key FROM cache ORDER BY updated DESC LIMIT ?)", (self.max_disk_entries,))
+
+    def get_or_fetch(self, key, fetch, ttl=None, cacheable=None):
+        """Return the cached value or call fetch() and cache its result"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = fetch()
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key):
+        """Forget a single key"""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        """Forget everything, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def stats(self):
+        """Return size and hit-rate counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self):
+        """Commit pending writes and close the SQLite connection"""
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
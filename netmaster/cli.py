@@ -0,0 +1,592 @@
+"""Headless command line interface: networkmaster scan|ip|ports|devices|dns|dnsbench|leak|ping|trace|geo|speed|history|throughput|connections|diff|monitor
+
+Every command writes JSON (or NDJSON for streaming commands) to stdout.
+Modules are imported per command so startup stays well under 200 ms.
+"""
+import argparse
+import json
+import sys
+
+STAGES = ["ip_info", "network_info", "dns_info", "devices", "location", "speed_test"]
+
+
+def emit(obj, pretty=False):
+    """Write one JSON document (one NDJSON line unless pretty)"""
+    sys.stdout.write(json.dumps(obj, indent=2 if pretty else None, default=str) + "\n")
+    sys.stdout.flush()
+
+
+# Result rows go here instead of stdout with --output (a netmaster.sinks sink)
+_sink = None
+
+
+def emit_row(row, pretty=False):
+    """One streamed result row: to the --output sink if there is one, else like emit"""
+    if _sink is not None:
+        _sink.write(row)
+    else:
+        emit(row, pretty)
+
+
+def failed(result):
+    return isinstance(result, dict) and "error" in result
+
+
+def open_history(args):
+    """The speed history to record into, unless --no-history"""
+    if args.no_history:
+        return None
+    from netmaster.history import SpeedHistory
+
+    return SpeedHistory()
+
+
+def cmd_scan(args):
+    from netmaster import engine
+
+    def on_done(name, result, error, seconds):
+        if args.ndjson:
+            emit_row({"stage": name, "seconds": round(seconds, 3),
+                      "result": result if error is None else {"error": str(error)}})
+
+    history = open_history(args) if "speed_test" not in args.skip else None
+    try:
+        results, timings = engine.full_scan(on_done, skip=args.skip, history=history)
+    finally:
+        if history is not None:
+            history.close()
+    timings = {name: round(seconds, 3) for name, seconds in timings.items()}
+    if args.save:
+        from netmaster.records import Snapshot
+
+        Snapshot.from_results(results).save(args.save)
+    if args.ndjson:
+        emit({"timings": timings})
+    else:
+        emit({"results": results, "timings": timings}, args.pretty)
+    return 0
+
+
+def cmd_ip(args):
+    from netmaster import engine
+
+    result = engine.get_public_ip_info()
+    emit(result, args.pretty)
+    return 1 if failed(result) else 0
+
+
+def cmd_ports(args):
+    from netmaster.portscan import PortScanner, OPEN
+
+    table = None
+    if args.save:
+        from netmaster.records import PortTable
+
+        table = PortTable()
+
+    def on_result(host, port, state):
+        if table is not None:
+            table.add(host, port, state)
+        if args.all or state == OPEN:
+            emit_row({"host": host, "port": port, "state": state})
+
+    def on_error(target, message):
+        emit_row({"host": target, "error": message})
+
+    scanner = PortScanner(concurrency=args.concurrency, timeout=args.timeout)
+    summary = scanner.scan(args.targets, args.ports, on_result, on_error)
+    if table is not None:
+        import time
+        from netmaster.records import Snapshot
+
+        Snapshot(time=time.time(), ports=table).save(args.save)
+    summary["open"] = len(summary["open"])
+    emit({"summary": summary})
+    return 0
+
+
+def cmd_devices(args):
+    from netmaster import engine
+
+    def on_device(device):
+        emit_row(device)
+
+    stream = args.ndjson or _sink is not None
+    result = engine.scan_network_devices(args.network, on_device if stream else None)
+    if not stream or failed(result):
+        emit(result, args.pretty)
+    return 1 if failed(result) else 0
+
+
+def cmd_dns(args):
+    from netmaster.resolver import BulkResolver, read_names, OK
+
+    if args.file:
+        source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8", errors="replace")
+    else:
+        source = args.domains
+    resolver = BulkResolver(args.server, args.port, args.concurrency, args.timeout)
+    try:
+        summary = resolver.resolve(read_names(source), args.type,
+                                   lambda row: emit_row(row, args.pretty))
+    finally:
+        if args.file and source is not sys.stdin:
+            source.close()
+    if not args.file:
+        return 0 if summary[OK] == summary["queries"] else 1
+    # Bulk mode: NXDOMAINs are expected, only a run with no answers fails
+    emit({"summary": summary})
+    return 1 if summary["queries"] and summary[OK] == 0 else 0
+
+
+def cmd_dnsbench(args):
+    from netmaster.dnsbench import NameserverBenchmark
+    from netmaster.resolver import read_names
+
+    corpus = None
+    if args.file:
+        with open(args.file, encoding="utf-8", errors="replace") as f:
+            corpus = list(read_names(f))
+    bench = NameserverBenchmark(args.server, corpus, rounds=args.rounds,
+                                concurrency=args.concurrency, timeout=args.timeout,
+                                include_system=not args.no_system)
+    results = bench.run()
+    for result in results:
+        emit_row(result, args.pretty)
+    return 0 if any(result["answered"] for result in results) else 1
+
+
+def cmd_leak(args):
+    from netmaster.dnsleak import DNSLeakTest, ENDPOINTS, LocalAuthority
+
+    endpoint = ENDPOINTS[args.endpoint]()
+    nameservers, use_os = args.server, not args.no_os
+    if isinstance(endpoint, LocalAuthority) and not args.server:
+        # Offline self-test: the stand-in authority is the only path
+        nameservers, use_os = [endpoint.address], False
+    try:
+        report = DNSLeakTest(endpoint, nameservers, use_os, args.queries, args.timeout,
+                             args.expected).run()
+    finally:
+        if isinstance(endpoint, LocalAuthority):
+            endpoint.close()
+    emit(report, args.pretty)
+    return 1 if report["leak"] else 0
+
+
+def cmd_ping(args):
+    from netmaster.latency import LatencyMonitor
+
+    monitor = LatencyMonitor(args.targets, interval=args.interval, timeout=args.timeout,
+                             window=args.window, method=args.method, port=args.port)
+    try:
+        monitor.run(args.count or None)
+    except KeyboardInterrupt:
+        # Report what was collected so far
+        pass
+    rows = monitor.summary()
+    for row in rows:
+        emit_row(row, args.pretty)
+    return 0 if any(row.get("received") for row in rows) else 1
+
+
+def cmd_trace(args):
+    from netmaster.traceroute import PathTracer
+
+    tracer = PathTracer(args.targets, max_hops=args.max_hops, interval=args.interval,
+                        timeout=args.timeout, resolve_names=not args.numeric)
+    try:
+        tracer.run(args.count or None)
+    except KeyboardInterrupt:
+        # Report what was collected so far
+        pass
+    rows = tracer.summary()
+    for row in rows:
+        emit_row(row, args.pretty)
+    return 0 if any(row.get("reached") for row in rows) else 1
+
+
+def cmd_geo(args):
+    if args.file:
+        from netmaster import bulk
+        from netmaster.sinks import format_for
+
+        fmt = format_for(args.output, args.format) if args.output else args.format
+        argv = [args.file, "-f", fmt, "-w", str(args.workers)]
+        if args.provider:
+            argv += ["-p", args.provider]
+        if args.output:
+            argv += ["-o", args.output, "--rotate", str(args.rotate), "--backups",
+                     str(args.backups), "--fsync", args.fsync] + (["--append"] if args.append else [])
+        return bulk.main(argv + ([] if args.progress else ["-q"]))
+
+    from netmaster import engine
+    from netmaster.iplookup import ProviderError
+
+    status = 0
+    service = engine.lookup_service()
+    for ip in args.ips:
+        try:
+            result = service.lookup(ip, args.provider) if args.provider else service.locate(ip)
+        except ProviderError as e:
+            result = {"ip": ip, "error": str(e)}
+        emit_row(result, args.pretty)
+        status |= failed(result)
+    return int(status)
+
+
+def cmd_speed(args):
+    from netmaster import engine
+
+    history = open_history(args)
+    try:
+        result = engine.run_speed_test(history=history)
+    finally:
+        if history is not None:
+            history.close()
+    emit(result, args.pretty)
+    return 1 if failed(result) else 0
+
+
+def cmd_history(args):
+    import time
+    from netmaster.history import SpeedHistory, SPANS
+
+    end = time.time()
+    start = end - args.days * 86400 if args.days else None
+    with SpeedHistory() as history:
+        if args.resolution == "auto":
+            resolution, rows = history.query(start, None, args.points)
+        elif args.resolution in SPANS:
+            resolution, rows = args.resolution, history.read_rollups(args.resolution, start)
+        else:
+            resolution, rows = args.resolution, history.read_samples(start)
+    for row in rows:
+        row["resolution"] = resolution
+        emit_row(row, args.pretty)
+    return 0
+
+
+def cmd_diff(args):
+    from netmaster.records import Snapshot, diff, summarize
+
+    changes = diff(Snapshot.load(args.old), Snapshot.load(args.new))
+    for change in changes:
+        emit_row(change, args.pretty)
+    emit({"summary": summarize(changes) or "no changes", "changes": len(changes)})
+    return 0
+
+
+def cmd_throughput(args):
+    from netmaster.throughput import ThroughputServer, ThroughputTest
+
+    if args.serve:
+        server = ThroughputServer(args.bind, args.port, zerocopy=not args.no_zerocopy)
+        server.start()
+        sys.stderr.write(f"Listening on {server.address}\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    test = ThroughputTest(args.host, args.port, streams=args.streams, duration=args.time,
+                          block=args.block * 1024, reverse=args.reverse,
+                          zerocopy=not args.no_zerocopy, interval=args.interval)
+    try:
+        summary = test.run(lambda row: emit_row({"interval": row}))
+    except OSError as e:
+        emit({"error": f"{args.host}:{args.port}: {e}"})
+        return 1
+    # Intervals were already streamed
+    summary.pop("intervals")
+    emit({"summary": summary}, args.pretty)
+    return 1 if summary["errors"] and not summary["bytes"] else 0
+
+
+def cmd_connections(args):
+    import time
+    from netmaster.connections import ConnectionMonitor
+
+    # Rates need two samples
+    monitor = ConnectionMonitor(interval=args.interval)
+    monitor.sample()
+    time.sleep(args.interval)
+    monitor.sample()
+    emit(monitor.summary(args.top), args.pretty)
+    return 0
+
+
+def network_spec(text):
+    """An IP address or CIDR block"""
+    import ipaddress
+
+    try:
+        ipaddress.ip_network(text, strict=False)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def job_spec(text):
+    """CHECK=SCHEDULE, e.g. ip=5m or "speed=0 */6 * * *" """
+    from netmaster.scheduler import CHECKS, parse_schedule
+
+    name, _, spec = text.partition("=")
+    if name not in CHECKS:
+        raise argparse.ArgumentTypeError(f"unknown check {name!r} (choose from {', '.join(CHECKS)})")
+    try:
+        parse_schedule(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return name, spec
+
+
+def cmd_monitor(args):
+    from netmaster.scheduler import Monitor, checks
+
+    sink = _sink
+    if sink is None:
+        from netmaster.paths import data_file
+        from netmaster.sinks import FileSink
+
+        # Without --output every row is kept in the data directory
+        sink = FileSink(data_file("monitor.ndjson"), append=True,
+                        max_bytes=int((args.rotate or 10) * 1e6), backups=args.backups,
+                        fsync=args.fsync)
+
+    def on_result(row):
+        if args.output != "-":
+            emit({key: row[key] for key in ("time", "check", "status", "seconds")})
+
+    history = open_history(args) if any(name == "speed" for name, _ in args.jobs) else None
+    available = checks(history, args.targets)
+    monitor = Monitor(sink, on_result, max_runs=args.runs or None)
+    server = None
+    if args.metrics:
+        from netmaster.metrics import Metrics, MetricsServer
+
+        metrics = Metrics()
+        monitor.listeners.append(metrics.record)
+        server = MetricsServer(metrics, args.metrics_bind, args.metrics).start()
+        sys.stderr.write(f"Metrics on http://{server.address}/metrics\n")
+    try:
+        for name, spec in args.jobs:
+            monitor.add(name, available[name], spec, jitter=args.jitter, overlap=args.overlap)
+        monitor.run()
+    finally:
+        monitor.stop()
+        if server is not None:
+            server.stop()
+        if sink is not _sink:
+            sink.close()
+        if history is not None:
+            history.close()
+    emit({"summary": monitor.status()}, args.pretty)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="networkmaster",
+                                     description="Network Master headless engine")
+    parser.add_argument("--pretty", action="store_true", help="indent JSON output")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="stream result rows to FILE (CSV if it ends in .csv, else NDJSON)")
+    parser.add_argument("--append", action="store_true", help="add to FILE instead of replacing it")
+    parser.add_argument("--rotate", type=float, default=0, metavar="MB",
+                        help="start a new FILE past this size, keeping --backups old ones")
+    parser.add_argument("--backups", type=int, default=5)
+    parser.add_argument("--fsync", choices=["never", "flush", "close"], default="never",
+                        help="when to force rows to disk")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    scan = commands.add_parser("scan", help="full network scan")
+    scan.add_argument("--skip", nargs="+", choices=STAGES, default=[], help="stages to leave out")
+    scan.add_argument("--ndjson", action="store_true", help="one line per stage as it finishes")
+    scan.add_argument("--no-history", action="store_true", help="don't record the speed test")
+    scan.add_argument("--save", metavar="FILE",
+                      help="write a snapshot for diff (.json, else compact binary)")
+    scan.set_defaults(func=cmd_scan)
+
+    ip = commands.add_parser("ip", help="public IP information")
+    ip.set_defaults(func=cmd_ip)
+
+    ports = commands.add_parser("ports", help="TCP port scan (NDJSON)")
+    ports.add_argument("targets", nargs="+", help="hostnames, IPs or CIDR blocks")
+    ports.add_argument("-p", "--ports", default="1-1024", help="e.g. 22,80,8000-8100 or common")
+    ports.add_argument("-c", "--concurrency", type=int, default=500)
+    ports.add_argument("-t", "--timeout", type=float, default=1.0)
+    ports.add_argument("--all", action="store_true", help="also report closed/filtered ports")
+    ports.add_argument("--save", metavar="FILE", help="write every result as a snapshot for diff")
+    ports.set_defaults(func=cmd_ports)
+
+    devices = commands.add_parser("devices", help="discover hosts on the local subnet")
+    devices.add_argument("network", nargs="?", help="CIDR to sweep (default: local subnet)")
+    devices.add_argument("--ndjson", action="store_true", help="stream devices as found")
+    devices.set_defaults(func=cmd_devices)
+
+    dns_cmd = commands.add_parser("dns", help="DNS lookup (NDJSON)")
+    dns_cmd.add_argument("domains", nargs="*", help="names to resolve")
+    dns_cmd.add_argument("-t", "--type", nargs="+", default=["A"],
+                         help="record types, e.g. A AAAA MX")
+    dns_cmd.add_argument("-f", "--file", help="bulk mode: file of names, or - for stdin")
+    dns_cmd.add_argument("-s", "--server", nargs="+", help="nameservers (default: system)")
+    dns_cmd.add_argument("--port", type=int, default=53)
+    dns_cmd.add_argument("-c", "--concurrency", type=int, default=200)
+    dns_cmd.add_argument("--timeout", type=float, default=2.0)
+    dns_cmd.set_defaults(func=cmd_dns)
+
+    dnsbench = commands.add_parser("dnsbench", help="rank nameservers by latency (NDJSON)")
+    dnsbench.add_argument("-s", "--server", nargs="+", default=[],
+                          help="extra nameservers, host or host:port")
+    dnsbench.add_argument("--no-system", action="store_true",
+                          help="leave out the configured nameservers")
+    dnsbench.add_argument("-f", "--file", help="domain corpus, one per line")
+    dnsbench.add_argument("-r", "--rounds", type=int, default=3, help="warm-cache rounds")
+    dnsbench.add_argument("-c", "--concurrency", type=int, default=4, help="queries in flight per server")
+    dnsbench.add_argument("--timeout", type=float, default=2.0)
+    dnsbench.set_defaults(func=cmd_dnsbench)
+
+    leak = commands.add_parser("leak", help="DNS leak test: which resolvers carry each path")
+    leak.add_argument("-e", "--endpoint", choices=["bash.ws", "local"], default="bash.ws",
+                      help="authoritative log (local = offline stand-in)")
+    leak.add_argument("-s", "--server", nargs="+", help="nameserver paths (default: configured)")
+    leak.add_argument("--no-os", action="store_true", help="skip the OS resolver path")
+    leak.add_argument("-n", "--queries", type=int, default=5, help="nonce queries per path")
+    leak.add_argument("--timeout", type=float, default=3.0)
+    leak.add_argument("--expected", nargs="+", type=network_spec,
+                      help="resolver IPs or CIDR blocks that are allowed")
+    leak.set_defaults(func=cmd_leak)
+
+    ping = commands.add_parser("ping", help="latency, jitter and loss to many targets (NDJSON)")
+    ping.add_argument("targets", nargs="+")
+    ping.add_argument("-i", "--interval", type=float, default=1.0, help="seconds between rounds")
+    ping.add_argument("-c", "--count", type=int, default=10, help="rounds (0 = until Ctrl-C)")
+    ping.add_argument("--timeout", type=float, default=2.0)
+    ping.add_argument("-w", "--window", type=int, default=600, help="samples kept per target")
+    ping.add_argument("-m", "--method", choices=["auto", "icmp", "tcp"], default="auto")
+    ping.add_argument("-p", "--port", type=int, default=443, help="port for TCP probes")
+    ping.set_defaults(func=cmd_ping)
+
+    trace = commands.add_parser("trace", help="MTR-style per-hop loss and latency (NDJSON)")
+    trace.add_argument("targets", nargs="+")
+    trace.add_argument("-m", "--max-hops", type=int, default=30)
+    trace.add_argument("-i", "--interval", type=float, default=1.0, help="seconds between rounds")
+    trace.add_argument("-c", "--count", type=int, default=10, help="rounds (0 = until Ctrl-C)")
+    trace.add_argument("--timeout", type=float, default=2.0)
+    trace.add_argument("-n", "--numeric", action="store_true", help="don't resolve hop names")
+    trace.set_defaults(func=cmd_trace)
+
+    geo = commands.add_parser("geo", help="IP geolocation (NDJSON)")
+    geo.add_argument("ips", nargs="*", help="addresses to locate")
+    geo.add_argument("-f", "--file", help="bulk mode: file of addresses, or - for stdin")
+    geo.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    geo.add_argument("-p", "--provider", choices=["ipinfo.io", "ipapi.co"],
+                     help="force an online provider")
+    geo.add_argument("-w", "--workers", type=int, default=16)
+    geo.add_argument("--progress", action="store_true", help="bulk progress on stderr")
+    geo.set_defaults(func=cmd_geo)
+
+    speed = commands.add_parser("speed", help="Internet speed test")
+    speed.add_argument("--no-history", action="store_true", help="don't record the result")
+    speed.set_defaults(func=cmd_speed)
+
+    history = commands.add_parser("history", help="recorded speed tests (NDJSON)")
+    history.add_argument("-d", "--days", type=float, default=30, help="how far back (0 = all)")
+    history.add_argument("-r", "--resolution", choices=["auto", "raw", "hourly", "daily"],
+                         default="auto", help="auto picks the finest that fits --points")
+    history.add_argument("--points", type=int, default=500)
+    history.set_defaults(func=cmd_history)
+
+    throughput = commands.add_parser("throughput",
+                                     help="TCP throughput to our own server, iperf-like (NDJSON)")
+    throughput.add_argument("host", nargs="?", help="server to test against")
+    throughput.add_argument("-s", "--serve", action="store_true", help="run the server instead")
+    throughput.add_argument("-B", "--bind", default="0.0.0.0", help="server address to listen on")
+    throughput.add_argument("-p", "--port", type=int, default=5201)
+    throughput.add_argument("-P", "--streams", type=int, default=4, help="parallel TCP streams")
+    throughput.add_argument("-t", "--time", type=float, default=10.0, help="seconds to run")
+    throughput.add_argument("-l", "--block", type=int, default=128, help="KiB per send")
+    throughput.add_argument("-R", "--reverse", action="store_true",
+                            help="server sends (download) instead of the client")
+    throughput.add_argument("-i", "--interval", type=float, default=1.0,
+                            help="seconds between interval reports")
+    throughput.add_argument("--no-zerocopy", action="store_true",
+                            help="send from memory instead of sendfile")
+    throughput.set_defaults(func=cmd_throughput)
+
+    diff = commands.add_parser("diff", help="what changed between two saved snapshots (NDJSON)")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.set_defaults(func=cmd_diff)
+
+    connections = commands.add_parser("connections",
+                                      help="top processes and remote hosts by traffic")
+    connections.add_argument("-n", "--top", type=int, default=10)
+    connections.add_argument("-i", "--interval", type=float, default=2.0,
+                             help="seconds between the two samples")
+    connections.set_defaults(func=cmd_connections)
+
+    monitor = commands.add_parser("monitor", help="run checks on a schedule until Ctrl-C")
+    monitor.add_argument("jobs", nargs="+", type=job_spec, metavar="CHECK=SCHEDULE",
+                         help="check (ip network dns devices ping speed scan) and an interval "
+                              "(30s, 5m, 1h) or cron spec (\"0 */6 * * *\", @daily)")
+    monitor.add_argument("-j", "--jitter", type=float,
+                         help="random start delay up to this many seconds "
+                              "(default: 10%% of the period, at most 300)")
+    monitor.add_argument("--overlap", choices=["skip", "queue"], default="skip",
+                         help="when a check is still running at its next slot")
+    monitor.add_argument("--targets", nargs="+", help="ping targets (default 1.1.1.1 8.8.8.8)")
+    monitor.add_argument("--runs", type=int, default=0, help="stop after this many runs")
+    monitor.add_argument("--no-history", action="store_true",
+                         help="don't record speed tests in the history")
+    monitor.add_argument("--metrics", type=int, default=0, metavar="PORT",
+                         help="serve Prometheus metrics on PORT/metrics (e.g. 9790)")
+    monitor.add_argument("--metrics-bind", default="0.0.0.0", metavar="ADDRESS")
+    monitor.set_defaults(func=cmd_monitor)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "geo" and not args.ips and not args.file:
+        parser.error("geo needs addresses or --file")
+    if args.command == "dns" and not args.domains and not args.file:
+        parser.error("dns needs names or --file")
+    if args.command == "throughput" and not args.host and not args.serve:
+        parser.error("throughput needs a server host or --serve")
+    global _sink
+    # Bulk geo lookups hand --output to netmaster.bulk themselves
+    if args.output and not (args.command == "geo" and args.file):
+        from netmaster.sinks import open_sink
+
+        # Fixed columns: the first row (often an error) must not decide them
+        fields = None
+        if args.command == "dns":
+            from netmaster.resolver import CSV_FIELDS as fields
+        elif args.command == "ports":
+            from netmaster.portscan import CSV_FIELDS as fields
+        elif args.command == "devices":
+            from netmaster.discovery import CSV_FIELDS as fields
+        try:
+            _sink = open_sink(args.output, fields=fields, max_bytes=int(args.rotate * 1e6), backups=args.backups,
+                              append=args.append, fsync=args.fsync)
+        except OSError as e:
+            parser.error(str(e))
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        return 0
+    finally:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+"""Per-process and per-remote-host connection and bandwidth attribution
+
+On Linux, TCP sockets and their byte counters (tcp_info bytes_acked /
+bytes_received) come from one NETLINK_SOCK_DIAG dump, UDP sockets from
+/proc/net/udp{,6}, and sockets are joined to processes by inode. Rates are
+per-socket counter deltas between samples, so both the process and the
+remote host totals are exact for TCP.
+
+Elsewhere (or without sock_diag) sockets come from /proc/net or
+psutil.net_connections, and each process's I/O counter delta is split
+evenly across its connections - an estimate, as the OS keeps no
+per-socket byte counts there.
+
+Everything is diffed against the previous sample: addresses are decoded
+once per host, and new sockets are looked up in the fds of processes that
+already own sockets; a full /proc/*/fd scan runs at most every `rescan`
+seconds.
+"""
+import os
+import socket
+import struct
+import threading
+import time
+
+PROC_TABLES = ("tcp", "tcp6", "udp", "udp6")
+TCP_LISTEN = "0A"
+TCP_TIME_WAIT = 6
+UNKNOWN_PID = 0
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+INET_DIAG_INFO = 2
+
+NLMSG_HEADER = struct.Struct("=IHHII")
+DIAG_REQUEST = struct.Struct("=BBBBI48x")
+# inet_diag_msg: family, state, timer, retrans, sport, dport, src, dst,
+# interface, cookie, expires, rqueue, wqueue, uid, inode
+DIAG_MSG = struct.Struct("=BBBBHH16s16sI8xIIIII")
+ATTR_HEADER = struct.Struct("=HH")
+# tcp_info.bytes_acked / bytes_received (Linux 4.1+)
+TCP_BYTES = struct.Struct("=QQ")
+TCP_BYTES_OFFSET = 120
+
+
+def decode_host(raw):
+    """Remote address to an IP string
+
+    Takes the packed network-order bytes from sock_diag or the hex field
+    from /proc/net (32-bit words in host order).
+    """
+    if isinstance(raw, str):
+        packed = bytes.fromhex(raw)
+        raw = b"".join(packed[i:i + 4][::-1] for i in range(0, len(packed), 4))
+    if len(raw) == 4:
+        return socket.inet_ntop(socket.AF_INET, raw)
+    if raw.startswith(b"\0" * 10 + b"\xff\xff"):
+        return socket.inet_ntop(socket.AF_INET, raw[12:])
+    return socket.inet_ntop(socket.AF_INET6, raw)
+
+
+def read_proc_sockets(proc_root="/proc", tables=PROC_TABLES):
+    """{inode: (proto, local, remote, port, state, None, None)} from /proc/net"""
+    sockets = {}
+    for proto in tables:
+        try:
+            with open(os.path.join(proc_root, "net", proto)) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    host, _, port = fields[2].rpartition(":")
+                    key = fields[9] if fields[9] != "0" else (proto, fields[1], fields[2])
+                    sockets[key] = (proto, fields[1], host, int(port, 16), fields[3], None, None)
+        except OSError:
+            continue
+    return sockets
+
+
+def read_diag_sockets():
+    """{inode: (proto, local, remote, port, state, sent, received)} for TCP
+
+    Uses a NETLINK_SOCK_DIAG dump; raises OSError (or AttributeError off
+    Linux) when it isn't available. TIME_WAIT sockets belong to no process
+    and are left out; local is None and port is only meaningful as zero or
+    non-zero.
+    """
+    sockets = {}
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG) as nl:
+        for family, proto in ((socket.AF_INET, "tcp"), (socket.AF_INET6, "tcp6")):
+            request = DIAG_REQUEST.pack(family, socket.IPPROTO_TCP, 1 << (INET_DIAG_INFO - 1),
+                                        0, 0xFFFFFFFF & ~(1 << TCP_TIME_WAIT))
+            nl.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(request), SOCK_DIAG_BY_FAMILY,
+                                      NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + request)
+            _read_diag_dump(nl, proto, 4 if family == socket.AF_INET else 16, sockets)
+    return sockets
+
+
+def _read_diag_dump(nl, proto, size, sockets):
+    while True:
+        data = nl.recv(1 << 20)
+        offset = 0
+        while offset < len(data):
+            length, kind = NLMSG_HEADER.unpack_from(data, offset)[:2]
+            if kind == NLMSG_DONE:
+                return
+            if kind == NLMSG_ERROR:
+                code = -struct.unpack_from("=i", data, offset + NLMSG_HEADER.size)[0]
+                raise OSError(code, os.strerror(code))
+            body = offset + NLMSG_HEADER.size
+            (_, state, _, _, _, dport, _, dst,
+             _, _, _, _, _, inode) = DIAG_MSG.unpack_from(data, body)
+            sent = received = None
+            attr, end = body + DIAG_MSG.size, offset + length
+            while attr + ATTR_HEADER.size <= end:
+                attr_len, attr_type = ATTR_HEADER.unpack_from(data, attr)
+                if attr_len < ATTR_HEADER.size:
+                    break
+                if (attr_type == INET_DIAG_INFO and
+                        attr_len - ATTR_HEADER.size >= TCP_BYTES_OFFSET + TCP_BYTES.size):
+                    sent, received = TCP_BYTES.unpack_from(
+                        data, attr + ATTR_HEADER.size + TCP_BYTES_OFFSET)
+                attr += (attr_len + 3) & ~3
+            # dport is big-endian, but only compared against zero
+            sockets[str(inode)] = (proto, None, dst[:size], dport, "%02X" % state, sent, received)
+            offset += (length + 3) & ~3
+
+
+def scan_socket_owners(proc_root="/proc", pids=None):
+    """{inode: pid} for every socket fd we are allowed to see (or only in `pids`)"""
+    owners = {}
+    if pids is None:
+        pids = [int(entry.name) for entry in os.scandir(proc_root) if entry.name.isdigit()]
+    for pid in pids:
+        try:
+            with os.scandir(os.path.join(proc_root, str(pid), "fd")) as fds:
+                for fd in fds:
+                    try:
+                        target = os.readlink(fd.path)
+                    except OSError:
+                        continue
+                    if target.startswith("socket:["):
+                        owners[target[8:-1]] = pid
+        except OSError:
+            continue
+    return owners
+
+
+class ConnectionMonitor:
+    """Sample sockets and traffic; keep top talkers by process and host
+
+    After each sample(), `processes` and `remotes` hold the aggregated rows
+    (rx/tx in bytes/s) and `opened` / `closed` the connection churn since
+    the previous one.
+    """
+
+    def __init__(self, interval=2.0, proc_root="/proc", rescan=10.0, use_proc=None,
+                 use_diag=None, max_cpu=0.02):
+        self.interval = interval
+        self.max_cpu = max_cpu
+        self.proc_root = proc_root
+        self.rescan = rescan
+        if use_proc is None:
+            use_proc = os.path.exists(os.path.join(proc_root, "net", "tcp"))
+        self.use_proc = use_proc
+        self.use_diag = use_proc and hasattr(socket, "AF_NETLINK") if use_diag is None else use_diag
+        self.processes = []
+        self.remotes = []
+        self.opened = 0
+        self.closed = 0
+        self.connections = 0
+        self.exact = False
+        self.sample_seconds = 0.0
+        self._sockets = {}
+        self._owners = {}
+        self._unowned = set()
+        self._last_scan = None
+        self._hosts = {}
+        self._procs = {}
+        self._io = {}
+        self._last_time = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _host(self, raw):
+        host = self._hosts.get(raw)
+        if host is None:
+            if len(self._hosts) > 65536:
+                self._hosts.clear()
+            host = self._hosts[raw] = decode_host(raw)
+        return host
+
+    def _linux_sockets(self, now):
+        """Sockets keyed by inode, owners resolved through /proc/*/fd"""
+        sockets = None
+        if self.use_diag:
+            try:
+                sockets = read_diag_sockets()
+                sockets.update(read_proc_sockets(self.proc_root, ("udp", "udp6")))
+            except (OSError, AttributeError):
+                # No sock_diag (old kernel, container policy); don't retry every sample
+                self.use_diag = False
+        if sockets is None:
+            sockets = read_proc_sockets(self.proc_root)
+
+        # Sockets of other users' processes stay unowned; don't look for them every time
+        unknown = [key for key in sockets if isinstance(key, str)
+                   and key not in self._owners and key not in self._unowned]
+        if self._last_scan is None or (unknown and now - self._last_scan >= self.rescan):
+            self._owners = scan_socket_owners(self.proc_root)
+            self._unowned = set()
+            self._last_scan = now
+        elif unknown:
+            # Usually a known process opened a new socket; only recheck those
+            pids = set(self._owners.values())
+            self._owners = {inode: pid for inode, pid in self._owners.items() if inode in sockets}
+            self._owners.update(scan_socket_owners(self.proc_root, pids))
+        if unknown:
+            self._unowned = {key for key in self._unowned if key in sockets}
+            self._unowned.update(key for key in unknown if key not in self._owners)
+
+        connections = {}
+        for key, (proto, local, host, port, state, sent, received) in sockets.items():
+            connected = port != 0 and state != TCP_LISTEN
+            remote = self._host(host) if connected else None
+            connections[key] = (self._owners.get(key, UNKNOWN_PID), proto, remote,
+                                state, sent, received)
+        return connections
+
+    def _psutil_sockets(self):
+        import psutil
+
+        connections = {}
+        for conn in psutil.net_connections(kind="inet"):
+            proto = "tcp" if conn.type == socket.SOCK_STREAM else "udp"
+            remote = conn.raddr.ip if conn.raddr else None
+            key = (proto, conn.laddr, conn.raddr)
+            connections[key] = (conn.pid or UNKNOWN_PID, proto, remote, conn.status, None, None)
+        return connections
+
+    def _process(self, pid):
+        """(psutil.Process, name) cached per pid"""
+        import psutil
+
+        entry = self._procs.get(pid)
+        if entry is None:
+            try:
+                proc = psutil.Process(pid)
+                entry = (proc, proc.name())
+            except Exception:
+                entry = (None, f"pid {pid}")
+            self._procs[pid] = entry
+        return entry
+
+    def _io_bytes(self, proc):
+        """(read, written) process I/O; None when not permitted"""
+        try:
+            io = proc.io_counters()
+        except Exception:
+            return None
+        # Linux read_bytes/write_bytes are disk only; *_chars count every read()/write()
+        return (getattr(io, "read_chars", io.read_bytes),
+                getattr(io, "write_chars", io.write_bytes))
+
+    def sample(self, now=None):
+        """Take one snapshot and update the aggregates"""
+        start = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        connections = self._linux_sockets(now) if self.use_proc else self._psutil_sockets()
+        elapsed = now - self._last_time if self._last_time is not None else None
+        previous = self._sockets
+
+        by_pid = {}
+        exact = False
+        for key, (pid, proto, remote, state, sent, received) in connections.items():
+            entry = by_pid.get(pid)
+            if entry is None:
+                entry = by_pid[pid] = {"connections": 0, "listening": 0, "remotes": {},
+                                       "rx": 0.0, "tx": 0.0, "counted": False}
+            if remote is None:
+                entry["listening"] += 1
+                continue
+            entry["connections"] += 1
+            rx = tx = 0.0
+            if sent is not None:
+                exact = entry["counted"] = True
+                if elapsed:
+                    # Sockets opened since the last sample count from zero
+                    before = previous.get(key)
+                    sent_before = before[4] if before and before[4] is not None else 0
+                    received_before = before[5] if before and before[5] is not None else 0
+                    tx = max(sent - sent_before, 0) / elapsed
+                    rx = max(received - received_before, 0) / elapsed
+            entry["rx"] += rx
+            entry["tx"] += tx
+            host = entry["remotes"].get(remote)
+            if host is None:
+                host = entry["remotes"][remote] = [0, 0.0, 0.0]
+            host[0] += 1
+            host[1] += rx
+            host[2] += tx
+
+        io = {}
+        processes = []
+        remotes = {}
+        for pid, entry in by_pid.items():
+            proc, name = self._process(pid) if pid != UNKNOWN_PID else (None, "unknown")
+            if proc is not None and not entry["counted"] and entry["connections"]:
+                # No socket counters: split the process's I/O across its connections
+                counters = self._io_bytes(proc)
+                if counters is not None:
+                    io[pid] = counters
+                    before = self._io.get(pid)
+                    if before is not None and elapsed:
+                        rx = max(counters[0] - before[0], 0) / elapsed
+                        tx = max(counters[1] - before[1], 0) / elapsed
+                        entry["rx"], entry["tx"] = rx, tx
+                        for host in entry["remotes"].values():
+                            host[1] = rx * host[0] / entry["connections"]
+                            host[2] = tx * host[0] / entry["connections"]
+            processes.append({"pid": pid, "name": name, "connections": entry["connections"],
+                              "listening": entry["listening"],
+                              "rx": entry["rx"], "tx": entry["tx"]})
+
+            for remote, (count, rx, tx) in entry["remotes"].items():
+                row = remotes.get(remote)
+                if row is None:
+                    row = remotes[remote] = {"host": remote, "connections": 0, "processes": set(),
+                                             "rx": 0.0, "tx": 0.0}
+                row["connections"] += count
+                row["processes"].add(name)
+                row["rx"] += rx
+                row["tx"] += tx
+
+        for row in remotes.values():
+            row["processes"] = sorted(row["processes"])
+
+        # Forget processes that no longer own sockets so pid reuse can't mislabel them
+        for pid in list(self._procs):
+            if pid not in by_pid:
+                del self._procs[pid]
+
+        with self._lock:
+            self.opened = len(connections.keys() - previous.keys()) if elapsed else 0
+            self.closed = len(previous.keys() - connections.keys())
+            self._sockets = connections
+            self._io = io
+            self._last_time = now
+            self.connections = len(connections)
+            self.exact = exact
+            self.processes = processes
+            self.remotes = list(remotes.values())
+            self.sample_seconds = time.perf_counter() - start
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            # With very many sockets, sample less often to stay within max_cpu
+            self._stop.wait(max(self.interval, self.sample_seconds / self.max_cpu))
+
+    def start(self):
+        """Sample in a daemon thread until stop()"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="connections", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @staticmethod
+    def _top(rows, n, key):
+        if key == "rate":
+            return sorted(rows, key=lambda r: (r["rx"] + r["tx"], r["connections"]),
+                          reverse=True)[:n]
+        return sorted(rows, key=lambda r: r[key], reverse=True)[:n]
+
+    def top_processes(self, n=10, key="rate"):
+        """Busiest processes by "rate" (rx + tx bytes/s) or "connections\""""
+        with self._lock:
+            return self._top(self.processes, n, key)
+
+    def top_remotes(self, n=10, key="rate"):
+        """Busiest remote hosts by rate or connection count"""
+        with self._lock:
+            return self._top(self.remotes, n, key)
+
+    def summary(self, n=10):
+        """Counts plus both top-N lists, JSON ready"""
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "processes": len(self.processes),
+                "remotes": len(self.remotes),
+                "opened": self.opened,
+                "closed": self.closed,
+                "exact": self.exact,
+                "sample_ms": round(self.sample_seconds * 1000, 2),
+                "top_processes": self._top(self.processes, n, "rate"),
+                "top_remotes": self._top(self.remotes, n, "rate"),
+            }
@@ -0,0 +1,266 @@
+"""Local subnet discovery: CIDR detection, parallel TCP-ping sweep and ARP merge"""
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from netmaster.portscan import clamp_concurrency
+
+# Ports used for TCP-ping; a RST is as good as a SYN-ACK for liveness
+PROBE_PORTS = (80, 443, 22, 445, 139, 53, 8080, 62078)
+
+# Threads used for reverse DNS of live hosts
+NAME_WORKERS = 64
+
+# Refuse to sweep anything bigger than a /16 in one go
+MAX_SWEEP_HOSTS = 65536
+
+# Columns of a streamed CSV, in the order a device row is built
+CSV_FIELDS = ["ip", "mac", "hostname", "vendor", "method"]
+
+ARP_TABLE = "/proc/net/arp"
+EMPTY_MAC = "00:00:00:00:00:00"
+
+
+def primary_address():
+    """Return the IPv4 address used for the default route"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # connect() on UDP only selects a route, nothing is sent
+        sock.connect(("192.0.2.1", 9))
+        return sock.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def local_networks():
+    """List (interface, address, network) for every usable IPv4 interface"""
+    networks = []
+    stats = psutil.net_if_stats()
+    for iface, addrs in psutil.net_if_addrs().items():
+        if iface in stats and not stats[iface].isup:
+            continue
+        for addr in addrs:
+            if addr.family != socket.AF_INET or not addr.netmask:
+                continue
+            ip = ipaddress.ip_address(addr.address)
+            if ip.is_loopback or ip.is_link_local:
+                continue
+            network = ipaddress.ip_network(f"{addr.address}/{addr.netmask}", strict=False)
+            networks.append((iface, addr.address, network))
+    return networks
+
+
+def default_network():
+    """Pick the subnet of the default-route interface, clamped to a sweepable size"""
+    networks = local_networks()
+    if not networks:
+        return None
+    primary = primary_address()
+    iface, address, network = next((n for n in networks if n[1] == primary), networks[0])
+    return iface, address, clamp_network(network, address)
+
+
+def clamp_network(network, address, max_hosts=MAX_SWEEP_HOSTS):
+    """Shrink an oversized network to the block around our own address"""
+    prefix = network.prefixlen
+    while network.num_addresses > max_hosts and prefix < network.max_prefixlen:
+        prefix += 1
+        network = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+    return network
+
+
+def normalize_mac(mac):
+    """Lower-case, colon separated MAC address"""
+    return mac.replace("-", ":").lower()
+
+
+def read_arp_table(path=ARP_TABLE):
+    """Return {ip: {"mac", "iface"}} from the kernel neighbour table"""
+    table = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            next(f, None)  # header
+            for line in f:
+                fields = line.split()
+                if len(fields) < 6:
+                    continue
+                ip, _, flags, mac, _, iface = fields[:6]
+                # 0x0 means the entry is incomplete (no reply yet)
+                if flags == "0x0" or mac == EMPTY_MAC:
+                    continue
+                table[ip] = {"mac": normalize_mac(mac), "iface": iface}
+        return table
+
+    # Windows and macOS: fall back to parsing `arp -a`
+    try:
+        output = subprocess.check_output(["arp", "-a"], universal_newlines=True,
+                                         stderr=subprocess.DEVNULL, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return table
+    pattern = re.compile(r"(\d+\.\d+\.\d+\.\d+)\D+?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})")
+    for ip, mac in pattern.findall(output):
+        mac = ":".join(part.zfill(2) for part in normalize_mac(mac).split(":"))
+        if mac not in (EMPTY_MAC, "ff:ff:ff:ff:ff:ff"):
+            table[ip] = {"mac": mac, "iface": ""}
+    return table
+
+
+def own_devices():
+    """Return {ip: mac} for this machine's own interfaces"""
+    own = {}
+    for iface, addrs in psutil.net_if_addrs().items():
+        mac = next((a.address for a in addrs if a.family == psutil.AF_LINK), "")
+        for addr in addrs:
+            if addr.family == socket.AF_INET:
+                own[addr.address] = normalize_mac(mac) if mac and mac != EMPTY_MAC else ""
+    return own
+
+
+class DeviceScanner:
+    """Sweep one or more subnets concurrently and report live hosts"""
+
+    def __init__(self, concurrency=4096, timeout=0.8, ports=PROBE_PORTS, resolve_names=True):
+        self.concurrency = clamp_concurrency(concurrency)
+        self.timeout = float(timeout)
+        self.ports = tuple(ports)
+        self.resolve_names = resolve_names
+        self._stopped = False
+
+    def stop(self):
+        """Ask a running sweep to finish after the in-flight probes"""
+        self._stopped = True
+
+    async def _tcp_ping(self, ip, port):
+        """Return True if the host answered on port with SYN-ACK or RST"""
+        loop = asyncio.get_running_loop()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError:
+            # EMFILE / ENOBUFS: no answer from this probe, the sweep goes on
+            return False
+        try:
+            sock.setblocking(False)
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), self.timeout)
+            return True
+        except ConnectionRefusedError:
+            return True
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            sock.close()
+
+    async def probe_host(self, ip):
+        """TCP-ping every probe port at once; the first answer wins"""
+        tasks = [asyncio.ensure_future(self._tcp_ping(ip, port)) for port in self.ports]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                if await next_done:
+                    return True
+            return False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _hostname(self, ip, executor):
+        """Reverse DNS lookup on the name resolution pool"""
+        loop = asyncio.get_running_loop()
+        try:
+            name = await asyncio.wait_for(
+                loop.run_in_executor(executor, socket.gethostbyaddr, ip), 2.0)
+            return name[0]
+        except (asyncio.TimeoutError, OSError):
+            return ""
+
+    async def sweep_async(self, networks, callback=None):
+        """Probe every host in networks, calling callback(device) as they appear
+
+        A device may be reported again once its hostname or MAC is known.
+        """
+        self._stopped = False
+        if isinstance(networks, (str, ipaddress.IPv4Network)):
+            networks = [networks]
+        networks = [ipaddress.ip_network(n, strict=False) for n in networks]
+
+        def in_scope(ip):
+            address = ipaddress.ip_address(ip)
+            return any(address in network for network in networks)
+
+        own = own_devices()
+        arp = read_arp_table()
+        found = {}
+        name_tasks = []
+        executor = ThreadPoolExecutor(max_workers=NAME_WORKERS)
+
+        async def resolve(device):
+            hostname = await self._hostname(device["ip"], executor)
+            if hostname:
+                device["hostname"] = hostname
+                if callback:
+                    callback(device)
+
+        def report(ip, method):
+            if ip in found:
+                return
+            device = {
+                "ip": ip,
+                "mac": own.get(ip) or arp.get(ip, {}).get("mac", ""),
+                "hostname": "",
+                "vendor": "This device" if ip in own else "",
+                "method": method,
+            }
+            found[ip] = device
+            if callback:
+                callback(device)
+            if self.resolve_names:
+                name_tasks.append(asyncio.ensure_future(resolve(device)))
+
+        # Our own addresses and hosts already in the neighbour table are known alive
+        for ip in sorted(own, key=ipaddress.ip_address):
+            if in_scope(ip):
+                report(ip, "local")
+        for ip in sorted(arp, key=ipaddress.ip_address):
+            if in_scope(ip):
+                report(ip, "arp")
+
+        hosts = (str(h) for network in networks for h in network.hosts())
+
+        async def worker():
+            for ip in hosts:
+                if self._stopped:
+                    break
+                if ip not in found and await self.probe_host(ip):
+                    report(ip, "tcp")
+
+        # Each host probes several ports at once, so divide the socket budget
+        workers = max(1, self.concurrency // max(1, len(self.ports)))
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+            # Probes trigger ARP resolution, so hosts that drop TCP still show up here
+            arp.update(read_arp_table())
+            for ip in sorted(arp, key=ipaddress.ip_address):
+                if in_scope(ip):
+                    report(ip, "arp")
+            for ip, device in found.items():
+                if not device["mac"] and ip in arp:
+                    device["mac"] = arp[ip]["mac"]
+                    if callback:
+                        callback(device)
+
+            await asyncio.gather(*name_tasks)
+        finally:
+            executor.shutdown(wait=False)
+
+        return sorted(found.values(), key=lambda d: ipaddress.ip_address(d["ip"]))
+
+    def sweep(self, networks, callback=None):
+        """Blocking wrapper around sweep_async for worker threads"""
+        return asyncio.run(self.sweep_async(networks, callback))
@@ -0,0 +1,219 @@
+"""Nameserver latency benchmark: cold and warm cache, percentiles, ranking
+
+Every server is benchmarked at once, each with its own small window of
+in-flight queries (kept small so time spent queued in our own event loop
+doesn't inflate the latencies). Queries are single UDP exchanges without
+retries, so a lost packet shows up as a timeout instead of being hidden in
+a slower answer. Cold-cache latency uses a fresh random label under each
+corpus domain, which no resolver can have cached; warm-cache latency
+repeats the plain corpus names after one priming pass.
+"""
+import asyncio
+import time
+import uuid
+
+DEFAULT_CORPUS = [
+    "google.com", "youtube.com", "facebook.com", "wikipedia.org", "amazon.com",
+    "twitter.com", "instagram.com", "linkedin.com", "netflix.com", "microsoft.com",
+    "apple.com", "github.com", "cloudflare.com", "reddit.com", "yahoo.com",
+    "bing.com", "stackoverflow.com", "whatsapp.com", "zoom.us", "office.com",
+]
+
+# Public resolvers offered as candidates in the GUI
+CANDIDATES = ["1.1.1.1", "8.8.8.8", "9.9.9.9", "208.67.222.222"]
+
+ANSWERED = "answered"
+TIMEOUT = "timeout"
+FAILED = "failed"
+
+
+def parse_server(text, port=53):
+    """'1.1.1.1', '1.1.1.1:5353' or '[::1]:5353' -> (host, port)"""
+    text = text.strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        return host, int(rest.lstrip(":") or port)
+    if text.count(":") == 1:
+        host, _, text_port = text.partition(":")
+        return host, int(text_port)
+    return text, port
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def latency_stats(samples):
+    """count, min, mean, p50, p95, p99 and max of latencies in ms"""
+    values = sorted(samples)
+    if not values:
+        return {"count": 0, "min": None, "mean": None, "p50": None, "p95": None,
+                "p99": None, "max": None}
+    return {
+        "count": len(values),
+        "min": round(values[0], 2),
+        "mean": round(sum(values) / len(values), 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(values[-1], 2),
+    }
+
+
+class NameserverBenchmark:
+    """Fire a domain corpus at several nameservers and rank them
+
+    servers are 'host' or 'host:port' strings; the system nameservers are
+    added unless include_system is False.
+    """
+
+    def __init__(self, servers=None, corpus=None, rounds=3, concurrency=4, timeout=2.0,
+                 include_system=True, record_type="A"):
+        self.servers = list(servers or [])
+        self.corpus = list(corpus or DEFAULT_CORPUS)
+        self.rounds = max(1, int(rounds))
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = float(timeout)
+        self.include_system = include_system
+        self.record_type = record_type
+        self._stopped = False
+
+    def stop(self):
+        """Ask a running benchmark to finish after the in-flight queries"""
+        self._stopped = True
+
+    def targets(self):
+        """[(label, host, port, is_system)] without duplicates"""
+        targets = []
+        seen = set()
+        if self.include_system:
+            from netmaster.resolver import system_resolver
+            for host in system_resolver().nameservers:
+                targets.append((str(host), str(host), 53, True))
+        for text in self.servers:
+            host, port = parse_server(text)
+            label = host if port == 53 else f"{host}:{port}"
+            targets.append((label, host, port, False))
+        unique = []
+        for target in targets:
+            if target[1:3] not in seen:
+                seen.add(target[1:3])
+                unique.append(target)
+        return unique
+
+    async def query(self, host, port, name):
+        """One UDP exchange; returns (outcome, ms)"""
+        import dns.asyncquery
+        import dns.exception
+        import dns.message
+        import dns.rcode
+
+        request = dns.message.make_query(name, self.record_type)
+        start = time.perf_counter()
+        try:
+            response = await dns.asyncquery.udp(request, host, timeout=self.timeout, port=port)
+        except dns.exception.Timeout:
+            return TIMEOUT, self.timeout * 1000
+        except Exception:
+            return FAILED, (time.perf_counter() - start) * 1000
+        ms = (time.perf_counter() - start) * 1000
+        # NXDOMAIN is a real answer; cold-cache names are meant to get one
+        if response.rcode() in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+            return ANSWERED, ms
+        return FAILED, ms
+
+    async def _window(self, host, port, names, record):
+        pending = iter(names)
+
+        async def worker():
+            for name in pending:
+                if self._stopped:
+                    break
+                outcome, ms = await self.query(host, port, name)
+                record(outcome, ms)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def bench_server(self, label, host, port, system, progress=None):
+        """Cold pass, priming pass and warm rounds against one server"""
+        samples = {"cold": [], "warm": []}
+        counts = {ANSWERED: 0, TIMEOUT: 0, FAILED: 0}
+        total = len(self.corpus) * (1 + self.rounds)
+        done = 0
+
+        def recorder(phase):
+            def record(outcome, ms):
+                nonlocal done
+                done += 1
+                counts[outcome] += 1
+                if outcome == ANSWERED:
+                    samples[phase].append(ms)
+                if progress:
+                    progress(label, done, total)
+            return record
+
+        tag = uuid.uuid4().hex[:8]
+        cold = [f"nm-{tag}-{i}.{domain}" for i, domain in enumerate(self.corpus)]
+        await self._window(host, port, cold, recorder("cold"))
+        await self._window(host, port, self.corpus, lambda outcome, ms: None)
+        await self._window(host, port, self.corpus * self.rounds, recorder("warm"))
+
+        queries = sum(counts.values())
+        timeout_rate = counts[TIMEOUT] / queries if queries else 0.0
+        error_rate = counts[FAILED] / queries if queries else 0.0
+        everything = latency_stats(samples["cold"] + samples["warm"])
+        # Expected cost of one query: a failure costs a full timeout
+        failure = timeout_rate + error_rate
+        expected = None
+        if everything["p50"] is not None:
+            expected = round((1 - failure) * everything["p50"] + failure * self.timeout * 1000, 2)
+        return {
+            "server": label,
+            "host": host,
+            "port": port,
+            "system": system,
+            "queries": queries,
+            "answered": counts[ANSWERED],
+            "timeouts": counts[TIMEOUT],
+            "errors": counts[FAILED],
+            "timeout_rate": round(timeout_rate, 4),
+            "error_rate": round(error_rate, 4),
+            "cold": latency_stats(samples["cold"]),
+            "warm": latency_stats(samples["warm"]),
+            "expected_ms": expected,
+        }
+
+    async def run_async(self, progress=None):
+        """Benchmark every target concurrently; returns results ranked best first"""
+        self._stopped = False
+        results = await asyncio.gather(*(self.bench_server(*target, progress=progress)
+                                         for target in self.targets()))
+        return rank(results)
+
+    def run(self, progress=None):
+        """Blocking wrapper around run_async for worker threads and the CLI"""
+        return asyncio.run(self.run_async(progress))
+
+
+def rank(results):
+    """Order by expected query cost (servers that never answered last)"""
+    ranked = sorted(results, key=lambda r: (r["expected_ms"] is None, r["expected_ms"] or 0))
+    for position, result in enumerate(ranked, 1):
+        result["rank"] = position
+    return ranked
+
+
+def format_result(result):
+    """Human readable one-line result"""
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+    return (f"#{result['rank']} {result['server']}: cold p50 {ms(result['cold']['p50'])} ms, "
+            f"warm p50/p95/p99 {ms(result['warm']['p50'])}/{ms(result['warm']['p95'])}/"
+            f"{ms(result['warm']['p99'])} ms, {result['timeouts']} timeouts, "
+            f"{result['errors']} errors of {result['queries']}")
@@ -0,0 +1,248 @@
+"""Resolver-aware DNS leak test
+
+Sends a burst of unique-nonce queries under a zone whose authoritative
+server logs who asked, through every DNS path at once: the operating
+system resolver and each configured nameserver directly. Every path gets
+its own session on the log endpoint, so the authoritative-side log says
+which egress resolvers really carried that path's queries. Sessions, the
+query burst and the log fetches each run concurrently, so the test takes
+about one DNS round trip plus two HTTP requests.
+
+Endpoints are pluggable: anything with session() -> (id, zone) and
+fetch_log(id) -> [{"resolver": ip, ...}] works. LocalAuthority stands in
+for a real one using the stub DNS server.
+"""
+import asyncio
+import ipaddress
+import socket
+import time
+import uuid
+
+OS_PATH = "system"
+
+
+class BashWsEndpoint:
+    """bash.ws public leak-test zone; its log reports resolver country and ASN"""
+
+    name = "bash.ws"
+
+    def __init__(self, http=None):
+        self.http = http
+
+    def _client(self):
+        if self.http is None:
+            from netmaster.httpclient import get_client
+            self.http = get_client()
+        return self.http
+
+    def session(self):
+        session_id = self._client().get("https://bash.ws/id").text.strip()
+        return session_id, f"{session_id}.bash.ws"
+
+    def fetch_log(self, session_id):
+        rows = self._client().get(f"https://bash.ws/dnsleak/test/{session_id}?json").json()
+        return [{"resolver": row["ip"], "country": row.get("country_name"), "asn": row.get("asn")}
+                for row in rows if row.get("type") == "dns"]
+
+
+class LocalAuthority:
+    """Stand-in authoritative server on 127.0.0.1 that logs every query
+
+    Point the test's nameservers at `address` and the log shows the local
+    client as the egress resolver, with per-query arrival times.
+    """
+
+    name = "local"
+
+    def __init__(self, zone="leak.test", delay=0.0):
+        from netmaster.stubdns import StubDNSServer, NXDOMAIN
+
+        self.zone = zone
+        self.server = StubDNSServer(answer=lambda name, rdtype: NXDOMAIN, delay=delay).start()
+
+    @property
+    def address(self):
+        return f"{self.server.host}:{self.server.port}"
+
+    def session(self):
+        session_id = uuid.uuid4().hex[:12]
+        return session_id, f"{session_id}.{self.zone}"
+
+    def fetch_log(self, session_id):
+        suffix = f".{session_id}.{self.zone}"
+        return [{"resolver": client[0], "name": name, "time": seen}
+                for seen, client, name, rdtype in list(self.server.queries)
+                if name.lower().endswith(suffix)]
+
+    def close(self):
+        self.server.stop()
+
+
+ENDPOINTS = {"bash.ws": BashWsEndpoint, "local": LocalAuthority}
+
+
+class DNSLeakTest:
+    """Burst nonce queries through every DNS path and correlate the egress log
+
+    nameservers defaults to the configured ones; use_os adds the operating
+    system resolver (getaddrinfo) as its own path. expected is an optional
+    list of resolver IPs or CIDR blocks that are allowed to see queries.
+    """
+
+    def __init__(self, endpoint=None, nameservers=None, use_os=True, queries=5, timeout=3.0,
+                 expected=None):
+        self.endpoint = endpoint or BashWsEndpoint()
+        self.nameservers = nameservers
+        self.use_os = use_os
+        self.queries = max(1, int(queries))
+        self.timeout = float(timeout)
+        # Networks, so 1.1.1.1 allows only itself and not 1.1.1.10
+        self.expected = [ipaddress.ip_network(allowed, strict=False) for allowed in expected or []]
+
+    def paths(self):
+        """[(label, host, port)]; host is None for the OS resolver"""
+        from netmaster.dnsbench import parse_server
+
+        paths = [(OS_PATH, None, None)] if self.use_os else []
+        if self.nameservers is None:
+            from netmaster.resolver import system_resolver
+            servers = [str(host) for host in system_resolver().nameservers]
+        else:
+            servers = self.nameservers
+        for text in servers:
+            host, port = parse_server(text)
+            paths.append((host if port == 53 else f"{host}:{port}", host, port))
+        return paths
+
+    async def _query(self, host, port, name):
+        """One query through a path; returns (answered, ms)"""
+        start = time.perf_counter()
+        try:
+            if host is None:
+                loop = asyncio.get_running_loop()
+                await asyncio.wait_for(loop.getaddrinfo(name, None, proto=socket.IPPROTO_TCP),
+                                       self.timeout)
+            else:
+                import dns.asyncquery
+                import dns.message
+                await dns.asyncquery.udp(dns.message.make_query(name, "A"), host,
+                                         timeout=self.timeout, port=port)
+        except socket.gaierror as e:
+            # NXDOMAIN from the OS resolver still means the query went out
+            if e.errno not in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)):
+                return False, (time.perf_counter() - start) * 1000
+        except Exception:
+            return False, (time.perf_counter() - start) * 1000
+        return True, (time.perf_counter() - start) * 1000
+
+    async def _probe_path(self, path, session):
+        label, host, port = path
+        session_id, zone = session
+        tag = uuid.uuid4().hex[:6]
+        names = [f"{tag}{i}.{zone}" for i in range(self.queries)]
+        sent = time.time()
+        results = await asyncio.gather(*(self._query(host, port, name) for name in names))
+        times = sorted(ms for answered, ms in results if answered)
+        return {
+            "path": label,
+            "session": session_id,
+            "sent": len(names),
+            "answered": len(times),
+            "ms": round(times[len(times) // 2], 2) if times else None,
+            "sent_at": sent,
+        }
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        # Load dnspython before the burst so import time doesn't skew timings
+        import dns.asyncquery
+        start = time.perf_counter()
+        paths = self.paths()
+        if not paths:
+            raise RuntimeError("No DNS paths to test")
+        sessions = await asyncio.gather(*(loop.run_in_executor(None, self.endpoint.session)
+                                          for _ in paths))
+        probes = await asyncio.gather(*(self._probe_path(path, session)
+                                        for path, session in zip(paths, sessions)))
+        logs = await asyncio.gather(*(loop.run_in_executor(None, self.endpoint.fetch_log,
+                                                           probe["session"])
+                                      for probe in probes))
+        report = self.correlate(probes, logs)
+        report["elapsed"] = round(time.perf_counter() - start, 3)
+        return report
+
+    def run(self):
+        """Blocking wrapper around run_async for worker threads and the CLI"""
+        return asyncio.run(self.run_async())
+
+    def correlate(self, probes, logs):
+        """Join each path's probe with its session's log into a report"""
+        resolvers = {}
+        for probe, log in zip(probes, logs):
+            probe["resolvers"] = sorted({entry["resolver"] for entry in log})
+            for entry in log:
+                row = resolvers.setdefault(entry["resolver"], {
+                    "resolver": entry["resolver"], "paths": [], "queries": 0, "first_ms": None,
+                    "country": entry.get("country"), "asn": entry.get("asn")})
+                row["queries"] += 1
+                if probe["path"] not in row["paths"]:
+                    row["paths"].append(probe["path"])
+                if entry.get("time") is not None:
+                    ms = round((entry["time"] - probe["sent_at"]) * 1000, 2)
+                    if row["first_ms"] is None or ms < row["first_ms"]:
+                        row["first_ms"] = ms
+            probe.pop("sent_at")
+
+        report = {"endpoint": self.endpoint.name, "paths": probes,
+                  "resolvers": sorted(resolvers.values(), key=lambda row: -row["queries"])}
+        report.update(self.verdict(report))
+        return report
+
+    def allowed(self, resolver):
+        """True if the resolver address is inside an expected network"""
+        try:
+            address = ipaddress.ip_address(resolver)
+        except ValueError:
+            return False
+        return any(address in network for network in self.expected)
+
+    def verdict(self, report):
+        """Decide whether queries leaked and say why"""
+        seen = [row["resolver"] for row in report["resolvers"]]
+        if not seen:
+            return {"leak": None, "conclusion": "No queries reached the authoritative server"}
+        if self.expected:
+            unexpected = [ip for ip in seen if not self.allowed(ip)]
+            if unexpected:
+                return {"leak": True,
+                        "conclusion": f"Queries reached unexpected resolvers: {', '.join(unexpected)}"}
+            return {"leak": False, "conclusion": "Every query left through an expected resolver"}
+        providers = {row["asn"] for row in report["resolvers"] if row["asn"]}
+        if len(providers) > 1:
+            return {"leak": True,
+                    "conclusion": f"Queries left through {len(providers)} different networks: "
+                                  f"{', '.join(sorted(providers))}"}
+        if providers:
+            return {"leak": False,
+                    "conclusion": f"{len(seen)} egress resolver(s), all on {providers.pop()}"}
+        # Without network names or an allow-list there is nothing to judge against
+        return {"leak": None,
+                "conclusion": f"{len(seen)} egress resolver(s): {', '.join(seen)}"}
+
+
+def format_report(report):
+    """Human readable multi-line report"""
+    lines = [f"DNS leak test via {report['endpoint']} ({report['elapsed']:.2f}s)", ""]
+    for path in report["paths"]:
+        ms = "-" if path["ms"] is None else f"{path['ms']:.0f} ms"
+        lines.append(f"Path {path['path']}: {path['answered']}/{path['sent']} answered ({ms}) -> "
+                     f"{', '.join(path['resolvers']) or 'nothing logged'}")
+    lines.append("")
+    for row in report["resolvers"]:
+        where = ", ".join(str(value) for value in (row["country"], row["asn"]) if value)
+        timing = f", first seen after {row['first_ms']:.0f} ms" if row["first_ms"] is not None else ""
+        lines.append(f"Egress resolver {row['resolver']}{f' ({where})' if where else ''}: "
+                     f"{row['queries']} queries from {', '.join(row['paths'])}{timing}")
+    lines.append("")
+    lines.append(report["conclusion"])
+    return "\n".join(lines) + "\n"
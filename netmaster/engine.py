@@ -0,0 +1,205 @@
+"""GUI-free probing functions shared by the Tk app and the CLI
+
+Third-party modules (requests, psutil, dnspython, speedtest) are imported
+inside the functions that need them, so importing this module - and
+running a CLI command that needs none of them - stays fast.
+"""
+import asyncio
+import socket
+import time
+import uuid
+
+_lookup_service = None
+_public_ip_lookup = None
+
+TEST_DOMAIN = "google.com"
+
+
+def lookup_service():
+    """Shared, cached IP lookup service"""
+    global _lookup_service
+    if _lookup_service is None:
+        from netmaster.iplookup import IPLookupService
+        _lookup_service = IPLookupService()
+    return _lookup_service
+
+
+def public_ip_lookup():
+    """Shared hedged public IP lookup"""
+    global _public_ip_lookup
+    if _public_ip_lookup is None:
+        from netmaster.publicip import PublicIPLookup
+        _public_ip_lookup = PublicIPLookup()
+    return _public_ip_lookup
+
+
+def get_public_ip_info(lookup=None):
+    """Get public IP info from the fastest responding provider"""
+    try:
+        return (lookup or public_ip_lookup()).lookup()
+    except Exception as e:
+        return {"error": f"Could not fetch IP info: {str(e)}"}
+
+
+def get_network_info():
+    """Get detailed network information; speed is the link rate in Mbps"""
+    try:
+        import psutil
+        from netmaster.discovery import primary_address
+
+        hostname = socket.gethostname()
+        # gethostbyname(hostname) is often 127.0.1.1 on Linux; prefer the routed address
+        local_ip = primary_address() or socket.gethostbyname(hostname)
+        mac = ":".join(["{:02x}".format((uuid.getnode() >> elements) & 0xff)
+                        for elements in range(5, -1, -1)])
+
+        interfaces = psutil.net_if_addrs()
+        stats = psutil.net_if_stats()
+        connection_type = "Wi-Fi" if "Wi-Fi" in interfaces else "Ethernet" if "Ethernet" in interfaces else "Unknown"
+        speed = next((s.speed for s in stats.values() if s.speed > 0), 0)
+
+        return {
+            "hostname": hostname,
+            "local_ip": local_ip,
+            "mac_address": mac,
+            "connection_type": connection_type,
+            "speed": speed,
+            "interfaces": {iface: [addr._asdict() for addr in addrs]
+                           for iface, addrs in interfaces.items()}
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_dns_info(test_domain=TEST_DOMAIN):
+    """Get configured nameservers and a timed test resolution"""
+    try:
+        from netmaster.resolver import async_resolver, system_resolver
+
+        nameservers = list(system_resolver().nameservers)
+        # The shared answer cache would turn every run after the first into a hit
+        resolver = async_resolver(nameservers, cache=False)
+
+        async def lookup():
+            start = time.perf_counter()
+            answer = await resolver.resolve(test_domain, "A", search=False)
+            return answer, time.perf_counter() - start
+
+        answer, seconds = asyncio.run(lookup())
+        return {
+            "nameservers": nameservers,
+            "test_domain": test_domain,
+            "test_address": str(answer[0]),
+            "lookup_ms": round(seconds * 1000, 2)
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def dns_lookup(domain, record_type="A"):
+    """Resolve one name and record type; returns the answers as text"""
+    from netmaster.resolver import system_resolver
+
+    return [str(rdata) for rdata in system_resolver().resolve(domain, record_type)]
+
+
+def run_speed_test(progress=None, history=None):
+    """Run an Internet speed test against the best speedtest.net server
+
+    progress(stage, value) is called with "server", "download", "upload"
+    and "ping" as each figure becomes known. Download and upload come back
+    in Mbps and ping in ms; with a SpeedHistory the result is also recorded.
+    """
+    try:
+        import speedtest
+
+        st = speedtest.Speedtest()
+        st.get_best_server()
+        server = st.results.server
+        if progress:
+            progress("server", f"{server['name']} ({server['country']})")
+
+        download = st.download() / 1_000_000  # Convert to Mbps
+        if progress:
+            progress("download", download)
+        upload = st.upload() / 1_000_000
+        if progress:
+            progress("upload", upload)
+        ping = st.results.ping
+        if progress:
+            progress("ping", ping)
+
+        result = {
+            "download": round(download, 2),
+            "upload": round(upload, 2),
+            "ping": round(ping, 2),
+            "server": server['name']
+        }
+        if history is not None:
+            result["time"] = history.append_result(result)
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def scan_network_devices(network=None, callback=None, scanner=None):
+    """Sweep the local subnet (or the given CIDR) and return the live devices"""
+    try:
+        from netmaster.discovery import DeviceScanner, default_network
+
+        if network is None:
+            local = default_network()
+            if local is None:
+                return {"error": "No active IPv4 interface found"}
+            network = local[2]
+        return (scanner or DeviceScanner()).sweep(network, callback)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_geolocation(ip, service=None):
+    """Get geolocation for an IP address"""
+    try:
+        return (service or lookup_service()).locate(ip)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def full_scan(on_done=None, skip=(), public_ip=None, geolocate=None, location=None,
+              history=None):
+    """Run every check through the stage scheduler
+
+    on_done(name, result, error, seconds) fires as each stage finishes.
+    Returns (results, timings).
+    """
+    from netmaster.stages import StageScheduler
+
+    public_ip = public_ip or get_public_ip_info
+    geolocate = geolocate or get_geolocation
+
+    def locate(deps):
+        ip_info = deps["ip_info"]
+        if "ip" in ip_info:
+            return geolocate(ip_info["ip"])
+        return location if location is not None else {}
+
+    scheduler = StageScheduler()
+    stages = [
+        ("ip_info", lambda deps: public_ip(), (), False),
+        ("network_info", lambda deps: get_network_info(), (), False),
+        ("dns_info", lambda deps: get_dns_info(), (), False),
+        ("devices", lambda deps: scan_network_devices(), (), False),
+        ("location", locate, ("ip_info",), False),
+        # Runs alone so the other probes don't skew the bandwidth numbers
+        ("speed_test", lambda deps: run_speed_test(history=history), (), True),
+    ]
+    for name, func, deps, exclusive in stages:
+        if name in skip or any(dep in skip for dep in deps):
+            continue
+        scheduler.add(name, func, deps=deps, exclusive=exclusive)
+
+    scheduler.run(on_done)
+    results = dict(scheduler.results)
+    for name, error in scheduler.errors.items():
+        results[name] = {"error": str(error)}
+    return results, dict(scheduler.timings)
@@ -0,0 +1,361 @@
+"""Offline IP range database: sorted intervals, binary search, memory-mapped
+
+A CSV of IP ranges is compiled once into a compact .nmdb file:
+
+    header   magic, counts, blob size
+    IPv4     starts[u32], ends[u32], record[u32]    (sorted by start)
+    IPv6     starts[16B], ends[16B], record[u32]    (big-endian keys)
+    records  offsets[u32] into a tab-separated UTF-8 blob
+
+Opening the file only maps it, so startup cost does not grow with the
+dataset; lookups bisect straight over the mapped arrays.
+"""
+import bisect
+import csv
+import heapq
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b"NMDB1\0\0\0"
+HEADER = struct.Struct("<8sIIIIQ")   # magic, n4, n6, nrec, reserved, blob size
+
+FIELDS = ["country", "region", "city", "latitude", "longitude", "asn", "org"]
+
+# Header names understood when compiling, mapped to our field names
+ALIASES = {
+    "start": "start", "start_ip": "start", "ip_start": "start", "range_start": "start",
+    "ip_from": "start", "first": "start",
+    "end": "end", "end_ip": "end", "ip_end": "end", "range_end": "end", "ip_to": "end",
+    "last": "end",
+    "network": "network", "cidr": "network", "prefix": "network",
+    "country": "country", "country_code": "country", "cc": "country",
+    "region": "region", "region_name": "region", "state": "region", "subdivision": "region",
+    "city": "city", "city_name": "city",
+    "latitude": "latitude", "lat": "latitude",
+    "longitude": "longitude", "lon": "longitude", "lng": "longitude",
+    "asn": "asn", "as_number": "asn", "autonomous_system_number": "asn",
+    "org": "org", "as_org": "org", "organization": "org", "as_description": "org",
+    "autonomous_system_organization": "org", "isp": "org",
+}
+
+
+def _parse_ip(text):
+    """Accept dotted/colon notation or a bare integer"""
+    text = text.strip()
+    if text.isdigit():
+        value = int(text)
+        return ipaddress.ip_address(value) if value < 2 ** 32 else ipaddress.IPv6Address(value)
+    return ipaddress.ip_address(text)
+
+
+def _read_ranges(path):
+    """Yield (start, end, fields) from a CSV/TSV range file"""
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",\t;") if sample else csv.excel
+        reader = csv.reader(f, dialect)
+        first = next(reader, None)
+        if first is None:
+            return
+
+        names = [ALIASES.get(c.strip().lower()) for c in first]
+        if "start" in names or "network" in names:
+            rows = reader
+        else:
+            # No header: start, end, then FIELDS in order
+            names = ["start", "end"] + FIELDS
+            rows = _chain([first], reader)
+
+        for row in rows:
+            if not row or row[0].startswith("#"):
+                continue
+            record = {name: value.strip() for name, value in zip(names, row) if name}
+            try:
+                if "network" in record:
+                    network = ipaddress.ip_network(record["network"], strict=False)
+                    start, end = network[0], network[-1]
+                else:
+                    start, end = _parse_ip(record["start"]), _parse_ip(record["end"])
+            except (KeyError, ValueError):
+                continue
+            if start.version != end.version or start > end:
+                continue
+            yield start, end, [record.get(name, "") for name in FIELDS]
+
+
+def _chain(*iterables):
+    for iterable in iterables:
+        yield from iterable
+
+
+def _flatten(ranges):
+    """Split overlapping (start, end, record) ranges into disjoint ones
+
+    Where ranges overlap the narrowest one wins, so a city block inside a
+    country-wide range keeps its own record; between equal widths the
+    later row wins. Adjacent pieces of the same record are joined again.
+    """
+    ranges = sorted((start, end, -order, record)
+                    for order, (start, end, record) in enumerate(ranges))
+    flat = []
+    active = []   # heap of (width, -order, end, record)
+    i, pos = 0, None
+    while i < len(ranges) or active:
+        if not active:
+            pos = ranges[i][0]
+        while i < len(ranges) and ranges[i][0] <= pos:
+            start, end, order, record = ranges[i]
+            heapq.heappush(active, (end - start, order, end, record))
+            i += 1
+        while active and active[0][2] < pos:
+            heapq.heappop(active)
+        if not active:
+            continue
+        _, _, end, record = active[0]
+        # The winner holds until it ends or a range starts inside it
+        stop = min(end, ranges[i][0] - 1) if i < len(ranges) else end
+        if flat and flat[-1][2] == record and flat[-1][1] + 1 == pos:
+            flat[-1] = (flat[-1][0], stop, record)
+        else:
+            flat.append((pos, stop, record))
+        pos = stop + 1
+    return flat
+
+
+def compile_csv(source, target):
+    """Compile a range CSV into an .nmdb file; returns (ipv4, ipv6) range counts"""
+    v4, v6 = [], []
+    records = {}
+    for start, end, fields in _read_ranges(source):
+        key = "\t".join(field.replace("\t", " ") for field in fields)
+        index = records.setdefault(key, len(records))
+        (v4 if start.version == 4 else v6).append((int(start), int(end), index))
+    # Lookups bisect on the starts and check one end, so ranges must not overlap
+    v4 = _flatten(v4)
+    v6 = _flatten(v6)
+
+    blob = bytearray()
+    offsets = array("I")
+    for key in records:   # dicts keep insertion order == index order
+        offsets.append(len(blob))
+        blob += key.encode("utf-8")
+    offsets.append(len(blob))
+
+    def u32(values):
+        out = array("I", values)
+        if sys.byteorder != "little":
+            out.byteswap()
+        return out.tobytes()
+
+    def u128(values):
+        return b"".join(value.to_bytes(16, "big") for value in values)
+
+    # A reader never maps a half-written file, and the old one stays valid until replaced
+    temp = f"{target}.tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(v4), len(v6), len(records), 0, len(blob)))
+        f.write(u32(r[0] for r in v4))
+        f.write(u32(r[1] for r in v4))
+        f.write(u32(r[2] for r in v4))
+        f.write(u128(r[0] for r in v6))
+        f.write(u128(r[1] for r in v6))
+        f.write(u32(r[2] for r in v6))
+        f.write(u32(offsets))
+        f.write(bytes(blob))
+    os.replace(temp, target)
+    return len(v4), len(v6)
+
+
+class _Keys128:
+    """Sequence view of packed 16-byte big-endian keys, for bisect"""
+
+    def __init__(self, view):
+        self.view = view
+
+    def __len__(self):
+        return len(self.view) // 16
+
+    def __getitem__(self, i):
+        # bytes, not memoryview: memoryviews don't support ordering
+        return bytes(self.view[i * 16:(i + 1) * 16])
+
+
+class GeoDatabase:
+    """Read-only, memory-mapped range index answering IP -> location"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped
+            self.close()
+            raise ValueError(f"{path} is empty") from None
+        # The map keeps its own handle; a dropped database then leaves nothing open
+        self._file.close()
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        magic, n4, n6, nrec, _, blob_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a Network Master range database")
+        # A half-written file would otherwise map short arrays and misread
+        size = HEADER.size + n4 * 12 + n6 * 36 + (nrec + 1) * 4 + blob_size
+        actual = len(self._map)
+        if actual < size:
+            self.close()
+            raise ValueError(f"{path} is truncated ({actual} of {size} bytes)")
+        self.counts = (n4, n6)
+
+        view = self._view = memoryview(self._map)
+        pos = HEADER.size
+
+        def take(size):
+            nonlocal pos
+            chunk = view[pos:pos + size]
+            pos += size
+            return chunk
+
+        def u32(count):
+            chunk = take(count * 4)
+            if sys.byteorder == "little":
+                return chunk.cast("I")
+            swapped = array("I", chunk.tobytes())
+            swapped.byteswap()
+            return swapped
+
+        self._v4_start = u32(n4)
+        self._v4_end = u32(n4)
+        self._v4_rec = u32(n4)
+        self._v6_start = _Keys128(take(n6 * 16))
+        self._v6_end = _Keys128(take(n6 * 16))
+        self._v6_rec = u32(n6)
+        self._offsets = u32(nrec + 1)
+        self._blob = take(blob_size)
+
+    def close(self):
+        """Unmap the database file"""
+        views = [getattr(self, name, None) for name in
+                 ("_v4_start", "_v4_end", "_v4_rec", "_v6_rec", "_offsets", "_blob")]
+        views += [getattr(getattr(self, name, None), "view", None) for name in ("_v6_start", "_v6_end")]
+        views.append(getattr(self, "_view", None))
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+        try:
+            if getattr(self, "_map", None) is not None:
+                # BufferError if something still holds a view: the file stays mapped
+                self._map.close()
+                self._map = None
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record_index(self, ip):
+        """Index of the record covering ip, or -1"""
+        if ip.version == 4:
+            value = int(ip)
+            i = bisect.bisect_right(self._v4_start, value) - 1
+            if i >= 0 and value <= self._v4_end[i]:
+                return self._v4_rec[i]
+            return -1
+        key = ip.packed
+        i = bisect.bisect_right(self._v6_start, key) - 1
+        if i >= 0 and key <= self._v6_end[i]:
+            return self._v6_rec[i]
+        return -1
+
+    def record(self, index):
+        """Decode record `index` into a field dict"""
+        start, end = self._offsets[index], self._offsets[index + 1]
+        values = bytes(self._blob[start:end]).decode("utf-8").split("\t")
+        return dict(zip(FIELDS, values))
+
+    def lookup(self, ip):
+        """Return the raw field dict for ip, or None if no range covers it"""
+        if not isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            ip = ipaddress.ip_address(str(ip).strip())
+        index = self._record_index(ip)
+        return None if index < 0 else self.record(index)
+
+    def lookup_many(self, ips):
+        """Return record indexes (-1 for no match) for a batch of addresses
+
+        IPv4 batches given as integers use a vectorised search when NumPy
+        is installed.
+        """
+        if numpy is not None and sys.byteorder == "little":
+            values = numpy.asarray(ips)
+            if values.dtype.kind in "iu":
+                # astype would wrap out-of-range integers onto unrelated addresses
+                valid = (values >= 0) & (values <= 0xFFFFFFFF)
+                values = numpy.where(valid, values, 0).astype(numpy.uint32)
+                if not self.counts[0]:
+                    return numpy.full(len(values), -1, dtype=numpy.int64)
+                starts = numpy.frombuffer(self._v4_start, dtype=numpy.uint32)
+                ends = numpy.frombuffer(self._v4_end, dtype=numpy.uint32)
+                recs = numpy.frombuffer(self._v4_rec, dtype=numpy.uint32)
+                i = numpy.searchsorted(starts, values, side="right") - 1
+                safe = numpy.maximum(i, 0)
+                hit = valid & (i >= 0) & (values <= ends[safe])
+                return numpy.where(hit, recs[safe].astype(numpy.int64), -1)
+
+        result = []
+        for ip in ips:
+            if isinstance(ip, int):
+                ip = ipaddress.ip_address(ip)
+            elif not isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+                ip = ipaddress.ip_address(str(ip).strip())
+            result.append(self._record_index(ip))
+        return result
+
+    def locate(self, ip):
+        """Return an ipinfo.io-shaped dict for ip, or None"""
+        fields = self.lookup(ip)
+        if fields is None:
+            return None
+        data = {"ip": str(ip).strip()}
+        for name in ("city", "region", "country"):
+            if fields.get(name):
+                data[name] = fields[name]
+        if fields.get("latitude") and fields.get("longitude"):
+            data["loc"] = f"{fields['latitude']},{fields['longitude']}"
+        org = " ".join(part for part in (
+            f"AS{fields['asn'].lstrip('ASas')}" if fields.get("asn") else "",
+            fields.get("org", "")) if part)
+        if org:
+            data["org"] = org
+        data["source"] = "offline"
+        return data
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m netmaster.geodb",
+                                     description="Compile an IP range CSV into an offline database")
+    parser.add_argument("source", help="CSV/TSV of ranges (start,end,... or network,...)")
+    parser.add_argument("target", help="output .nmdb file")
+    args = parser.parse_args(argv)
+    n4, n6 = compile_csv(args.source, args.target)
+    print(f"Compiled {n4} IPv4 and {n6} IPv6 ranges into {args.target}")
+
+
+if __name__ == "__main__":
+    main()
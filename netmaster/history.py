@@ -0,0 +1,288 @@
+"""Append-only speed test history with precomputed hourly and daily rollups
+
+Every speed test becomes one fixed-size record in history/speed.nmts:
+
+    header   magic, record size, kind
+    samples  time[f64], download[f32], upload[f32], ping[f32], server[u32]
+
+Server names are interned in speed.servers, one per line. Next to the raw
+samples, speed.hourly and speed.daily hold one record per bucket (start
+time, count, and sum/min/max of each metric). A new sample updates the
+newest bucket in place or appends the next one, so a chart of months of
+history reads a few hundred rollup records instead of every sample.
+Records are sorted by time, so a range is found by bisecting the mapped
+file and only that slice is decoded.
+"""
+import bisect
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from netmaster.paths import data_file
+
+MAGIC = b"NMTS1\0\0\0"
+HEADER = struct.Struct("<8sII")   # magic, record size, kind
+SAMPLE = struct.Struct("<dfffI")
+ROLLUP = struct.Struct("<dI4x9d")  # start, count, then sum/min/max per metric
+
+METRICS = ["download", "upload", "ping"]
+RAW = "raw"
+HOURLY = "hourly"
+DAILY = "daily"
+SPANS = {HOURLY: 3600, DAILY: 86400}
+KINDS = {RAW: 0, HOURLY: 1, DAILY: 2}
+
+
+def history_dir():
+    """Default location of the history files"""
+    path = data_file("history")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class _Times:
+    """Sequence view of the time column of a mapped record file, for bisect"""
+
+    def __init__(self, view, size):
+        self.view = view
+        self.size = size
+
+    def __len__(self):
+        return (len(self.view) - HEADER.size) // self.size
+
+    def __getitem__(self, i):
+        return struct.unpack_from("<d", self.view, HEADER.size + i * self.size)[0]
+
+
+class _RecordFile:
+    """Fixed-size records after a header, appended (or the last one rewritten)"""
+
+    def __init__(self, path, record, kind):
+        self.path = path
+        self.record = record
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, record.size, kind))
+        self.file = open(path, "r+b")
+        magic, size, stored = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or size != record.size or stored != kind:
+            self.file.close()
+            raise ValueError(f"{path} is not a speed history file")
+        self.file.seek(0, os.SEEK_END)
+        extra = (self.file.tell() - HEADER.size) % record.size
+        if extra:
+            # A torn write from a crash: drop the partial record
+            self.file.truncate(self.file.tell() - extra)
+
+    def __len__(self):
+        return (os.fstat(self.file.fileno()).st_size - HEADER.size) // self.record.size
+
+    def append(self, values):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(self.record.pack(*values))
+        self.file.flush()
+
+    def rewrite_last(self, values):
+        self.file.seek(-self.record.size, os.SEEK_END)
+        self.file.write(self.record.pack(*values))
+        self.file.flush()
+
+    def last(self):
+        if not len(self):
+            return None
+        self.file.seek(-self.record.size, os.SEEK_END)
+        return self.record.unpack(self.file.read(self.record.size))
+
+    def truncate(self):
+        self.file.truncate(HEADER.size)
+
+    def _bounds(self, view, start, end):
+        times = _Times(view, self.record.size)
+        first = 0 if start is None else bisect.bisect_left(times, start)
+        last = len(times) if end is None else bisect.bisect_left(times, end)
+        return first, max(first, last)
+
+    def count(self, start=None, end=None):
+        """Records with start <= time < end, without decoding them"""
+        if not len(self):
+            return 0
+        with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                first, last = self._bounds(view, start, end)
+        return last - first
+
+    def read(self, start=None, end=None):
+        """Records with start <= time < end, decoding only that slice"""
+        if not len(self):
+            return []
+        with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                first, last = self._bounds(view, start, end)
+                offset = HEADER.size + first * self.record.size
+                with view[offset:offset + (last - first) * self.record.size] as chunk:
+                    return list(self.record.iter_unpack(chunk))
+
+    def first_time(self):
+        if not len(self):
+            return None
+        self.file.seek(HEADER.size)
+        return struct.unpack("<d", self.file.read(8))[0]
+
+    def close(self):
+        self.file.close()
+
+
+def _empty_rollup(start):
+    values = [start, 0]
+    for _ in METRICS:
+        values += [0.0, math.inf, -math.inf]
+    return values
+
+
+def _add(rollup, metrics):
+    rollup[1] += 1
+    for i, value in enumerate(metrics):
+        base = 2 + 3 * i
+        rollup[base] += value
+        rollup[base + 1] = min(rollup[base + 1], value)
+        rollup[base + 2] = max(rollup[base + 2], value)
+
+
+class SpeedHistory:
+    """Numeric speed test samples on disk, with hourly and daily rollups"""
+
+    def __init__(self, path=None):
+        self.path = path or history_dir()
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.RLock()
+        self.samples = _RecordFile(os.path.join(self.path, "speed.nmts"), SAMPLE, KINDS[RAW])
+        self.rollups = {name: _RecordFile(os.path.join(self.path, f"speed.{name}"), ROLLUP,
+                                          KINDS[name])
+                        for name in SPANS}
+        self._servers_path = os.path.join(self.path, "speed.servers")
+        self.servers = []
+        if os.path.exists(self._servers_path):
+            with open(self._servers_path, encoding="utf-8") as f:
+                self.servers = [line.rstrip("\n") for line in f]
+        self._server_ids = {name: i for i, name in enumerate(self.servers)}
+        if any(len(rollup) == 0 for rollup in self.rollups.values()) and len(self.samples):
+            self.rebuild()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def close(self):
+        self.samples.close()
+        for rollup in self.rollups.values():
+            rollup.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _server_id(self, name):
+        name = (name or "").replace("\n", " ")
+        server_id = self._server_ids.get(name)
+        if server_id is None:
+            server_id = self._server_ids[name] = len(self.servers)
+            self.servers.append(name)
+            with open(self._servers_path, "a", encoding="utf-8") as f:
+                f.write(name + "\n")
+        return server_id
+
+    def append(self, download, upload, ping, server="", when=None):
+        """Record one speed test (Mbps, Mbps, ms); returns the stored time"""
+        # Roll up the float32 values actually stored, so rebuild() agrees exactly
+        metrics = list(struct.unpack("<fff", struct.pack("<fff", download, upload, ping)))
+        with self._lock:
+            when = time.time() if when is None else float(when)
+            last = self.samples.last()
+            if last is not None and when < last[0]:
+                # Keep the file sorted even if the clock stepped back
+                when = last[0]
+            self.samples.append([when] + metrics + [self._server_id(server)])
+            for name, span in SPANS.items():
+                rollups = self.rollups[name]
+                start = when - when % span
+                newest = rollups.last()
+                if newest is not None and newest[0] == start:
+                    rollup = list(newest)
+                    _add(rollup, metrics)
+                    rollups.rewrite_last(rollup)
+                else:
+                    rollup = _empty_rollup(start)
+                    _add(rollup, metrics)
+                    rollups.append(rollup)
+        return when
+
+    def append_result(self, result, when=None):
+        """Record a speed test result dict with numeric download/upload/ping"""
+        return self.append(result["download"], result["upload"], result["ping"],
+                           result.get("server", ""), when)
+
+    def rebuild(self):
+        """Recompute every rollup from the raw samples"""
+        with self._lock:
+            samples = self.samples.read()
+            for name, span in SPANS.items():
+                rollups = self.rollups[name]
+                rollups.truncate()
+                current = None
+                for sample in samples:
+                    start = sample[0] - sample[0] % span
+                    if current is not None and current[0] != start:
+                        rollups.append(current)
+                        current = None
+                    if current is None:
+                        current = _empty_rollup(start)
+                    _add(current, sample[1:4])
+                if current is not None:
+                    rollups.append(current)
+
+    def read_samples(self, start=None, end=None):
+        """Raw samples in [start, end) as dicts"""
+        with self._lock:
+            records = self.samples.read(start, end)
+        # Stored as float32; report the two decimals the speed test measures
+        return [{"time": when, "download": round(download, 2), "upload": round(upload, 2),
+                 "ping": round(ping, 2),
+                 "server": self.servers[server] if server < len(self.servers) else ""}
+                for when, download, upload, ping, server in records]
+
+    def read_rollups(self, resolution, start=None, end=None):
+        """Hourly or daily buckets overlapping [start, end) as dicts with mean/min/max"""
+        span = SPANS[resolution]
+        start = None if start is None else start - start % span
+        with self._lock:
+            records = self.rollups[resolution].read(start, end)
+        rows = []
+        for record in records:
+            row = {"time": record[0], "count": record[1]}
+            for i, metric in enumerate(METRICS):
+                total, low, high = record[2 + 3 * i:5 + 3 * i]
+                row[metric] = round(total / record[1], 2) if record[1] else None
+                row[f"{metric}_min"] = round(low, 2) if record[1] else None
+                row[f"{metric}_max"] = round(high, 2) if record[1] else None
+            rows.append(row)
+        return rows
+
+    def query(self, start=None, end=None, max_points=500):
+        """The finest resolution that fits [start, end) in max_points
+
+        Returns (resolution, rows); rollup rows carry per-metric mean/min/max.
+        """
+        with self._lock:
+            count = self.samples.count(start, end)
+            first = self.samples.first_time() if start is None else start
+        if count <= max_points:
+            return RAW, self.read_samples(start, end)
+        last = time.time() if end is None else end
+        for resolution in (HOURLY, DAILY):
+            if (last - first) / SPANS[resolution] <= max_points:
+                return resolution, self.read_rollups(resolution, start, end)
+        return DAILY, self.read_rollups(DAILY, start, end)
@@ -0,0 +1,133 @@
+"""Shared keep-alive HTTP client for every outbound API call"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+USER_AGENT = "NetworkMaster/0.1"
+
+
+class PoolStats:
+    """Counts requests and real TCP connects, so handshake reuse is visible"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connects = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self):
+        """Return hit/miss counters; a miss is a request that needed a new connection"""
+        with self._lock:
+            requests_, connects = self.requests, self.connects
+        hits = max(0, requests_ - connects)
+        return {
+            "requests": requests_,
+            "hits": hits,
+            "misses": connects,
+            "hit_rate": round(hits / requests_, 3) if requests_ else 0.0,
+        }
+
+
+def _counting_pool_classes(stats):
+    """Connection pool classes that report into stats"""
+    def counting(pool_cls):
+        class CountingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                stats.record_connect()
+                return super().connect()
+
+        class CountingPool(pool_cls):
+            ConnectionCls = CountingConnection
+
+            def _make_request(self, *args, **kwargs):
+                stats.record_request()
+                return super()._make_request(*args, **kwargs)
+
+        return CountingPool
+
+    return {"http": counting(HTTPConnectionPool), "https": counting(HTTPSConnectionPool)}
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools feed a PoolStats instance"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self.stats)
+
+
+def make_retry(retries, backoff):
+    """Retry idempotent requests on connection errors and 429/5xx with backoff"""
+    options = dict(total=retries, connect=retries, read=retries, status=retries,
+                   backoff_factor=backoff,
+                   status_forcelist=(429, 500, 502, 503, 504),
+                   raise_on_status=False,
+                   respect_retry_after_header=True)
+    try:
+        return Retry(allowed_methods=frozenset(["GET", "HEAD"]), **options)
+    except TypeError:  # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(["GET", "HEAD"]), **options)
+
+
+class HTTPClient:
+    """requests.Session with bounded keep-alive pools, retries and default timeouts"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, retries=2, backoff=0.3,
+                 timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = CountingAdapter(self.stats,
+                                  pool_connections=pool_connections,
+                                  pool_maxsize=pool_maxsize,
+                                  pool_block=True,
+                                  max_retries=make_retry(retries, backoff))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request with the client's default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """GET through the shared pool"""
+        return self.request("GET", url, **kwargs)
+
+    def pool_stats(self):
+        """Return pool hit/miss counters"""
+        return self.stats.snapshot()
+
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared HTTPClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
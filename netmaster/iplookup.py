@@ -0,0 +1,102 @@
+"""IP geolocation / lookup against ipinfo.io and ipapi.co, cached"""
+import os
+
+from netmaster.cache import LookupCache
+from netmaster.geodb import GeoDatabase
+from netmaster.httpclient import get_client
+from netmaster.paths import data_file
+from netmaster.ratelimit import RateLimiter
+
+PROVIDERS = {
+    "ipinfo.io": "https://ipinfo.io/{ip}/json",
+    "ipapi.co": "https://ipapi.co/{ip}/json/",
+}
+DEFAULT_PROVIDER = "ipinfo.io"
+
+# (requests per second, burst) per provider, well inside the free tiers
+PROVIDER_RATES = {
+    "ipinfo.io": (10, 20),
+    "ipapi.co": (2, 5),
+}
+
+# Geolocation data changes rarely; a day keeps repeat clicks off the network
+LOOKUP_TTL = 86400
+
+
+def default_geodb_path():
+    """Offline database from NETWORKMASTER_GEODB, or geo.nmdb in the data dir"""
+    path = os.environ.get("NETWORKMASTER_GEODB") or data_file("geo.nmdb")
+    return path if os.path.isfile(path) else None
+
+
+class ProviderError(Exception):
+    """A provider answered, but not with usable data"""
+
+    def __init__(self, provider, message, status=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+def cacheable(data):
+    """Only successful answers are worth caching"""
+    return isinstance(data, dict) and not data.get("error")
+
+
+class IPLookupService:
+    """Fetch IP details through the shared HTTP client and a TTL/LRU cache"""
+
+    def __init__(self, client=None, cache=None, ttl=LOOKUP_TTL, limiter=None, offline=None):
+        self.client = client or get_client()
+        self.cache = cache if cache is not None else LookupCache()
+        self.ttl = ttl
+        self.limiter = limiter or RateLimiter(overrides=PROVIDER_RATES)
+        self.offline = offline
+        if offline is None and default_geodb_path():
+            try:
+                self.offline = GeoDatabase(default_geodb_path())
+            except (OSError, ValueError):
+                self.offline = None
+
+    def load_offline(self, path):
+        """Switch to a different offline range database"""
+        # The old one isn't closed: a lookup on another thread may still be
+        # reading it, and it is unmapped once the last reference goes
+        self.offline = GeoDatabase(path)
+
+    def unload_offline(self):
+        """Stop using the offline database; it is unmapped once no lookup holds it"""
+        self.offline = None
+
+    def _fetch(self, provider, ip):
+        # Only cache misses cost a token
+        self.limiter.acquire(provider)
+        response = self.client.get(PROVIDERS[provider].format(ip=ip))
+        if response.status_code != 200:
+            raise ProviderError(provider, f"status code {response.status_code}",
+                                status=response.status_code)
+        data = response.json()
+        if not cacheable(data):
+            raise ProviderError(provider, str(data.get("reason") or data.get("error")))
+        return data
+
+    def lookup(self, ip, provider=DEFAULT_PROVIDER):
+        """Return provider data for ip, from cache when fresh"""
+        ip = ip.strip()
+        return self.cache.get_or_fetch(f"{provider}:{ip}",
+                                       lambda: self._fetch(provider, ip),
+                                       ttl=self.ttl,
+                                       cacheable=cacheable)
+
+    def locate(self, ip):
+        """Geolocate ip from the offline database if it has it, else online"""
+        offline = self.offline
+        if offline is not None:
+            data = offline.locate(ip.strip())
+            if data is not None:
+                return data
+        return self.lookup(ip)
+
+    def stats(self):
+        """Return cache hit-rate counters"""
+        return self.cache.stats()
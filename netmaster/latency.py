@@ -0,0 +1,332 @@
+"""Continuous multi-target latency monitor over one unprivileged ICMP socket
+
+Echo requests for every target leave through a single datagram ICMP socket
+per address family (the unprivileged "ping socket" of Linux and macOS) and
+replies are matched back by sequence number and source address, so dozens
+of targets cost one file descriptor and one reader. Where ping sockets are
+not allowed (Windows, or Linux outside net.ipv4.ping_group_range) the
+monitor times TCP connects instead; a refused connection is still a round
+trip. Probes are spread evenly over each interval instead of sent in a
+burst. Per target the last `window` samples are kept together with a
+rolling histogram, so min/avg/p95/p99, jitter and loss are always current.
+"""
+import asyncio
+import bisect
+import collections
+import math
+import socket
+import struct
+import threading
+import time
+
+from netmaster.dnsbench import latency_stats
+
+AUTO = "auto"
+ICMP = "icmp"
+TCP = "tcp"
+
+# Histogram bucket upper edges in ms; the last bucket catches everything slower
+BUCKETS = [1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000, 2000]
+
+ECHO_REQUEST = {socket.AF_INET: 8, socket.AF_INET6: 128}
+ECHO_REPLY = {socket.AF_INET: 0, socket.AF_INET6: 129}
+PROTOCOL = {socket.AF_INET: socket.IPPROTO_ICMP, socket.AF_INET6: socket.IPPROTO_ICMPV6}
+PAYLOAD = b"netmaster-latency"
+
+
+def checksum(data):
+    """Internet checksum (RFC 1071)"""
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def icmp_socket(family=socket.AF_INET):
+    """Non-blocking unprivileged ICMP socket; raises OSError where not allowed"""
+    sock = socket.socket(family, socket.SOCK_DGRAM, PROTOCOL[family])
+    sock.setblocking(False)
+    return sock
+
+
+def icmp_available(family=socket.AF_INET):
+    """Whether this process may open a ping socket"""
+    try:
+        icmp_socket(family).close()
+        return True
+    except OSError:
+        return False
+
+
+def split_targets(text):
+    """'8.8.8.8, 1.1.1.1 example.org' -> list without duplicates"""
+    targets = []
+    for part in text.replace(",", " ").split():
+        if part not in targets:
+            targets.append(part)
+    return targets
+
+
+class TargetStats:
+    """Rolling window of round trips for one target (None marks a lost probe)"""
+
+    def __init__(self, target, address, window=600):
+        self.target = target
+        self.address = address
+        self.samples = collections.deque(maxlen=window)
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+        self.jitter = 0.0
+        self.last = None
+        self._previous = None
+
+    def add(self, when, rtt):
+        """Record one probe; the oldest sample leaves the histogram as it expires"""
+        if len(self.samples) == self.samples.maxlen:
+            old = self.samples[0][1]
+            if old is None:
+                self.lost -= 1
+            else:
+                self.histogram[bisect.bisect_left(BUCKETS, old)] -= 1
+        self.samples.append((when, rtt))
+        self.last = rtt
+        if rtt is None:
+            self.lost += 1
+            return
+        self.received += 1
+        self.histogram[bisect.bisect_left(BUCKETS, rtt)] += 1
+        if self._previous is not None:
+            # RFC 3550 interarrival jitter estimator
+            self.jitter += (abs(rtt - self._previous) - self.jitter) / 16
+        self._previous = rtt
+
+    def summary(self):
+        """Window statistics in ms plus loss, jitter and lifetime counters"""
+        count = len(self.samples)
+        summary = {
+            "target": self.target,
+            "address": self.address,
+            "sent": self.sent,
+            "received": self.received,
+            "loss": round(self.lost / count, 4) if count else 0.0,
+        }
+        summary.update(latency_stats([rtt for when, rtt in self.samples if rtt is not None]))
+        summary.update({
+            "jitter": round(self.jitter, 2),
+            "last": None if self.last is None else round(self.last, 2),
+            "histogram": list(self.histogram),
+        })
+        return summary
+
+
+class LatencyMonitor:
+    """Probe every target each `interval` seconds until stop() (or `rounds`)
+
+    method is "icmp", "tcp" (connect to `port`) or "auto", which uses ICMP
+    when ping sockets are allowed. Results are read with summary() and
+    series() from any thread while the monitor runs.
+    """
+
+    def __init__(self, targets, interval=1.0, timeout=1.0, window=600, method=AUTO, port=443):
+        self.targets = list(targets)
+        self.interval = max(0.01, float(interval))
+        self.timeout = float(timeout)
+        self.window = int(window)
+        self.requested = method
+        self.method = None
+        self.port = int(port)
+        self.stats = {}
+        self.errors = {}
+        self.rounds = 0
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+        self._sockets = {}
+        self._pending = {}
+        self._seq = 0
+
+    def stop(self):
+        """Ask the monitor to finish after the in-flight probes"""
+        self._stopped = True
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Probe in a daemon thread until stop()"""
+        if not self.running:
+            self._thread = threading.Thread(target=self.run, name="latency", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self, rounds=None):
+        """Blocking wrapper around run_async for worker threads and the CLI"""
+        return asyncio.run(self.run_async(rounds))
+
+    async def _resolve(self, loop):
+        """Look every target up at once; [(target, family, address)]"""
+        lookups = await asyncio.gather(*(loop.getaddrinfo(target, None, type=socket.SOCK_STREAM)
+                                         for target in self.targets), return_exceptions=True)
+        resolved = []
+        for target, info in zip(self.targets, lookups):
+            if isinstance(info, Exception):
+                self.errors[target] = str(info)
+                continue
+            family, address = info[0][0], info[0][4][0]
+            resolved.append((target, family, address))
+            with self._lock:
+                self.stats[target] = TargetStats(target, address, self.window)
+        return resolved
+
+    def _open(self, loop, families):
+        """Pick the probe method and open one ICMP socket per family"""
+        if self.requested == TCP:
+            return TCP
+        try:
+            for family in families:
+                sock = icmp_socket(family)
+                self._sockets[family] = sock
+                loop.add_reader(sock, self._on_readable, family)
+        except OSError:
+            self._close(loop)
+            if self.requested == ICMP:
+                raise
+            return TCP
+        return ICMP
+
+    def _close(self, loop):
+        for sock in self._sockets.values():
+            loop.remove_reader(sock)
+            sock.close()
+        self._sockets = {}
+
+    async def run_async(self, rounds=None):
+        """Probe until stopped or `rounds` rounds are done; returns summary()"""
+        self._stopped = False
+        self.rounds = 0
+        loop = asyncio.get_running_loop()
+        targets = await self._resolve(loop)
+        if not targets:
+            raise RuntimeError("None of the targets could be resolved")
+        self.method = self._open(loop, {family for _, family, _ in targets})
+        probes = set()
+        try:
+            spacing = self.interval / len(targets)
+            start = loop.time()
+            while not self._stopped and (rounds is None or self.rounds < rounds):
+                for i, target in enumerate(targets):
+                    # Fixed schedule so slow rounds don't make the rate drift
+                    delay = start + self.rounds * self.interval + i * spacing - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if self._stopped:
+                        break
+                    probe = asyncio.ensure_future(self._probe(*target))
+                    probes.add(probe)
+                    probe.add_done_callback(probes.discard)
+                self.rounds += 1
+            if probes:
+                await asyncio.gather(*probes)
+        finally:
+            self._close(loop)
+        return self.summary()
+
+    async def _probe(self, target, family, address):
+        stats = self.stats[target]
+        with self._lock:
+            stats.sent += 1
+        try:
+            if self.method == ICMP:
+                rtt = await self._echo(family, address)
+            else:
+                rtt = await self._connect(address)
+        except (asyncio.TimeoutError, OSError):
+            rtt = None
+        with self._lock:
+            stats.add(time.time(), rtt)
+
+    async def _echo(self, family, address):
+        """One echo request through the shared socket; returns the RTT in ms"""
+        self._seq = (self._seq + 1) & 0xFFFF
+        key = (family, self._seq)
+        header = struct.pack("!BBHHH", ECHO_REQUEST[family], 0, 0, 0, self._seq)
+        if family == socket.AF_INET:
+            # The kernel fills in the identifier (and the ICMPv6 checksum)
+            header = header[:2] + struct.pack("!H", checksum(header + PAYLOAD)) + header[4:]
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending[key] = (address, waiter)
+        try:
+            start = time.perf_counter()
+            self._sockets[family].sendto(header + PAYLOAD, (address, 0))
+            received = await asyncio.wait_for(waiter, self.timeout)
+        finally:
+            self._pending.pop(key, None)
+        return (received - start) * 1000
+
+    def _on_readable(self, family):
+        now = time.perf_counter()
+        sock = self._sockets[family]
+        while True:
+            try:
+                data, source = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if family == socket.AF_INET and len(data) >= 20 and data[0] >> 4 == 4:
+                # macOS hands over the IP header as well
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8 or data[0] != ECHO_REPLY[family]:
+                continue
+            seq = struct.unpack_from("!H", data, 6)[0]
+            pending = self._pending.get((family, seq))
+            if pending and pending[0] == source[0] and not pending[1].done():
+                pending[1].set_result(now)
+
+    async def _connect(self, address):
+        """Time a TCP handshake; returns the RTT in ms"""
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, self.port),
+                                               self.timeout)
+        except ConnectionRefusedError:
+            # The reset still took one round trip
+            return (time.perf_counter() - start) * 1000
+        rtt = (time.perf_counter() - start) * 1000
+        writer.close()
+        return rtt
+
+    def summary(self):
+        """Per-target statistics in target order; unresolvable targets carry an error"""
+        with self._lock:
+            rows = [stats.summary() for stats in self.stats.values()]
+        rows.extend({"target": target, "error": error} for target, error in self.errors.items())
+        return rows
+
+    def series(self, target):
+        """(seconds ago, rtt ms) lists for charting; lost probes are NaN"""
+        with self._lock:
+            stats = self.stats.get(target)
+            samples = list(stats.samples) if stats else []
+        if not samples:
+            return [], []
+        now = samples[-1][0]
+        return ([when - now for when, rtt in samples],
+                [math.nan if rtt is None else rtt for when, rtt in samples])
+
+
+def format_summary(row):
+    """Human readable one-line summary of one target"""
+    if "error" in row:
+        return f"{row['target']}: {row['error']}"
+
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+    return (f"{row['target']} ({row['address']}): {row['received']}/{row['sent']} replies, "
+            f"loss {row['loss']:.1%}, min/avg/p95/p99/max {ms(row['min'])}/{ms(row['mean'])}/"
+            f"{ms(row['p95'])}/{ms(row['p99'])}/{ms(row['max'])} ms, jitter {row['jitter']:.1f} ms")
@@ -0,0 +1,326 @@
+"""Prometheus/OpenMetrics exporter: pre-aggregated metrics on an HTTP /metrics endpoint
+
+Probes feed a Metrics registry as they finish (a Monitor listener, the
+GUI's scans and speed tests); a scrape only formats what is already
+there, so it costs microseconds and never sends a packet. The one thing
+read at scrape time is the kernel's interface counters from psutil,
+cached for a second so a scrape storm can't turn into a syscall storm.
+
+Exposed, in base units (seconds, bits per second):
+
+    netmaster_interface_{bytes,packets}_{sent,received}_total{interface}
+    netmaster_ping_rtt_seconds{target}           histogram
+    netmaster_ping_{probes,lost}_total{target}
+    netmaster_dns_lookup_seconds                 histogram
+    netmaster_speed_{download,upload}_bits_per_second, netmaster_speed_ping_seconds
+    netmaster_check_runs_total{check,status}, netmaster_check_duration_seconds{check}
+    netmaster_scan_stage_duration_seconds{stage} histogram
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from netmaster.latency import BUCKETS
+
+DEFAULT_PORT = 9790
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The latency monitor's histogram edges, in seconds
+RTT_BUCKETS = [edge / 1000 for edge in BUCKETS]
+DURATION_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+INTERFACE_TTL = 1.0
+
+# name: (type, help, buckets)
+METRICS = {
+    "netmaster_ping_rtt_seconds": ("histogram", "Round trip time of answered probes",
+                                   RTT_BUCKETS),
+    "netmaster_ping_probes_total": ("counter", "Latency probes sent", None),
+    "netmaster_ping_lost_total": ("counter", "Latency probes never answered", None),
+    "netmaster_dns_lookup_seconds": ("histogram",
+                                     "Duration of the DNS check's uncached test lookup",
+                                     RTT_BUCKETS),
+    "netmaster_speed_download_bits_per_second": ("gauge", "Last speed test download rate",
+                                                 None),
+    "netmaster_speed_upload_bits_per_second": ("gauge", "Last speed test upload rate", None),
+    "netmaster_speed_ping_seconds": ("gauge", "Last speed test ping", None),
+    "netmaster_speed_test_timestamp_seconds": ("gauge", "When the last speed test finished",
+                                               None),
+    "netmaster_check_runs_total": ("counter", "Scheduled check runs by outcome", None),
+    "netmaster_check_duration_seconds": ("histogram", "Duration of scheduled check runs",
+                                         DURATION_BUCKETS),
+    "netmaster_check_last_success_timestamp_seconds": ("gauge", "When a check last succeeded",
+                                                       None),
+    "netmaster_scan_stage_duration_seconds": ("histogram", "Duration of full scan stages",
+                                              DURATION_BUCKETS),
+    "netmaster_scan_stage_failures_total": ("counter", "Full scan stages that failed", None),
+}
+
+# psutil.net_io_counters field: (metric, help)
+INTERFACE_COUNTERS = {
+    "bytes_sent": ("netmaster_interface_bytes_sent_total", "Bytes sent by the interface"),
+    "bytes_recv": ("netmaster_interface_bytes_received_total", "Bytes received by the interface"),
+    "packets_sent": ("netmaster_interface_packets_sent_total", "Packets sent by the interface"),
+    "packets_recv": ("netmaster_interface_packets_received_total",
+                     "Packets received by the interface"),
+    "errin": ("netmaster_interface_receive_errors_total", "Receive errors on the interface"),
+    "errout": ("netmaster_interface_transmit_errors_total", "Transmit errors on the interface"),
+    "dropin": ("netmaster_interface_receive_drops_total", "Incoming packets dropped"),
+    "dropout": ("netmaster_interface_transmit_drops_total", "Outgoing packets dropped"),
+}
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count (a value equal to an edge is in that bucket)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts, total):
+        """Add counts already bucketed on the same edges, and their sum"""
+        for i, count in enumerate(counts):
+            self.counts[i] += count
+        self.sum += total
+        self.count += sum(counts)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def labels_text(names, values, extra=""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms rendered for Prometheus"""
+
+    def __init__(self, interfaces=True):
+        self.interfaces = interfaces
+        self.series = {name: {} for name in METRICS}
+        self.label_names = {}
+        self._lock = threading.Lock()
+        self._interface_text = ""
+        self._interface_time = 0.0
+
+    def _series(self, name, labels):
+        names = tuple(sorted(labels))
+        self.label_names.setdefault(name, names)
+        return self.series[name], tuple(labels[key] for key in self.label_names[name])
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            series, key = self._series(name, labels)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            series, key = self._series(name, labels)
+            series[key] = value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            histogram = self._histogram(name, labels)
+            histogram.observe(value)
+
+    def _histogram(self, name, labels):
+        series, key = self._series(name, labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(METRICS[name][2])
+        return histogram
+
+    # Feeds
+
+    def record(self, row):
+        """Monitor listener: count the run and fold in what its check measured"""
+        check, status, result = row["check"], row["status"], row.get("result")
+        self.inc("netmaster_check_runs_total", check=check, status=status)
+        if status == "skipped":
+            return
+        self.observe("netmaster_check_duration_seconds", row["seconds"], check=check)
+        if status != "ok":
+            return
+        self.set("netmaster_check_last_success_timestamp_seconds", row["time"], check=check)
+        if check == "ping":
+            self.record_ping(result)
+        elif check == "dns":
+            # The uncached lookup alone, not the whole check
+            if result.get("lookup_ms") is not None:
+                self.observe("netmaster_dns_lookup_seconds", result["lookup_ms"] / 1000)
+        elif check == "speed":
+            self.record_speed(result, row["time"])
+        elif check == "scan":
+            for stage, seconds in result.get("timings", {}).items():
+                if stage != "total":
+                    error = isinstance(result["results"].get(stage), dict) and \
+                        "error" in result["results"][stage]
+                    self.record_stage(stage, seconds, error)
+
+    def record_ping(self, summaries):
+        """Latency monitor summaries whose histograms cover only this run's probes"""
+        with self._lock:
+            for summary in summaries:
+                if "error" in summary:
+                    continue
+                labels = {"target": summary["target"]}
+                rtt = summary.get("mean") or 0
+                self._histogram("netmaster_ping_rtt_seconds", labels).merge(
+                    summary["histogram"], rtt * summary["received"] / 1000)
+                for name, amount in (("netmaster_ping_probes_total", summary["sent"]),
+                                     ("netmaster_ping_lost_total",
+                                      summary["sent"] - summary["received"])):
+                    series, key = self._series(name, labels)
+                    series[key] = series.get(key, 0) + amount
+
+    def record_speed(self, result, when=None):
+        """A speed test result: Mbps down/up and ping ms"""
+        if "error" in result:
+            return
+        self.set("netmaster_speed_download_bits_per_second", result["download"] * 1e6)
+        self.set("netmaster_speed_upload_bits_per_second", result["upload"] * 1e6)
+        self.set("netmaster_speed_ping_seconds", result["ping"] / 1000)
+        self.set("netmaster_speed_test_timestamp_seconds",
+                 result.get("time") or when or time.time())
+
+    def record_stage(self, stage, seconds, error=False):
+        """One full scan stage's duration"""
+        self.observe("netmaster_scan_stage_duration_seconds", seconds, stage=stage)
+        if error:
+            self.inc("netmaster_scan_stage_failures_total", stage=stage)
+
+    # Exposition
+
+    def render(self):
+        """The text exposition format"""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in METRICS.items():
+                series = self.series[name]
+                if not series:
+                    continue
+                names = self.label_names[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{labels_text(names, key)} {number(value)}")
+                        continue
+                    total = 0
+                    for edge, count in zip(buckets + [float("inf")], value.counts):
+                        total += count
+                        le = f'le="{number(float(edge))}"'
+                        lines.append(f"{name}_bucket{labels_text(names, key, le)} {total}")
+                    lines.append(f"{name}_sum{labels_text(names, key)} {number(value.sum)}")
+                    lines.append(f"{name}_count{labels_text(names, key)} {value.count}")
+        text = "\n".join(lines) + "\n" if lines else ""
+        return text + self._interface_metrics()
+
+    def _interface_metrics(self):
+        if not self.interfaces:
+            return ""
+        now = time.monotonic()
+        if now - self._interface_time < INTERFACE_TTL:
+            return self._interface_text
+        try:
+            import psutil
+
+            counters = psutil.net_io_counters(pernic=True)
+        except Exception:
+            counters = {}
+        lines = []
+        for field, (name, help_text) in INTERFACE_COUNTERS.items():
+            if not counters:
+                break
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for interface, values in sorted(counters.items()):
+                lines.append(f'{name}{{interface="{escape(interface)}"}} '
+                             f'{getattr(values, field)}')
+        self._interface_text = "\n".join(lines) + "\n" if lines else ""
+        self._interface_time = now
+        return self._interface_text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = self.metrics.render().encode()
+            content_type = CONTENT_TYPE
+            status = 200
+        elif self.path == "/":
+            body = b'<html><body><a href="/metrics">Metrics</a></body></html>\n'
+            content_type = "text/html"
+            status = 200
+        else:
+            body = b"Not found\n"
+            content_type = "text/plain"
+            status = 404
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+class MetricsServer:
+    """Serve a Metrics registry on http://host:port/metrics from a daemon thread"""
+
+    def __init__(self, metrics, host="0.0.0.0", port=DEFAULT_PORT):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        """Listen and serve in a daemon thread; returns self"""
+        handler = type("MetricsHandler", (_Handler,), {"metrics": self.metrics})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="metrics",
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,17 @@
+"""Locations for caches, history and other persistent state"""
+import os
+
+
+def data_dir():
+    """Return (and create) the per-user data directory
+
+    Override with the NETWORKMASTER_HOME environment variable.
+    """
+    path = os.environ.get("NETWORKMASTER_HOME") or os.path.join(os.path.expanduser("~"), ".networkmaster")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_file(name):
+    """Path of a file inside the data directory"""
+    return os.path.join(data_dir(), name)
@@ -0,0 +1,226 @@
+"""Asynchronous TCP connect port scanner"""
+import asyncio
+import ipaddress
+import re
+import socket
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OPEN = "open"
+CLOSED = "closed"
+FILTERED = "filtered"
+# The probe itself failed locally (e.g. out of file descriptors)
+ERROR = "error"
+
+# Columns of a streamed CSV; unresolved targets fill only host and error
+CSV_FIELDS = ["host", "port", "state", "error"]
+
+COMMON_PORTS = [21, 22, 23, 25, 53, 80, 110, 143, 443, 3306, 3389]
+
+# Hard ceiling so a typo in the concurrency box can't exhaust the fd table
+MAX_CONCURRENCY = 10000
+
+
+def parse_ports(spec):
+    """Parse a port spec like '22,80,8000-8100' into a sorted list"""
+    ports = set()
+    for part in re.split(r"[\s,]+", str(spec).strip()):
+        if not part:
+            continue
+        if part.lower() == "common":
+            ports.update(COMMON_PORTS)
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            low = int(low) if low else 1
+            high = int(high) if high else 65535
+            if low > high:
+                low, high = high, low
+        else:
+            low = high = int(part)
+        if low < 1 or high > 65535:
+            raise ValueError(f"Port out of range: {part}")
+        ports.update(range(low, high + 1))
+    if not ports:
+        raise ValueError("No ports given")
+    return sorted(ports)
+
+
+def split_targets(spec):
+    """Split a comma/space separated target string into items"""
+    if isinstance(spec, str):
+        return [item for item in re.split(r"[\s,]+", spec.strip()) if item]
+    return list(spec)
+
+
+def as_network(item):
+    """The ip_network for an address or CIDR block, None for a hostname"""
+    try:
+        return ipaddress.ip_network(item, strict=False)
+    except ValueError:
+        return None
+
+
+async def resolve_names(items):
+    """{hostname: getaddrinfo result or the exception} for the items that aren't IPs"""
+    loop = asyncio.get_running_loop()
+    names = [item for item in dict.fromkeys(items) if as_network(item) is None]
+    lookups = await asyncio.gather(*(loop.getaddrinfo(name, None, proto=socket.IPPROTO_TCP)
+                                     for name in names), return_exceptions=True)
+    return dict(zip(names, lookups))
+
+
+def iter_targets(spec, resolved=None):
+    """Yield (address, family) for hostnames, single IPs and CIDR blocks
+
+    Hostnames are looked up in `resolved` (from resolve_names) when given;
+    names that failed there are left out.
+    """
+    seen = set()
+    for item in split_targets(spec):
+        network = as_network(item)
+        if network is not None:
+            family = socket.AF_INET if network.version == 4 else socket.AF_INET6
+            # /31, /32, /127 and /128 have no network/broadcast to skip
+            hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+            for host in hosts:
+                yield str(host), family
+            continue
+
+        if resolved is None:
+            infos = socket.getaddrinfo(item, None, proto=socket.IPPROTO_TCP)
+        else:
+            infos = resolved.get(item)
+            if not infos or isinstance(infos, BaseException):
+                continue
+        family, _, _, _, sockaddr = infos[0]
+        if sockaddr[0] not in seen:
+            seen.add(sockaddr[0])
+            yield sockaddr[0], family
+
+
+def clamp_concurrency(concurrency):
+    """Keep the number of in-flight sockets below the open file limit"""
+    concurrency = max(1, min(int(concurrency), MAX_CONCURRENCY))
+    if resource is not None:
+        try:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            wanted = concurrency + 64
+            if soft != resource.RLIM_INFINITY and soft < wanted:
+                # Raise the soft limit as far as the hard limit allows
+                new_soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+                soft = new_soft
+            if soft != resource.RLIM_INFINITY:
+                concurrency = min(concurrency, max(1, soft - 64))
+        except (ValueError, OSError):
+            pass
+    return concurrency
+
+
+class PortScanner:
+    """Scan many hosts and ports concurrently on a single event loop"""
+
+    def __init__(self, concurrency=500, timeout=1.0):
+        self.concurrency = clamp_concurrency(concurrency)
+        self.timeout = float(timeout)
+        self._stopped = False
+        self.reset()
+
+    def reset(self):
+        """Clear counters from a previous scan"""
+        self.counts = {OPEN: 0, CLOSED: 0, FILTERED: 0, ERROR: 0}
+        self.open_ports = []
+        self.unresolved = {}
+        self.hosts = 0
+        self.elapsed = 0.0
+
+    def stop(self):
+        """Ask a running scan to finish after the in-flight probes"""
+        self._stopped = True
+
+    async def probe(self, host, family, port):
+        """Connect to one port and classify it as open, closed or filtered"""
+        loop = asyncio.get_running_loop()
+        try:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+        except OSError:
+            # EMFILE / ENOBUFS: this probe fails, the scan goes on
+            return ERROR
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (host, port)), self.timeout)
+            return OPEN
+        except ConnectionRefusedError:
+            return CLOSED
+        except (asyncio.TimeoutError, OSError):
+            # Timeouts and ICMP unreachables both mean something dropped the SYN
+            return FILTERED
+        finally:
+            sock.close()
+
+    async def scan_async(self, targets, ports, callback=None, on_error=None):
+        """Scan every (target, port) pair, calling callback(host, port, state)
+
+        Hostnames are resolved up front; one that doesn't resolve is
+        reported to on_error(target, message) and skipped.
+        """
+        self.reset()
+        self._stopped = False
+        ports = parse_ports(ports) if isinstance(ports, str) else list(ports)
+        targets = split_targets(targets)
+        resolved = await resolve_names(targets)
+        for name, result in resolved.items():
+            if isinstance(result, BaseException):
+                self.unresolved[name] = str(result)
+                if on_error:
+                    on_error(name, str(result))
+
+        def jobs():
+            for host, family in iter_targets(targets, resolved):
+                self.hosts += 1
+                for port in ports:
+                    yield host, family, port
+
+        pending = jobs()
+
+        async def worker():
+            # Workers share one generator so memory stays flat for huge ranges
+            for host, family, port in pending:
+                if self._stopped:
+                    break
+                state = await self.probe(host, family, port)
+                self.counts[state] += 1
+                if state == OPEN:
+                    self.open_ports.append((host, port))
+                if callback:
+                    callback(host, port, state)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        return self.summary()
+
+    def scan(self, targets, ports, callback=None, on_error=None):
+        """Blocking wrapper around scan_async for worker threads"""
+        return asyncio.run(self.scan_async(targets, ports, callback, on_error))
+
+    def summary(self):
+        """Return counters and throughput of the last scan"""
+        scanned = sum(self.counts.values())
+        return {
+            "hosts": self.hosts,
+            "scanned": scanned,
+            "open": list(self.open_ports),
+            "closed": self.counts[CLOSED],
+            "filtered": self.counts[FILTERED],
+            "errors": self.counts[ERROR],
+            "unresolved": dict(self.unresolved),
+            "elapsed": round(self.elapsed, 3),
+            "rate": round(scanned / self.elapsed, 1) if self.elapsed else 0.0,
+            "stopped": self._stopped,
+        }
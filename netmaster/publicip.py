@@ -0,0 +1,125 @@
+"""Hedged public IP lookup: race the providers, first valid answer wins"""
+import ipaddress
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from netmaster.httpclient import get_client, DEFAULT_TIMEOUT
+from netmaster.ratelimit import RateLimiter
+
+DEFAULT_SERVICES = [
+    "https://ipinfo.io/json",
+    "https://ipapi.co/json/",
+    "https://api.myip.com"
+]
+
+
+def provider_key(url):
+    """Rate limits are tracked per provider host"""
+    return urlparse(url).netloc
+
+
+def valid_ip_info(data):
+    """True if a provider response carries a usable IP address"""
+    if not isinstance(data, dict) or data.get("error"):
+        return False
+    try:
+        ipaddress.ip_address(str(data.get("ip", "")).strip())
+        return True
+    except ValueError:
+        return False
+
+
+class PublicIPLookup:
+    """Query IP info providers in parallel with staggered (hedged) starts
+
+    The first provider starts immediately; each further provider starts
+    after hedge_delay seconds unless an answer has already arrived, or at
+    once if every earlier provider has already failed. If nothing answered
+    because providers were rate limited, the lookup waits for the next
+    token when that is at most max_wait seconds away, and otherwise returns
+    the last answer marked "cached" with its "age" in seconds.
+    """
+
+    def __init__(self, services=None, timeout=DEFAULT_TIMEOUT, hedge_delay=0.25,
+                 rate=0.5, burst=2, limiter=None, get=None, max_wait=1.0):
+        self.services = list(services or DEFAULT_SERVICES)
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.limiter = limiter or RateLimiter(rate=rate, burst=burst)
+        self._get = get or get_client().get
+        # Losing requests finish in the background, so the pool is long-lived
+        self._executor = ThreadPoolExecutor(max_workers=max(2, len(self.services) * 2),
+                                            thread_name_prefix="public-ip")
+        self.max_wait = max_wait
+        self.last_provider = None
+        self.last_elapsed = 0.0
+        self.last_answer = None
+        self.last_answered = 0.0
+
+    def _fetch(self, url):
+        response = self._get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"{provider_key(url)} returned status {response.status_code}")
+        data = response.json()
+        if not valid_ip_info(data):
+            raise RuntimeError(f"{provider_key(url)} returned no IP address")
+        return data
+
+    def lookup(self):
+        """Return IP info from the fastest healthy provider"""
+        start = time.monotonic()
+        queue = list(self.services)
+        running = {}
+        errors = []
+        throttled = []
+        next_start = start
+
+        while queue or running or throttled:
+            now = time.monotonic()
+            if not queue and not running:
+                # Only throttled providers left: wait for the soonest token if it's close
+                url = min(throttled, key=lambda url: self.limiter.bucket(provider_key(url)).wait_time())
+                throttled = []
+                budget = self.max_wait - (now - start)
+                if budget <= 0 or not self.limiter.acquire(provider_key(url), timeout=budget):
+                    errors.append(f"{provider_key(url)}: rate limited")
+                    break
+                running[self._executor.submit(self._fetch, url)] = url
+                continue
+            if queue and (now >= next_start or not running):
+                url = queue.pop(0)
+                if not self.limiter.try_acquire(provider_key(url)):
+                    throttled.append(url)
+                    continue
+                running[self._executor.submit(self._fetch, url)] = url
+                next_start = now + self.hedge_delay
+                continue
+
+            timeout = max(0.0, next_start - now) if queue else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = running.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    errors.append(f"{provider_key(url)}: {e}")
+                    continue
+                # First valid answer wins; drop anything not yet started
+                for loser in running:
+                    loser.cancel()
+                self.last_provider = url
+                self.last_elapsed = time.monotonic() - start
+                self.last_answer = data
+                self.last_answered = time.monotonic()
+                return data
+
+        self.last_provider = None
+        self.last_elapsed = time.monotonic() - start
+        if self.last_answer is not None and any(error.endswith(": rate limited")
+                                                for error in errors):
+            answer = dict(self.last_answer)
+            answer["cached"] = True
+            answer["age"] = round(time.monotonic() - self.last_answered, 1)
+            return answer
+        return {"error": "Could not fetch IP info", "details": errors}
@@ -0,0 +1,73 @@
+"""Token bucket rate limiting for outbound API providers"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers skip or wait instead of sleeping blindly"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)      # tokens added per second
+        self.burst = float(burst)    # bucket capacity
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available, without blocking"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """Seconds until `tokens` would be available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+            return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are available; False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            delay = self.wait_time(tokens)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or delay > remaining:
+                    return False
+            time.sleep(min(delay, 0.05) if delay else 0.001)
+        return True
+
+
+class RateLimiter:
+    """One token bucket per provider key"""
+
+    def __init__(self, rate=1.0, burst=1, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = dict(overrides or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key):
+        """Return the bucket for key, creating it on first use"""
+        with self._lock:
+            if key not in self._buckets:
+                rate, burst = self.overrides.get(key, (self.rate, self.burst))
+                self._buckets[key] = TokenBucket(rate, burst)
+            return self._buckets[key]
+
+    def try_acquire(self, key, tokens=1):
+        """Non-blocking acquire on the bucket for key"""
+        return self.bucket(key).try_acquire(tokens)
+
+    def acquire(self, key, tokens=1, timeout=None):
+        """Blocking acquire on the bucket for key"""
+        return self.bucket(key).acquire(tokens, timeout)
@@ -0,0 +1,526 @@
+"""Typed result records, compact serialization and snapshot diffs
+
+Every probe result is a small __slots__ record (IPInfo, NetworkInfo,
+DNSInfo, SpeedResult, Device, Location) or a Failure carrying the error,
+instead of a loose dict. Records still read like the dicts they replace
+(`"ip" in info`, `info["ip"]`, `info.get("city")`, `info.items()`), so
+table and label code works on either. Port scans go into a PortTable,
+which keeps host, port and state in three flat arrays (7 bytes per port).
+
+A Snapshot bundles one set of results. It round-trips through JSON
+(to_dict / from_dict) or a tagged binary format (dumps / loads), and
+diff(old, new) lists what changed: public or local IP, nameservers,
+devices that came or went, ports whose state moved.
+"""
+import array
+import json
+import struct
+import sys
+import time
+
+from netmaster.portscan import OPEN, CLOSED, FILTERED, ERROR
+
+MAGIC = b"NMSNAP1\n"
+
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U32 = struct.Struct("<I")
+
+
+class Record:
+    """Fixed-field result; unset fields are None and don't show up as keys"""
+
+    __slots__ = ()
+    FIELDS = ()
+    # field -> record class (or [record class] for a list of them)
+    TYPES = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(klass.__dict__.get("__slots__", ()))
+        cls.FIELDS = tuple(fields)
+
+    def __init__(self, **values):
+        for name in self.FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"{type(self).__name__} has no field(s) {', '.join(values)}")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in self._set())
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def _set(self):
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None and name != "extra":
+                yield name, value
+        extra = getattr(self, "extra", None)
+        if extra:
+            yield from extra.items()
+
+    # Read like a dict, so code written against the old results keeps working
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key in self.FIELDS and key != "extra":
+            value = getattr(self, key)
+        else:
+            value = (getattr(self, "extra", None) or {}).get(key)
+        return default if value is None else value
+
+    def keys(self):
+        return [key for key, _ in self._set()]
+
+    def items(self):
+        return list(self._set())
+
+    def to_dict(self):
+        """Plain JSON-ready dict; extra provider fields are flattened back in"""
+        return {key: _plain(value) for key, value in self._set()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a dict; unknown keys go to `extra` where the record has one"""
+        if isinstance(data, Record):
+            return data
+        values = {}
+        extra = {}
+        for key, value in data.items():
+            if key in cls.FIELDS and key != "extra":
+                values[key] = _load(cls.TYPES.get(key), value)
+            else:
+                extra[key] = value
+        if extra and "extra" in cls.FIELDS:
+            values["extra"] = extra
+        return cls(**values)
+
+
+class Failure(Record):
+    """A probe that failed; takes the place of its result"""
+
+    __slots__ = ("error", "details")
+
+
+class IPInfo(Record):
+    """Public IP details in ipinfo.io's shape; other provider fields go to extra"""
+
+    __slots__ = ("ip", "hostname", "city", "region", "country", "loc", "org", "postal",
+                 "timezone", "source", "extra")
+
+    @property
+    def coordinates(self):
+        """(latitude, longitude) from loc, or None"""
+        try:
+            lat, lon = self.loc.split(",")
+            return float(lat), float(lon)
+        except (AttributeError, ValueError):
+            return None
+
+
+class Location(IPInfo):
+    """Geolocation of any address"""
+
+    __slots__ = ()
+
+
+class Address(Record):
+    __slots__ = ("family", "address", "netmask", "broadcast", "ptp")
+
+
+class Interface(Record):
+    __slots__ = ("name", "addresses")
+    TYPES = {"addresses": [Address]}
+
+
+class NetworkInfo(Record):
+    """Host name, routed address and interfaces; speed is the link rate in Mbps"""
+
+    __slots__ = ("hostname", "local_ip", "mac_address", "connection_type", "speed", "interfaces")
+    TYPES = {"interfaces": [Interface]}
+
+    @classmethod
+    def from_dict(cls, data):
+        interfaces = data.get("interfaces") if isinstance(data, dict) else None
+        if isinstance(interfaces, dict):
+            # engine.get_network_info: {name: [psutil address dicts]}
+            data = dict(data)
+            data["interfaces"] = [
+                Interface(name=name,
+                          addresses=[Address(**{key: getattr(value, "name", value)
+                                                for key, value in address.items()
+                                                if key in Address.FIELDS})
+                                     for address in addresses])
+                for name, addresses in interfaces.items()]
+        return super().from_dict(data)
+
+
+class DNSInfo(Record):
+    __slots__ = ("nameservers", "test_domain", "test_address")
+
+
+class SpeedResult(Record):
+    """Download / upload in Mbps, ping in ms"""
+
+    __slots__ = ("download", "upload", "ping", "server", "time")
+
+
+class Device(Record):
+    __slots__ = ("ip", "mac", "hostname", "vendor", "method")
+
+
+class PortTable:
+    """Port scan results as columns: host index, port and state per probe"""
+
+    __slots__ = ("hosts", "_host_ids", "host_ids", "ports", "states")
+    # Codes are stored in snapshots: only ever append
+    STATES = (OPEN, CLOSED, FILTERED, ERROR)
+    _CODES = {state: code for code, state in enumerate(STATES)}
+
+    def __init__(self, rows=()):
+        self.hosts = []
+        self._host_ids = {}
+        self.host_ids = array.array("I")
+        self.ports = array.array("H")
+        self.states = bytearray()
+        for host, port, state in rows:
+            self.add(host, port, state)
+
+    def add(self, host, port, state):
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            host_id = self._host_ids[host] = len(self.hosts)
+            self.hosts.append(host)
+        self.host_ids.append(host_id)
+        self.ports.append(port)
+        self.states.append(self._CODES[state])
+
+    def __len__(self):
+        return len(self.ports)
+
+    def __iter__(self):
+        hosts, states = self.hosts, self.STATES
+        for host_id, port, state in zip(self.host_ids, self.ports, self.states):
+            yield hosts[host_id], port, states[state]
+
+    def __eq__(self, other):
+        return isinstance(other, PortTable) and self.mapping() == other.mapping()
+
+    def __repr__(self):
+        return f"PortTable({len(self)} ports on {len(self.hosts)} host(s))"
+
+    def open_ports(self):
+        return [(host, port) for host, port, state in self if state == OPEN]
+
+    def mapping(self):
+        """{(host, port): state}"""
+        return {(host, port): state for host, port, state in self}
+
+    def to_dict(self):
+        return {"hosts": list(self.hosts),
+                "ports": [[host_id, port, self.STATES[state]] for host_id, port, state
+                          in zip(self.host_ids, self.ports, self.states)]}
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, PortTable):
+            return data
+        table = cls()
+        for host in data["hosts"]:
+            table._host_ids[host] = len(table.hosts)
+            table.hosts.append(host)
+        for host_id, port, state in data["ports"]:
+            table.host_ids.append(host_id)
+            table.ports.append(port)
+            table.states.append(cls._CODES[state])
+        return table
+
+    def changes(self, newer):
+        """(host, port, old state, new state) for every probe whose state differs
+
+        A port only one side probed counts only if it is open there.
+        """
+        if self.hosts == newer.hosts and self.host_ids == newer.host_ids and \
+                self.ports == newer.ports:
+            # Same probes in the same order (a rescan): compare the state bytes alone
+            if self.states == newer.states:
+                return
+            for i, (old, new) in enumerate(zip(self.states, newer.states)):
+                if old != new:
+                    yield (self.hosts[self.host_ids[i]], self.ports[i], self.STATES[old],
+                           self.STATES[new])
+            return
+        before = self.mapping()
+        for host, port, state in newer:
+            old = before.pop((host, port), None)
+            if old != state and (old is not None or state == OPEN):
+                yield host, port, old, state
+        for (host, port), state in before.items():
+            if state == OPEN:
+                yield host, port, state, None
+
+
+class Snapshot(Record):
+    """One set of results, taken at `time`"""
+
+    __slots__ = ("time", "ip_info", "network_info", "dns_info", "speed_test", "devices",
+                 "location", "ports")
+    TYPES = {"ip_info": IPInfo, "network_info": NetworkInfo, "dns_info": DNSInfo,
+             "speed_test": SpeedResult, "devices": [Device], "location": Location,
+             "ports": PortTable}
+
+    @classmethod
+    def from_results(cls, results, when=None):
+        """Snapshot of a results dict like the app's self.results"""
+        # {} / None mean the stage never ran; an empty device list is a result
+        values = {name: to_record(name, results[name]) for name in cls.TYPES
+                  if results.get(name) is not None and results[name] != {}}
+        return cls(time=time.time() if when is None else when, **values)
+
+    def save(self, path):
+        """Write as JSON if path ends in .json, else in the binary format"""
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+        else:
+            with open(path, "wb") as f:
+                f.write(dumps(self))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(MAGIC):
+            return loads(data)
+        return cls.from_dict(json.loads(data))
+
+
+def _plain(value):
+    if isinstance(value, (Record, PortTable)):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _load(kind, value):
+    if kind is None or value is None:
+        return value
+    if isinstance(kind, list):
+        return [_load(kind[0], item) for item in value]
+    if isinstance(value, dict) and "error" in value and kind is not PortTable:
+        return Failure.from_dict(value)
+    return kind.from_dict(value)
+
+
+def to_record(name, data):
+    """Typed record for a result stored under `name` (ip_info, devices, ...)"""
+    kind = Snapshot.TYPES.get(name)
+    if kind is None or isinstance(data, (Record, PortTable)):
+        return data
+    if isinstance(data, dict) and "error" in data:
+        return Failure.from_dict(data)
+    if isinstance(kind, list) and isinstance(data, list) and \
+            all(isinstance(item, kind[0]) for item in data):
+        return data
+    return _load(kind, data)
+
+
+# Binary format: MAGIC, then one tagged value. Records are stored as their
+# field values in order, so field names are written once per type, not per row.
+RECORD_TYPES = [Failure, IPInfo, Location, Address, Interface, NetworkInfo, DNSInfo,
+                SpeedResult, Device, Snapshot]
+_TYPE_CODES = {kind: code for code, kind in enumerate(RECORD_TYPES)}
+
+
+def _column(values):
+    """Little-endian bytes of an array"""
+    if sys.byteorder == "big":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode(value, out):
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        out += b"i"
+        out += _I64.pack(value)
+    elif isinstance(value, float):
+        out += b"d"
+        out += _F64.pack(value)
+    elif isinstance(value, Record):
+        out += b"r"
+        out.append(_TYPE_CODES[type(value)])
+        for field in value.values():
+            _encode(field, out)
+    elif isinstance(value, PortTable):
+        out += b"p"
+        _encode(value.hosts, out)
+        out += _U32.pack(len(value))
+        out += _column(value.host_ids)
+        out += _column(value.ports)
+        out += value.states
+    elif isinstance(value, (list, tuple)):
+        out += b"l"
+        out += _U32.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b"m"
+        out += _U32.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        data = str(value).encode("utf-8")
+        out += b"s"
+        out += _U32.pack(len(data))
+        out += data
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, count):
+        if self.pos + count > len(self.data):
+            raise ValueError("truncated snapshot")
+        chunk = self.data[self.pos:self.pos + count]
+        self.pos += count
+        return chunk
+
+    def length(self):
+        return _U32.unpack(self.take(4))[0]
+
+    def column(self, typecode, count):
+        values = array.array(typecode)
+        values.frombytes(self.take(count * values.itemsize))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def value(self):
+        tag = bytes(self.take(1))
+        if tag == b"N":
+            return None
+        if tag == b"T":
+            return True
+        if tag == b"F":
+            return False
+        if tag == b"i":
+            return _I64.unpack(self.take(8))[0]
+        if tag == b"d":
+            return _F64.unpack(self.take(8))[0]
+        if tag == b"s":
+            return str(self.take(self.length()), "utf-8")
+        if tag == b"l":
+            return [self.value() for _ in range(self.length())]
+        if tag == b"m":
+            return {self.value(): self.value() for _ in range(self.length())}
+        if tag == b"r":
+            code = self.take(1)[0]
+            if code >= len(RECORD_TYPES):
+                raise ValueError(f"unknown record type {code}")
+            record = RECORD_TYPES[code].__new__(RECORD_TYPES[code])
+            for name in record.FIELDS:
+                setattr(record, name, self.value())
+            return record
+        if tag == b"p":
+            table = PortTable()
+            table.hosts = self.value()
+            table._host_ids = {host: i for i, host in enumerate(table.hosts)}
+            count = self.length()
+            table.host_ids = self.column("I", count)
+            table.ports = self.column("H", count)
+            table.states = bytearray(self.take(count))
+            return table
+        raise ValueError(f"bad tag {tag!r} at offset {self.pos - 1}")
+
+
+def dumps(value):
+    """Binary encoding of a record, port table or plain value"""
+    out = bytearray(MAGIC)
+    _encode(value, out)
+    return bytes(out)
+
+
+def loads(data):
+    if not bytes(data[:len(MAGIC)]) == MAGIC:
+        raise ValueError("not a NetworkMaster snapshot")
+    reader = _Reader(data)
+    reader.pos = len(MAGIC)
+    return reader.value()
+
+
+def diff(old, new):
+    """Changes from snapshot old to new, as a list of dicts
+
+    Sections only one snapshot has (a skipped stage, no port scan) are not
+    compared.
+    """
+    changes = []
+    for section, field, change in (("ip_info", "ip", "public_ip"),
+                                   ("ip_info", "org", "provider"),
+                                   ("network_info", "local_ip", "local_ip"),
+                                   ("dns_info", "nameservers", "nameservers")):
+        before = (getattr(old, section) or {}).get(field)
+        after = (getattr(new, section) or {}).get(field)
+        if before is not None and after is not None and before != after:
+            changes.append({"change": change, "old": before, "new": after})
+
+    if isinstance(old.devices, list) and isinstance(new.devices, list):
+        before = {device.ip: device for device in old.devices}
+        for device in new.devices:
+            previous = before.pop(device.ip, None)
+            if previous is None:
+                changes.append({"change": "device_added", **device.to_dict()})
+            elif previous.mac and device.mac and previous.mac != device.mac:
+                changes.append({"change": "device_mac", "ip": device.ip, "old": previous.mac,
+                                "new": device.mac})
+        changes.extend({"change": "device_removed", **device.to_dict()}
+                       for device in before.values())
+
+    if isinstance(old.ports, PortTable) and isinstance(new.ports, PortTable):
+        changes.extend({"change": "port", "host": host, "port": port, "old": before,
+                        "new": after}
+                       for host, port, before, after in old.ports.changes(new.ports))
+    return changes
+
+
+def summarize(changes):
+    """'public IP changed, 2 new devices, 1 port changed' (or '' for none)"""
+    counts = {}
+    for change in changes:
+        counts[change["change"]] = counts.get(change["change"], 0) + 1
+    labels = {"public_ip": "public IP changed", "provider": "provider changed",
+              "local_ip": "local IP changed", "nameservers": "nameservers changed"}
+    parts = [labels[name] for name in labels if name in counts]
+    for name, one, many in (("device_added", "new device", "new devices"),
+                            ("device_removed", "device gone", "devices gone"),
+                            ("device_mac", "device MAC changed", "device MACs changed"),
+                            ("port", "port changed", "ports changed")):
+        if name in counts:
+            parts.append(f"{counts[name]} {one if counts[name] == 1 else many}")
+    return ", ".join(parts)
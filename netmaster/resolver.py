@@ -0,0 +1,217 @@
+"""Shared DNS resolvers and a concurrent bulk resolver
+
+One LRU answer cache per set of nameservers is shared by the blocking
+resolver (single lookups) and every async resolver, so a name resolved in
+bulk is not asked again by a later lookup and vice versa. The system
+configuration is read once.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+RECORD_TYPES = ["A", "AAAA", "MX", "NS", "TXT", "CNAME"]
+
+# Outcomes counted per query
+OK = "ok"
+NXDOMAIN = "nxdomain"
+NODATA = "nodata"
+SERVFAIL = "servfail"
+TIMEOUT = "timeout"
+ERROR = "error"
+STATUSES = [OK, NXDOMAIN, NODATA, SERVFAIL, TIMEOUT, ERROR]
+# Result row columns, whichever status the first row has
+CSV_FIELDS = ["domain", "type", "status", "answers", "ttl", "error", "ms"]
+
+CACHE_SIZE = 50000
+# Names remembered for dropping duplicates; a repeat further back than this
+# is resolved again, usually straight from the answer cache
+DEDUP_SIZE = 100000
+
+_lock = threading.Lock()
+_caches = {}
+_system = None
+
+
+def answer_cache(nameservers=None, port=53):
+    """The TTL-respecting LRU answer cache shared by everyone asking these servers"""
+    key = (tuple(nameservers or ()), port)
+    with _lock:
+        cache = _caches.get(key)
+        if cache is None:
+            import dns.resolver
+            cache = _caches[key] = dns.resolver.LRUCache(CACHE_SIZE)
+        return cache
+
+
+def system_resolver():
+    """Blocking resolver for the system nameservers, using the shared cache"""
+    global _system
+    cache = answer_cache()
+    with _lock:
+        if _system is None:
+            import dns.resolver
+            _system = dns.resolver.Resolver()
+            _system.cache = cache
+        return _system
+
+
+def async_resolver(nameservers=None, port=53, timeout=2.0, cache=True):
+    """Async resolver for the given (or system) nameservers
+
+    cache=True uses the shared answer cache, False none, or pass a cache.
+    """
+    import dns.asyncresolver
+
+    resolver = dns.asyncresolver.Resolver(configure=False)
+    resolver.nameservers = list(nameservers or system_resolver().nameservers)
+    resolver.port = port
+    # Half the lifetime per attempt leaves room for one retry of a lost packet
+    resolver.timeout = timeout / 2
+    resolver.lifetime = timeout
+    resolver.cache = answer_cache(nameservers, port) if cache is True else (cache or None)
+    return resolver
+
+
+def classify(error):
+    """Map a resolution exception to one of STATUSES"""
+    import dns.exception
+    import dns.rcode
+    import dns.resolver
+
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        return NXDOMAIN
+    if isinstance(error, dns.resolver.NoAnswer):
+        return NODATA
+    if isinstance(error, dns.exception.Timeout):
+        return TIMEOUT
+    if isinstance(error, dns.resolver.NoNameservers):
+        # Every server answered with an error rcode (or refused to talk)
+        for _, _, _, _, response in error.kwargs.get("errors", []):
+            if response is not None and response.rcode() == dns.rcode.SERVFAIL:
+                return SERVFAIL
+    return ERROR
+
+
+def read_names(lines, window=DEDUP_SIZE):
+    """Yield names from text lines, skipping blanks, # comments and recent repeats
+
+    Only the last `window` distinct names are remembered, so memory stays
+    bounded however long the input is.
+    """
+    seen = OrderedDict()
+    for line in lines:
+        name = line.split("#", 1)[0].strip().rstrip(".")
+        if not name:
+            continue
+        name = name.split()[0].lower()
+        if name in seen:
+            seen.move_to_end(name)
+            continue
+        seen[name] = None
+        if len(seen) > window:
+            seen.popitem(last=False)
+        yield name
+
+
+class BulkResolver:
+    """Resolve many names x record types concurrently on one event loop
+
+    A fixed pool of workers pulls (name, type) pairs from one generator, so
+    at most `concurrency` queries are in flight and memory stays flat for
+    any input size.
+    """
+
+    def __init__(self, nameservers=None, port=53, concurrency=200, timeout=2.0, cache=True):
+        self.nameservers = nameservers
+        self.port = port
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = float(timeout)
+        self.cache = cache
+        self._stopped = False
+        self.reset()
+
+    def reset(self):
+        """Clear counters from a previous run"""
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.names = 0
+        self.elapsed = 0.0
+        self.cache_hits = 0
+
+    def stop(self):
+        """Ask a running job to finish after the in-flight queries"""
+        self._stopped = True
+
+    async def query(self, resolver, name, record_type):
+        """Resolve one pair into a result row"""
+        row = {"domain": name, "type": record_type}
+        start = time.perf_counter()
+        try:
+            answer = await resolver.resolve(name, record_type, search=False)
+            row["status"] = OK
+            row["answers"] = [rdata.to_text() for rdata in answer]
+            row["ttl"] = answer.rrset.ttl
+        except Exception as e:
+            row["status"] = classify(e)
+            row["error"] = str(e)
+        row["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return row
+
+    async def resolve_async(self, names, record_types=("A",), callback=None):
+        """Resolve every (name, type) pair, calling callback(row) as each finishes"""
+        self.reset()
+        self._stopped = False
+        resolver = async_resolver(self.nameservers, self.port, self.timeout, self.cache)
+        cache = resolver.cache
+        hits_before = cache.hits() if cache else 0
+        record_types = [t.upper() for t in record_types]
+
+        def jobs():
+            for name in names:
+                self.names += 1
+                for record_type in record_types:
+                    yield name, record_type
+
+        pending = jobs()
+
+        async def worker():
+            for name, record_type in pending:
+                if self._stopped:
+                    break
+                row = await self.query(resolver, name, record_type)
+                self.counts[row["status"]] += 1
+                if callback:
+                    callback(row)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        if cache:
+            self.cache_hits = cache.hits() - hits_before
+        return self.summary()
+
+    def resolve(self, names, record_types=("A",), callback=None):
+        """Blocking wrapper around resolve_async for worker threads and the CLI"""
+        return asyncio.run(self.resolve_async(names, record_types, callback))
+
+    def summary(self):
+        """Return per-status counts and throughput of the last run"""
+        queries = sum(self.counts.values())
+        summary = {"names": self.names, "queries": queries}
+        summary.update(self.counts)
+        summary.update({
+            "cache_hits": self.cache_hits,
+            "elapsed": round(self.elapsed, 3),
+            "rate": round(queries / self.elapsed, 1) if self.elapsed else 0.0,
+            "stopped": self._stopped,
+        })
+        return summary
+
+
+def format_summary(summary):
+    """Human readable one-line summary"""
+    return (f"{summary['queries']} queries for {summary['names']} names in {summary['elapsed']:.2f}s "
+            f"({summary['rate']:.0f}/s): {summary[OK]} ok, {summary[NXDOMAIN]} NXDOMAIN, "
+            f"{summary[NODATA]} no data, {summary[SERVFAIL]} SERVFAIL, {summary[TIMEOUT]} timeouts, "
+            f"{summary[ERROR]} errors, {summary['cache_hits']} cached")
+
@@ -0,0 +1,342 @@
+"""Periodic monitoring: run named checks on intervals or cron specs
+
+A schedule is an interval ("30s", "5m", "1h", "1d" or plain seconds) or a
+five-field cron spec ("*/15 * * * *", "0 6 * * 1-5", "@hourly"). Slots
+are computed from the schedule, not from when the last run ended, so runs
+don't drift and slots missed while the box was asleep are skipped rather
+than replayed. Each run starts a random delay of up to `jitter` seconds
+after its slot, so many monitors on one schedule don't probe together.
+
+A job never runs twice at once. If it is still running at its next slot
+the slot is skipped ("skip") or remembered and run as soon as the current
+run ends ("queue"; several missed slots still make one run). Every run,
+or skipped slot, becomes one row written to a sink, and only the last
+row per job is kept in memory. Between slots the scheduler thread sleeps.
+"""
+import datetime
+import random
+import threading
+import time
+
+SKIP = "skip"
+QUEUE = "queue"
+OVERLAP = [SKIP, QUEUE]
+
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Automatic jitter: this share of the period, at most JITTER_MAX seconds
+JITTER_SHARE = 0.1
+JITTER_MAX = 300
+# Wake at least this often (s), so a changed wall clock is noticed
+MAX_SLEEP = 60
+DEFAULT_TARGETS = ["1.1.1.1", "8.8.8.8"]
+
+
+def parse_duration(text):
+    """Seconds in "90", "30s", "5m", "1.5h" or "1d" """
+    text = str(text).strip().lower()
+    unit = UNITS.get(text[-1:])
+    try:
+        seconds = float(text[:-1] if unit else text) * (unit or 1)
+    except ValueError:
+        raise ValueError(f"Invalid interval: {text}") from None
+    if seconds <= 0:
+        raise ValueError(f"Interval must be positive: {text}")
+    return seconds
+
+
+class Interval:
+    """Every `seconds`, in slots counted from `start`"""
+
+    def __init__(self, seconds, start=None):
+        self.seconds = float(seconds)
+        self.start = time.time() if start is None else float(start)
+
+    def first(self):
+        """The first slot: right away"""
+        return self.start
+
+    def next_after(self, when):
+        slots = (when - self.start) // self.seconds + 1
+        return self.start + max(slots, 0) * self.seconds
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+class Cron:
+    """Five-field cron spec (minute hour day month weekday) in local time
+
+    Fields take *, numbers, a-b ranges, /step and comma lists; weekday 0
+    or 7 is Sunday. Like cron, when both day and weekday are restricted a
+    time matching either one runs.
+    """
+
+    ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+               "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *",
+               "@annually": "0 0 1 1 *"}
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, spec):
+        self.spec = spec.strip()
+        fields = self.ALIASES.get(self.spec.lower(), self.spec).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {spec}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._field(field, low, high) for field, (low, high) in zip(fields, self.RANGES))
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _field(self, text, low, high):
+        values = set()
+        for part in text.split(","):
+            span, _, step = part.partition("/")
+            try:
+                if span == "*":
+                    first, last = low, high
+                elif "-" in span:
+                    first, last = (int(value) for value in span.split("-", 1))
+                else:
+                    first = last = int(span)
+                    if step:
+                        last = high
+                step = int(step) if step else 1
+            except ValueError:
+                raise ValueError(f"Invalid cron field: {text}") from None
+            if not low <= first <= last <= high or step < 1:
+                raise ValueError(f"Cron field out of range {low}-{high}: {text}")
+            values.update(range(first, last + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        # isoweekday: Monday 1 .. Sunday 7
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def first(self):
+        return self.next_after(time.time())
+
+    def next_after(self, when):
+        moment = datetime.datetime.fromtimestamp(when).replace(second=0, microsecond=0)
+        moment += datetime.timedelta(minutes=1)
+        limit = moment.year + 5
+        # Jump a whole month, day or hour at a time when that field can't match
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0,
+                                        minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron spec never matches: {self.spec}")
+
+    def __str__(self):
+        return f"cron {self.spec}"
+
+
+def parse_schedule(text, start=None):
+    """Interval for "5m"-style text, Cron for "@daily" or five fields"""
+    text = text.strip()
+    if text.startswith("@") or " " in text:
+        return Cron(text)
+    return Interval(parse_duration(text), start)
+
+
+class Job:
+    """A named check with its schedule and run state"""
+
+    def __init__(self, name, func, schedule, jitter=None, overlap=SKIP):
+        if overlap not in OVERLAP:
+            raise ValueError(f"overlap must be one of {', '.join(OVERLAP)}")
+        self.name = name
+        self.func = func
+        self.schedule = parse_schedule(schedule) if isinstance(schedule, str) else schedule
+        self.overlap = overlap
+        self.slot = self.schedule.first()
+        if jitter is None:
+            period = self.schedule.next_after(self.slot) - self.slot
+            jitter = min(period * JITTER_SHARE, JITTER_MAX)
+        self.jitter = float(jitter)
+        self.due = self.slot + random.uniform(0, self.jitter)
+        self.running = False
+        self.pending = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last = None
+
+    def advance(self, now):
+        """Move to the first slot after now"""
+        self.slot = self.schedule.next_after(max(self.slot, now))
+        self.due = self.slot + random.uniform(0, self.jitter)
+
+    def status(self):
+        return {"check": self.name, "schedule": str(self.schedule), "runs": self.runs,
+                "failures": self.failures, "skipped": self.skipped, "running": self.running,
+                "next": round(self.due, 3)}
+
+
+class Monitor:
+    """Run jobs on their schedules in a background thread until stop()
+
+    Rows ({"time", "check", "status", "seconds", "result"}) go to
+    sink.write() and to every on_result callback. max_runs, counted over
+    all jobs, ends the monitor once that many runs have finished.
+    """
+
+    def __init__(self, sink=None, on_result=None, max_runs=None):
+        self.jobs = {}
+        self.sink = sink
+        self.listeners = [on_result] if on_result else []
+        self.max_runs = max_runs
+        self.finished = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def add(self, name, func, schedule, jitter=None, overlap=SKIP):
+        """Schedule func() as check `name`; its return value is the row's result"""
+        with self._cond:
+            if name in self.jobs:
+                raise ValueError(f"Duplicate check: {name}")
+            self.jobs[name] = job = Job(name, func, schedule, jitter, overlap)
+            self._cond.notify()
+        return job
+
+    def stop(self):
+        """Start no more runs; running checks finish in their own threads"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Schedule in a daemon thread until stop()"""
+        if not self.running:
+            self._stopped = False
+            self._thread = threading.Thread(target=self.run, name="monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self):
+        """Schedule in this thread until stop() or max_runs"""
+        with self._cond:
+            while not self._stopped:
+                if self.max_runs is not None and self.finished >= self.max_runs:
+                    break
+                now = time.time()
+                for job in self.jobs.values():
+                    if job.due <= now:
+                        job.advance(now)
+                        self._due(job)
+                wake = min((job.due for job in self.jobs.values()), default=now + MAX_SLEEP)
+                self._cond.wait(min(max(wake - time.time(), 0), MAX_SLEEP))
+
+    def status(self):
+        with self._cond:
+            return [job.status() for job in self.jobs.values()]
+
+    def _due(self, job):
+        if not job.running:
+            self._launch(job)
+        elif job.overlap == QUEUE:
+            job.pending = True
+        else:
+            job.skipped += 1
+            self._record({"time": round(time.time(), 3), "check": job.name, "status": SKIPPED,
+                          "seconds": 0, "result": None})
+
+    def _launch(self, job):
+        if self.max_runs is not None and self.finished + self._active() >= self.max_runs:
+            return
+        job.running = True
+        threading.Thread(target=self._execute, args=(job,), name=f"monitor-{job.name}",
+                         daemon=True).start()
+
+    def _active(self):
+        return sum(job.running for job in self.jobs.values())
+
+    def _execute(self, job):
+        when = time.time()
+        start = time.perf_counter()
+        try:
+            result = job.func()
+            failed = isinstance(result, dict) and "error" in result
+        except Exception as e:
+            result = {"error": str(e)}
+            failed = True
+        row = {"time": round(when, 3), "check": job.name, "status": ERROR if failed else OK,
+               "seconds": round(time.perf_counter() - start, 3), "result": result}
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.failures += failed
+            self.finished += 1
+            self._record(row)
+            if job.pending and not self._stopped:
+                job.pending = False
+                self._launch(job)
+            self._cond.notify()
+
+    def _record(self, row):
+        self.jobs[row["check"]].last = row
+        if self.sink is not None:
+            try:
+                self.sink.write(row)
+            except Exception:
+                # A full disk must not stop the monitoring
+                pass
+        for listener in self.listeners:
+            try:
+                listener(row)
+            except Exception:
+                pass
+
+
+def checks(history=None, targets=None):
+    """The checks a monitor can schedule by name, as zero-argument functions"""
+    from netmaster import engine
+
+    targets = list(targets or DEFAULT_TARGETS)
+
+    def ping():
+        from netmaster.latency import LatencyMonitor
+
+        monitor = LatencyMonitor(targets, interval=0.2, window=10)
+        monitor.run(rounds=10)
+        return monitor.summary()
+
+    def scan():
+        # The speed test is a check of its own, usually on a slower schedule
+        results, timings = engine.full_scan(skip=("speed_test",))
+        return {"results": results,
+                "timings": {name: round(seconds, 3) for name, seconds in timings.items()}}
+
+    return {
+        "ip": engine.get_public_ip_info,
+        "network": engine.get_network_info,
+        "dns": engine.get_dns_info,
+        "devices": engine.scan_network_devices,
+        "ping": ping,
+        "speed": lambda: engine.run_speed_test(history=history),
+        "scan": scan,
+    }
+
+
+CHECKS = ["ip", "network", "dns", "devices", "ping", "speed", "scan"]
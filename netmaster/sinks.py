@@ -0,0 +1,225 @@
+"""Streaming result sinks: NDJSON or CSV, to a stream or a size-rotated file
+
+Scans hand every result row to sink.write() as it is produced. Rows are
+encoded straight away into a bounded buffer, which is written out once it
+holds `buffer_rows` rows or when a row arrives `flush_interval` seconds
+after the last write, so memory stays flat however long the scan runs.
+
+How hard a file sink pushes rows to disk is the fsync policy:
+
+    never   leave it to the OS (fastest)
+    flush   fsync after every buffer write: a crash loses one buffer at most
+    close   fsync once, when the file is rotated or closed
+
+With max_bytes a file sink rotates like logging's RotatingFileHandler:
+results.ndjson -> results.ndjson.1 -> ... -> results.ndjson.<backups>.
+"""
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+NDJSON = "ndjson"
+CSV = "csv"
+FORMATS = [NDJSON, CSV]
+
+FSYNC_NEVER = "never"
+FSYNC_FLUSH = "flush"
+FSYNC_CLOSE = "close"
+FSYNC_POLICIES = [FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE]
+
+
+def format_for(path, default=NDJSON):
+    """CSV for *.csv paths, else the default"""
+    return CSV if str(path).lower().endswith(".csv") else default
+
+
+class StreamSink:
+    """Buffered NDJSON rows written to a text stream"""
+
+    def __init__(self, stream, buffer_rows=1000, flush_interval=1.0, fsync=FSYNC_NEVER):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.stream = stream
+        self.buffer_rows = max(1, int(buffer_rows))
+        self.flush_interval = float(flush_interval)
+        self.fsync = fsync
+        self.rows = 0
+        self.buffer = []
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def encode(self, row):
+        return json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+    def write(self, row):
+        with self._lock:
+            self.buffer.append(self.encode(row))
+            self.rows += 1
+            if len(self.buffer) >= self.buffer_rows or \
+                    time.monotonic() - self._flushed >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            self._write_out("".join(self.buffer))
+            self.buffer = []
+            self.stream.flush()
+            if self.fsync == FSYNC_FLUSH:
+                self._sync()
+        self._flushed = time.monotonic()
+
+    def _write_out(self, text):
+        self.stream.write(text)
+
+    def _sync(self):
+        try:
+            os.fsync(self.stream.fileno())
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # Pipes and consoles have nothing to sync
+            pass
+
+    def close(self):
+        """Write what is buffered; the stream itself stays open"""
+        with self._lock:
+            self._flush()
+            if self.fsync == FSYNC_CLOSE:
+                self._sync()
+
+
+class CSVStreamSink(StreamSink):
+    """Buffered CSV rows; columns are `fields` or the first row's keys
+
+    Lists are joined with "; " and dicts written as JSON, so every cell
+    stays one value. Keys that aren't columns are left out.
+    """
+
+    def __init__(self, stream, fields=None, header=True, **options):
+        super().__init__(stream, **options)
+        self.fields = list(fields) if fields else None
+        self.header = header
+        self._text = io.StringIO()
+        self._writer = None
+
+    def encode(self, row):
+        if self._writer is None:
+            if self.fields is None:
+                self.fields = list(row)
+            self._writer = csv.DictWriter(self._text, fieldnames=self.fields,
+                                          extrasaction="ignore")
+            if self.header:
+                self._writer.writeheader()
+        self._writer.writerow({key: cell(value) for key, value in row.items()})
+        text = self._text.getvalue()
+        self._text.seek(0)
+        self._text.truncate()
+        return text
+
+
+def cell(value):
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class FileSink:
+    """NDJSON or CSV rows written to a file, optionally rotated by size
+
+    The file is replaced unless append is set. Buffering and fsync options
+    are those of StreamSink.
+    """
+
+    def __init__(self, path, format=None, fields=None, max_bytes=0, backups=5, append=False,
+                 **options):
+        self.path = path
+        self.format = format or format_for(path)
+        if self.format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        self.fields = fields
+        self.max_bytes = int(max_bytes)
+        self.backups = max(1, int(backups))
+        self.options = options
+        self.rotations = 0
+        self._lock = threading.Lock()
+        self._sink = self._open(mode="a" if append else "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def rows(self):
+        return self._sink.rows
+
+    def _open(self, rows=0, mode="a"):
+        stream = open(self.path, mode, encoding="utf-8", newline="")
+        if self.format == CSV:
+            # Appending to an existing CSV: its header is already there
+            sink = CSVStreamSink(stream, self.fields, header=stream.tell() == 0, **self.options)
+        else:
+            sink = StreamSink(stream, **self.options)
+        sink.rows = rows
+        return sink
+
+    def write(self, row):
+        with self._lock:
+            sink = self._sink
+            sink.write(row)
+            if self.max_bytes and not sink.buffer and sink.stream.tell() >= self.max_bytes:
+                self._rotate()
+
+    def flush(self):
+        with self._lock:
+            self._sink.flush()
+            if self.max_bytes and self._sink.stream.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        rows = self._sink.rows
+        fields = self._sink.fields if self.format == CSV else None
+        self._sink.close()
+        self._sink.stream.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.rotations += 1
+        if fields:
+            # Keep the columns the first file settled on
+            self.fields = fields
+        self._sink = self._open(rows)
+
+    def close(self):
+        with self._lock:
+            self._sink.close()
+            self._sink.stream.close()
+
+
+def open_sink(target, format=None, fields=None, **options):
+    """Sink for a path, or for stdout when target is "-" (one row at a time there)
+
+    Options are FileSink's: max_bytes, backups, append, buffer_rows,
+    flush_interval and fsync.
+    """
+    if target == "-":
+        if (format or NDJSON) == CSV:
+            return CSVStreamSink(sys.stdout, fields, buffer_rows=1)
+        return StreamSink(sys.stdout, buffer_rows=1)
+    return FileSink(target, format, fields, **options)
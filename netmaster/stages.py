@@ -0,0 +1,130 @@
+"""Dependency-aware stage scheduler for multi-step scans"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class StageError(Exception):
+    """A stage could not run because a dependency failed"""
+
+
+class Stage:
+    """One unit of work with its declared dependencies"""
+
+    __slots__ = ("name", "func", "deps", "exclusive")
+
+    def __init__(self, name, func, deps=(), exclusive=False):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.exclusive = exclusive
+
+
+class StageScheduler:
+    """Run stages concurrently as soon as their dependencies finish
+
+    Each stage function is called with a dict of its dependencies'
+    results. Exclusive stages (e.g. a bandwidth test) wait until nothing
+    else is running and then run alone. A stage whose dependency failed is
+    skipped with StageError.
+    """
+
+    def __init__(self, max_workers=6):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+        self.started = {}
+        self._stopped = threading.Event()
+
+    def add(self, name, func, deps=(), exclusive=False):
+        """Register a stage; dependencies may be added later but must exist by run()"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, deps, exclusive)
+        return self
+
+    def stop(self):
+        """Don't start any more stages"""
+        self._stopped.set()
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+
+    def _timed(self, stage, inputs):
+        start = time.perf_counter()
+        try:
+            return stage.func(inputs)
+        finally:
+            self.timings[stage.name] = time.perf_counter() - start
+
+    def run(self, on_done=None):
+        """Run every stage; on_done(name, result, error, seconds) fires per stage
+
+        Returns the results dict keyed by stage name.
+        """
+        self._validate()
+        self._stopped.clear()
+        pending = list(self.stages.values())
+        running = {}
+        origin = time.perf_counter()
+
+        def finish(name, result, error):
+            if error is None:
+                self.results[name] = result
+            else:
+                self.errors[name] = error
+            if on_done:
+                on_done(name, result, error, self.timings.get(name, 0.0))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="stage") as pool:
+            while pending or running:
+                exclusive_running = any(self.stages[n].exclusive for n in running.values())
+                progressed = False
+
+                for stage in list(pending):
+                    if self._stopped.is_set() or exclusive_running:
+                        break
+                    failed = [d for d in stage.deps if d in self.errors]
+                    if failed:
+                        pending.remove(stage)
+                        self.timings[stage.name] = 0.0
+                        finish(stage.name, None, StageError(f"dependency {failed[0]} failed"))
+                        progressed = True
+                        continue
+                    if not all(d in self.results for d in stage.deps):
+                        continue
+                    if stage.exclusive:
+                        if running:
+                            # Concurrent work goes first; this runs once it drains
+                            continue
+                        exclusive_running = True
+                    inputs = {d: self.results[d] for d in stage.deps}
+                    pending.remove(stage)
+                    self.started[stage.name] = time.perf_counter() - origin
+                    running[pool.submit(self._timed, stage, inputs)] = stage.name
+                    progressed = True
+
+                if not running:
+                    if self._stopped.is_set():
+                        break
+                    if pending and not progressed:
+                        names = ", ".join(s.name for s in pending)
+                        raise ValueError(f"Dependency cycle between stages: {names}")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, error = None, future.exception()
+                    if error is None:
+                        result = future.result()
+                    finish(name, result, error)
+
+        self.timings["total"] = time.perf_counter() - origin
+        return self.results
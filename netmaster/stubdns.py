@@ -0,0 +1,170 @@
+"""Local stub DNS server for exercising the resolver tools offline
+
+Answers UDP queries on 127.0.0.1 from a synthetic zone, with optional
+per-query delay and packet loss, and logs every query it sees. Names whose
+first label starts with "nx" get NXDOMAIN and "fail" gets SERVFAIL; other
+A/AAAA queries get a stable address derived from the name, and other types
+get an empty (NODATA) answer.
+
+Usage: python -m netmaster.stubdns [--port 5353] [--delay 0.02] [--loss 0.01]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+NXDOMAIN = "NXDOMAIN"
+SERVFAIL = "SERVFAIL"
+
+
+def synthetic_answer(name, rdtype):
+    """Default zone: rdata texts for (name, type), or NXDOMAIN/SERVFAIL"""
+    label = name.split(".", 1)[0].lower()
+    if label.startswith("nx"):
+        return NXDOMAIN
+    if label.startswith("fail"):
+        return SERVFAIL
+    h = zlib.crc32(name.lower().encode())
+    if rdtype == "A":
+        return [f"10.{h >> 16 & 255}.{h >> 8 & 255}.{h & 255}"]
+    if rdtype == "AAAA":
+        return [f"fd00::{h >> 16:x}:{h & 0xffff:x}"]
+    return []
+
+
+class _Protocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.server._handle(self.transport, data, addr)
+
+
+class StubDNSServer:
+    """UDP DNS server on its own thread and event loop
+
+    answer(name, type) returns a list of rdata texts, NXDOMAIN or SERVFAIL.
+    delay is seconds before each reply, or delay(name, type) returning
+    seconds, and loss is the fraction of queries silently dropped.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, answer=synthetic_answer, delay=0.0, loss=0.0,
+                 ttl=300, log_size=100000):
+        self.host = host
+        self.port = port
+        self.answer = answer
+        self.delay = delay
+        self.loss = loss
+        self.ttl = ttl
+        self.queries = deque(maxlen=log_size)   # (time, client, name, type)
+        self.received = 0
+        self.dropped = 0
+        self._loop = None
+        self._transport = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def start(self):
+        """Bind and serve in a daemon thread; returns self"""
+        self._thread = threading.Thread(target=self._run, name="stub-dns", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._transport, _ = self._loop.run_until_complete(self._loop.create_datagram_endpoint(
+            lambda: _Protocol(self), local_addr=(self.host, self.port)))
+        self.port = self._transport.get_extra_info("sockname")[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._transport.close()
+            self._loop.close()
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, transport, data, addr):
+        import dns.message
+        import dns.rcode
+        import dns.rdatatype
+        import dns.rrset
+
+        try:
+            query = dns.message.from_wire(data)
+            question = query.question[0]
+        except Exception:
+            return
+        name = question.name.to_text(omit_final_dot=True)
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        self.received += 1
+        self.queries.append((time.time(), addr, name, rdtype))
+        if self.loss and random.random() < self.loss:
+            self.dropped += 1
+            return
+
+        response = dns.message.make_response(query)
+        result = self.answer(name, rdtype)
+        if result == NXDOMAIN:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif result == SERVFAIL:
+            response.set_rcode(dns.rcode.SERVFAIL)
+        elif result:
+            response.answer.append(dns.rrset.from_text_list(
+                question.name, self.ttl, question.rdclass, question.rdtype, result))
+        wire = response.to_wire()
+
+        delay = self.delay(name, rdtype) if callable(self.delay) else self.delay
+        if delay > 0:
+            self._loop.call_later(delay, transport.sendto, wire, addr)
+        else:
+            transport.sendto(wire, addr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m netmaster.stubdns",
+                                     description="Serve a synthetic DNS zone for testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5353)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each reply")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of queries dropped")
+    args = parser.parse_args(argv)
+
+    server = StubDNSServer(args.host, args.port, delay=args.delay, loss=args.loss).start()
+    print(f"Serving on {server.host}:{server.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"{server.received} queries, {server.dropped} dropped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
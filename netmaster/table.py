@@ -0,0 +1,191 @@
+"""Keyed row store behind the virtual result tables
+
+Rows live in a dict keyed by a stable id (IP, host/port, property name).
+apply() diffs a fresh result set against the stored rows so only rows that
+changed are re-indexed, and a sorted, filtered index of keys is kept with
+bisect. The widget asks for one window of that index at a time, so sorting
+or filtering 65k rows never rebuilds more than the visible slice.
+"""
+import bisect
+import itertools
+import socket
+
+_NUMERIC_START = frozenset("0123456789abcdefABCDEF:+-.")
+
+# Past this many changes in one batch a full sort beats repeated insort
+_REBUILD_FRACTION = 8
+
+
+def sort_key(value):
+    """Order IP addresses numerically, then numbers, then text ignoring case"""
+    text = str(value)
+    # Cheap checks first; failed parses raise, which costs more than the parse
+    if text[:1] in _NUMERIC_START:
+        if "." in text or ":" in text:
+            version, family = (6, socket.AF_INET6) if ":" in text else (4, socket.AF_INET)
+            try:
+                return (0, version, int.from_bytes(socket.inet_pton(family, text), "big"), "")
+            except (OSError, ValueError):
+                pass
+        try:
+            number = float(text)
+            if number == number:  # NaN has no place in a sorted index
+                return (1, 0, number, "")
+        except ValueError:
+            pass
+    return (2, 0, 0, text.lower())
+
+
+class TableModel:
+    """Rows keyed by id, with a sorted and filtered view for display
+
+    With a limit only the newest `limit` rows are kept, the tail of a
+    stream whose full results go to a sink; `dropped` counts the rest.
+    """
+
+    def __init__(self, columns, limit=None):
+        self.columns = list(columns)
+        self.limit = limit
+        self.dropped = 0
+        self.rows = {}
+        self.sort_column = None
+        self.reverse = False
+        self.filter_text = ""
+        self.version = 0
+        self._seq = {}
+        self._counter = itertools.count()
+        self._view = []      # sorted (sortkey, seq, key) for rows passing the filter
+        self._entries = {}   # key -> its entry in _view
+        self._sort_keys = {}  # key -> sort_key of its sort_column value
+
+    def __len__(self):
+        return len(self._view)
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    def _matches(self, values):
+        if not self.filter_text:
+            return True
+        return any(self.filter_text in str(value).lower() for value in values)
+
+    def _entry(self, key, values):
+        if self.sort_column is None:
+            return ((), self._seq[key], key)
+        cached = self._sort_keys.get(key)
+        if cached is None:
+            cached = self._sort_keys[key] = sort_key(values[self.sort_column])
+        return (cached, self._seq[key], key)
+
+    def _unindex(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            del self._view[bisect.bisect_left(self._view, entry)]
+
+    def _index(self, key):
+        values = self.rows[key]
+        if self._matches(values):
+            entry = self._entry(key, values)
+            bisect.insort(self._view, entry)
+            self._entries[key] = entry
+
+    def _rebuild(self):
+        self._entries = {key: self._entry(key, values) for key, values in self.rows.items()
+                         if self._matches(values)}
+        self._view = sorted(self._entries.values())
+
+    def _reindex(self, keys):
+        if len(keys) > max(64, len(self.rows) // _REBUILD_FRACTION):
+            self._rebuild()
+        else:
+            for key in keys:
+                self._unindex(key)
+                if key in self.rows:
+                    self._index(key)
+        if keys:
+            self.version += 1
+
+    def update(self, rows):
+        """Insert or update rows ({key: values}); returns (inserted, updated)"""
+        changed = []
+        inserted = 0
+        for key, values in rows.items():
+            values = tuple(values)
+            old = self.rows.get(key)
+            if old == values:
+                continue
+            if old is None:
+                self._seq[key] = next(self._counter)
+                inserted += 1
+            self.rows[key] = values
+            self._sort_keys.pop(key, None)
+            changed.append(key)
+        updated = len(changed) - inserted
+        if self.limit and len(self.rows) > self.limit:
+            # Dicts keep arrival order, so the oldest rows come first
+            for key in list(itertools.islice(self.rows, len(self.rows) - self.limit)):
+                del self.rows[key]
+                del self._seq[key]
+                self._sort_keys.pop(key, None)
+                changed.append(key)
+                self.dropped += 1
+        self._reindex(changed)
+        return inserted, updated
+
+    def delete(self, keys):
+        """Remove rows by key; returns how many existed"""
+        removed = [key for key in keys if key in self.rows]
+        for key in removed:
+            del self.rows[key]
+            del self._seq[key]
+            self._sort_keys.pop(key, None)
+        self._reindex(removed)
+        return len(removed)
+
+    def apply(self, rows):
+        """Make the table hold exactly `rows`, touching only what changed
+
+        Returns (inserted, updated, deleted) counts.
+        """
+        rows = dict(rows)
+        deleted = self.delete([key for key in self.rows if key not in rows])
+        inserted, updated = self.update(rows)
+        return inserted, updated, deleted
+
+    def clear(self):
+        self.apply({})
+        self.dropped = 0
+
+    def set_sort(self, column, reverse=False):
+        """Sort by column index (None keeps arrival order)"""
+        self.reverse = reverse
+        if column != self.sort_column:
+            self.sort_column = column
+            self._sort_keys = {}
+            self._rebuild()
+        self.version += 1
+
+    def set_filter(self, text):
+        """Show only rows with a value containing text (case-insensitive)"""
+        text = text.strip().lower()
+        if text == self.filter_text:
+            return
+        narrower = self.filter_text in text
+        self.filter_text = text
+        if narrower:
+            # A longer filter can only drop rows from the current view
+            self._view = [entry for entry in self._view if self._matches(self.rows[entry[-1]])]
+            self._entries = {entry[-1]: entry for entry in self._view}
+        else:
+            self._rebuild()
+        self.version += 1
+
+    def window(self, first, count):
+        """Return [(key, values)] for `count` view rows starting at `first`"""
+        if self.reverse:
+            stop = len(self._view) - first
+            entries = self._view[max(0, stop - count):max(0, stop)][::-1]
+        else:
+            entries = self._view[first:first + count]
+        return [(entry[-1], self.rows[entry[-1]]) for entry in entries]
@@ -0,0 +1,337 @@
+"""Self-hosted multi-stream TCP throughput test (iperf-like client and server)
+
+The client opens N parallel TCP streams to a ThroughputServer, on this or
+another machine, and pushes data for a fixed time (upload) or has the
+server push it back (download / reverse). Senders hand the kernel one
+preallocated block, either from a temporary file with socket.sendfile (zero
+copy where the OS supports it) or straight from a memoryview; receivers
+recv_into one preallocated buffer, so nothing is allocated per block. Byte
+counters are sampled every interval for live per-stream throughput, and an
+upload is credited with what the server actually received, not with what
+was queued in the local socket buffers.
+
+Each stream starts with one JSON line:
+{"test": id, "direction": "upload"|"download", "duration": s, "block": bytes}
+and after an upload the server answers with {"received": bytes}.
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_PORT = 5201
+DEFAULT_BLOCK = 128 * 1024
+MAX_BLOCK = 16 * 1024 * 1024
+# socket.sendfile has per-call setup cost, so the file holds at least this much
+SENDFILE_SPAN = 1024 * 1024
+UPLOAD = "upload"
+DOWNLOAD = "download"
+
+
+class Payload:
+    """One random block to send, in memory and (for sendfile) in a temp file"""
+
+    def __init__(self, size=DEFAULT_BLOCK, zerocopy=True):
+        self.size = max(1, min(int(size), MAX_BLOCK))
+        data = os.urandom(self.size)
+        self.view = memoryview(data)
+        self.file = None
+        self.span = self.size
+        if zerocopy and hasattr(os, "sendfile"):
+            self.file = tempfile.TemporaryFile()
+            for _ in range(max(1, SENDFILE_SPAN // self.size)):
+                self.file.write(data)
+            self.file.flush()
+            self.span = self.file.tell()
+
+    def send(self, sock):
+        """Send the block (the whole file for sendfile) once; returns bytes sent"""
+        if self.file is not None:
+            return sock.sendfile(self.file, 0, self.span)
+        sock.sendall(self.view)
+        return self.size
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_line(sock, limit=4096):
+    """Read one newline-terminated header without reading past it"""
+    data = bytearray()
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > limit:
+            raise ValueError("header too long")
+    return json.loads(data) if data else None
+
+
+def drain(sock, buffer, counter=None):
+    """Receive into one preallocated buffer until EOF; returns the byte count"""
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        count = sock.recv_into(view)
+        if not count:
+            return total
+        total += count
+        if counter is not None:
+            counter[0] = total
+
+
+def pump(sock, payload, deadline, counter, stopped=lambda: False):
+    """Send blocks until the deadline; counter[0] tracks the bytes handed over"""
+    while time.monotonic() < deadline and not stopped():
+        counter[0] += payload.send(sock)
+    return counter[0]
+
+
+class ThroughputServer:
+    """Accept test streams and sink or source data for each in its own thread"""
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, zerocopy=True):
+        self.host = host
+        self.port = port
+        self.zerocopy = zerocopy
+        self.streams = 0
+        self.received = 0
+        self.sent = 0
+        self._sock = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._payloads = {}
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        """Listen and serve in a daemon thread; returns self"""
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(128)
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept, name="throughput-server",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        for payload in self._payloads.values():
+            payload.close()
+        self._payloads = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        """Block until interrupted"""
+        if self._sock is None:
+            self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def _accept(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _payload(self, size):
+        # One shared block per size; sendfile reads it at offset 0 concurrently
+        with self._lock:
+            payload = self._payloads.get(size)
+            if payload is None:
+                payload = self._payloads[size] = Payload(size, self.zerocopy)
+            return payload
+
+    def _serve(self, conn):
+        with conn:
+            try:
+                conn.settimeout(30)
+                header = read_line(conn)
+                if not header:
+                    return
+                with self._lock:
+                    self.streams += 1
+                block = max(1, min(int(header.get("block", DEFAULT_BLOCK)), MAX_BLOCK))
+                if header.get("direction") == DOWNLOAD:
+                    counter = [0]
+                    deadline = time.monotonic() + min(float(header.get("duration", 10)), 3600)
+                    pump(conn, self._payload(block), deadline, counter)
+                    conn.shutdown(socket.SHUT_WR)
+                    with self._lock:
+                        self.sent += counter[0]
+                else:
+                    total = drain(conn, bytearray(block))
+                    conn.sendall(json.dumps({"received": total}).encode() + b"\n")
+                    with self._lock:
+                        self.received += total
+            except (OSError, ValueError):
+                pass
+
+
+class ThroughputTest:
+    """Measure TCP throughput to a ThroughputServer over `streams` parallel streams
+
+    progress(row) is called every `interval` seconds with the bytes moved
+    in that interval, per stream and in total.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, streams=4, duration=10.0, block=DEFAULT_BLOCK,
+                 reverse=False, zerocopy=True, interval=1.0, timeout=5.0):
+        self.host = host
+        self.port = int(port)
+        self.streams = max(1, min(int(streams), 128))
+        self.duration = max(0.1, float(duration))
+        self.block = max(1, min(int(block), MAX_BLOCK))
+        self.direction = DOWNLOAD if reverse else UPLOAD
+        self.zerocopy = zerocopy
+        self.interval = max(0.05, float(interval))
+        self.timeout = float(timeout)
+        self._stopped = False
+
+    def stop(self):
+        """Ask a running test to finish early"""
+        self._stopped = True
+
+    def _connect(self, test_id):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        header = {"test": test_id, "direction": self.direction, "duration": self.duration,
+                  "block": self.block}
+        sock.sendall(json.dumps(header).encode() + b"\n")
+        # Long enough for the slowest stream to finish its last block
+        sock.settimeout(self.duration + self.timeout)
+        return sock
+
+    def _stream(self, sock, payload, deadline, counter, result):
+        try:
+            if self.direction == UPLOAD:
+                pump(sock, payload, deadline, counter, lambda: self._stopped)
+                sock.shutdown(socket.SHUT_WR)
+                reply = read_line(sock)
+                result["received"] = reply.get("received") if reply else None
+            else:
+                drain(sock, bytearray(self.block), counter)
+        except (OSError, ValueError) as e:
+            result["error"] = str(e)
+        finally:
+            sock.close()
+
+    def run(self, progress=None):
+        """Run the test and return the summary"""
+        self._stopped = False
+        test_id = uuid.uuid4().hex[:12]
+        sockets = [self._connect(test_id) for _ in range(self.streams)]
+        payload = Payload(self.block, self.zerocopy) if self.direction == UPLOAD else None
+        counters = [[0] for _ in sockets]
+        results = [{} for _ in sockets]
+        intervals = []
+        start = time.monotonic()
+        deadline = start + self.duration
+        threads = [threading.Thread(target=self._stream, daemon=True,
+                                    args=(sock, payload, deadline, counter, result))
+                   for sock, counter, result in zip(sockets, counters, results)]
+        try:
+            for thread in threads:
+                thread.start()
+            previous = before = [0] * len(counters)
+            last = opened = start
+            while any(thread.is_alive() for thread in threads):
+                # Fixed schedule so the interval edges don't drift
+                wake = start + (len(intervals) + 1) * self.interval
+                for thread in threads:
+                    thread.join(max(0.0, wake - time.monotonic()))
+                now = time.monotonic()
+                if self._stopped and self.direction == DOWNLOAD:
+                    # The server only stops at its deadline; hang up on it
+                    for sock in sockets:
+                        try:
+                            sock.shutdown(socket.SHUT_RDWR)
+                        except OSError:
+                            pass
+                if now < wake and any(thread.is_alive() for thread in threads):
+                    continue
+                current = [counter[0] for counter in counters]
+                if intervals and now < wake and now - last < self.interval / 10:
+                    # The last few milliseconds after the streams end would show as a
+                    # spike; fold them into the previous interval instead
+                    previous, last = before, opened
+                    intervals[-1] = self._interval(last - start, now - start, previous, current)
+                    break
+                row = self._interval(last - start, now - start, previous, current)
+                intervals.append(row)
+                if progress:
+                    progress(row)
+                before, previous, opened, last = previous, current, last, now
+        finally:
+            if payload is not None:
+                payload.close()
+        return self._summary(counters, results, intervals, time.monotonic() - start)
+
+    def _interval(self, begin, end, previous, current):
+        seconds = max(end - begin, 1e-9)
+        streams = [(now - before) * 8 / seconds / 1e6 for before, now in zip(previous, current)]
+        return {
+            "start": round(begin, 3),
+            "end": round(end, 3),
+            "bytes": sum(current) - sum(previous),
+            "mbps": round(sum(streams), 2),
+            "streams": [round(mbps, 2) for mbps in streams],
+        }
+
+    def _summary(self, counters, results, intervals, seconds):
+        sent = sum(counter[0] for counter in counters)
+        errors = [result["error"] for result in results if "error" in result]
+        if self.direction == UPLOAD:
+            confirmed = [result.get("received") for result in results]
+            moved = sum(count or 0 for count in confirmed)
+        else:
+            moved = sent
+        seconds = max(seconds, 1e-9)
+        return {
+            "host": self.host,
+            "port": self.port,
+            "direction": self.direction,
+            "streams": self.streams,
+            "block": self.block,
+            "zerocopy": bool(self.zerocopy and hasattr(os, "sendfile")),
+            "seconds": round(seconds, 3),
+            "bytes": moved,
+            "mbps": round(moved * 8 / seconds / 1e6, 2),
+            "per_stream": [counter[0] for counter in counters],
+            "intervals": intervals,
+            "stopped": self._stopped,
+            "errors": errors,
+        }
+
+
+def format_interval(row):
+    """Human readable one-line interval report"""
+    return (f"{row['start']:6.1f}-{row['end']:5.1f}s  {row['mbps']:10.1f} Mbps  "
+            f"({', '.join(f'{mbps:.0f}' for mbps in row['streams'])})")
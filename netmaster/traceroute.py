@@ -0,0 +1,371 @@
+"""MTR-style path tracer: every TTL of every target probed in parallel
+
+Each round sends one UDP probe per TTL to every target at once, instead of
+waiting hop by hop, out of a single unprivileged UDP socket per address
+family. The ICMP errors the hops send back (time exceeded from routers,
+port unreachable from the target) are read from the socket's error queue
+(Linux IP_RECVERR), which carries the sending hop's address and the
+original payload, so no raw socket or root is needed. A probe is matched
+by the id in its payload or, when a router quotes only the first 8 bytes
+of the UDP packet, by its destination port, which encodes the TTL. Once
+the target has answered, later rounds only probe up to its distance. Per
+hop the usual rolling latency, jitter and loss statistics are kept, and
+hop addresses are resolved to names in the background without holding up
+the probes.
+"""
+import asyncio
+import errno
+import itertools
+import socket
+import struct
+import sys
+import threading
+import time
+
+from netmaster.latency import TargetStats
+
+# Not exported by the socket module before Python 3.12 (Linux values)
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+IPV6_RECVERR = getattr(socket, "IPV6_RECVERR", 25)
+MSG_ERRQUEUE = getattr(socket, "MSG_ERRQUEUE", 0x2000)
+
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+# (time exceeded, destination unreachable) ICMP types per family
+ICMP_TYPES = {socket.AF_INET: (11, 3), socket.AF_INET6: (3, 1)}
+EXTENDED_ERR = struct.Struct("=IBBBBII")
+
+BASE_PORT = 33434
+PAYLOAD = b"netmaster-trace"
+
+# Errors the kernel reports for an earlier probe on the next send; not ours
+REPORTED = {errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EPROTO}
+
+# The ICMP error queue is Linux only; elsewhere the tracer can't run
+SUPPORTED = sys.platform.startswith("linux")
+UNSUPPORTED = "The path tracer needs Linux (IP_RECVERR)"
+
+
+def trace_socket(family):
+    """Non-blocking UDP socket that queues incoming ICMP errors"""
+    if not SUPPORTED:
+        raise RuntimeError(UNSUPPORTED)
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.SOL_IP, IP_RECVERR, 1)
+    else:
+        sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+    sock.setblocking(False)
+    return sock
+
+
+def parse_error(family, ancdata):
+    """(icmp type, icmp code, offender address) from error-queue ancillary data"""
+    for level, kind, data in ancdata:
+        if len(data) < EXTENDED_ERR.size:
+            continue
+        _, origin, icmp_type, code, _, _, _ = EXTENDED_ERR.unpack_from(data)
+        if origin not in (SO_EE_ORIGIN_ICMP, SO_EE_ORIGIN_ICMP6):
+            continue
+        offender = data[EXTENDED_ERR.size:]
+        if family == socket.AF_INET and len(offender) >= 8:
+            address = socket.inet_ntop(socket.AF_INET, offender[4:8])
+        elif family == socket.AF_INET6 and len(offender) >= 24:
+            address = socket.inet_ntop(socket.AF_INET6, offender[8:24])
+        else:
+            continue
+        return icmp_type, code, address
+    return None
+
+
+class Hop:
+    """Statistics for one TTL of one path; may answer from several addresses"""
+
+    def __init__(self, ttl, window):
+        self.ttl = ttl
+        self.stats = TargetStats(ttl, None, window)
+        self.addresses = {}
+
+    def add(self, rtt, address):
+        self.stats.sent += 1
+        self.stats.add(time.time(), rtt)
+        if address:
+            self.addresses[address] = self.addresses.get(address, 0) + 1
+
+    @property
+    def address(self):
+        """The address that answered most often"""
+        if not self.addresses:
+            return None
+        return max(self.addresses, key=self.addresses.get)
+
+
+class Path:
+    """Hops towards one target"""
+
+    def __init__(self, target, family, address, max_hops, window):
+        self.target = target
+        self.family = family
+        self.address = address
+        self.hops = [Hop(ttl, window) for ttl in range(1, max_hops + 1)]
+        self.distance = None
+
+    def limit(self):
+        """Highest TTL worth probing this round"""
+        return self.distance or len(self.hops)
+
+    def record(self, ttl, rtt, address, reached):
+        if reached:
+            if self.distance is None or ttl < self.distance:
+                self.distance = ttl
+            elif ttl > self.distance:
+                # Extra probes past the target just echo it again
+                return
+        elif self.distance is not None and ttl >= self.distance and address:
+            # A router now sits where the target was: the path got longer
+            self.distance = None
+        self.hops[ttl - 1].add(rtt, address)
+
+
+class PathTracer:
+    """Trace many targets continuously until stop() (or `rounds`)
+
+    Results are read with summary() from any thread while the tracer runs;
+    `names` maps hop addresses to reverse DNS names as they resolve.
+    """
+
+    def __init__(self, targets, max_hops=30, interval=1.0, timeout=2.0, window=100,
+                 resolve_names=True, port=BASE_PORT):
+        self.targets = list(targets)
+        self.max_hops = max(1, min(int(max_hops), 64))
+        self.interval = max(0.05, float(interval))
+        self.timeout = float(timeout)
+        self.window = int(window)
+        self.resolve_names = resolve_names
+        self.port = int(port)
+        self.paths = {}
+        self.errors = {}
+        self.names = {}
+        self.rounds = 0
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+        self._sockets = {}
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lookups = set()
+
+    def stop(self):
+        """Ask the tracer to finish after the in-flight probes"""
+        self._stopped = True
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Trace in a daemon thread until stop()"""
+        if not self.running:
+            self._thread = threading.Thread(target=self.run, name="traceroute", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self, rounds=None):
+        """Blocking wrapper around run_async for worker threads and the CLI"""
+        return asyncio.run(self.run_async(rounds))
+
+    async def _resolve(self, loop):
+        lookups = await asyncio.gather(*(loop.getaddrinfo(target, None, type=socket.SOCK_DGRAM)
+                                         for target in self.targets), return_exceptions=True)
+        for target, info in zip(self.targets, lookups):
+            if isinstance(info, Exception):
+                self.errors[target] = str(info)
+                continue
+            family, address = info[0][0], info[0][4][0]
+            with self._lock:
+                self.paths[target] = Path(target, family, address, self.max_hops, self.window)
+
+    async def run_async(self, rounds=None):
+        """Probe until stopped or `rounds` rounds are done; returns summary()"""
+        self._stopped = False
+        self.rounds = 0
+        loop = asyncio.get_running_loop()
+        await self._resolve(loop)
+        if not self.paths:
+            raise RuntimeError("None of the targets could be resolved")
+        probes = set()
+        try:
+            for family in {path.family for path in self.paths.values()}:
+                sock = self._sockets[family] = trace_socket(family)
+                loop.add_reader(sock, self._on_error, family)
+            paths = list(self.paths.values())
+            spacing = self.interval / len(paths)
+            start = loop.time()
+            while not self._stopped and (rounds is None or self.rounds < rounds):
+                for i, path in enumerate(paths):
+                    # Fixed schedule so slow rounds don't make the rate drift
+                    delay = start + self.rounds * self.interval + i * spacing - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if self._stopped:
+                        break
+                    for ttl in range(1, path.limit() + 1):
+                        probe = asyncio.ensure_future(self._probe(path, ttl))
+                        probes.add(probe)
+                        probe.add_done_callback(probes.discard)
+                self.rounds += 1
+            if probes:
+                await asyncio.gather(*probes)
+            if self._lookups:
+                await asyncio.wait(self._lookups, timeout=self.timeout)
+        finally:
+            for sock in self._sockets.values():
+                loop.remove_reader(sock)
+                sock.close()
+            self._sockets = {}
+        return self.summary()
+
+    def _send(self, path, ttl, payload):
+        sock = self._sockets[path.family]
+        if path.family == socket.AF_INET:
+            sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
+        else:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, ttl)
+        for attempt in range(3):
+            try:
+                sock.sendto(payload, (path.address, self.port + ttl - 1))
+                return
+            except OSError as e:
+                # An ICMP error for an earlier probe surfaced here; send again
+                if e.errno not in REPORTED:
+                    raise
+        raise OSError("probe could not be sent")
+
+    async def _probe(self, path, ttl):
+        probe_id = next(self._ids) & 0xFFFFFFFF
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending[probe_id] = (path, ttl, waiter)
+        rtt, address, reached = None, None, False
+        try:
+            start = time.perf_counter()
+            self._send(path, ttl, struct.pack("!I", probe_id) + PAYLOAD)
+            received, address, reached = await asyncio.wait_for(waiter, self.timeout)
+            rtt = (received - start) * 1000
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            self._pending.pop(probe_id, None)
+        with self._lock:
+            path.record(ttl, rtt, address, reached)
+        if address and self.resolve_names and address not in self.names:
+            self.names[address] = None
+            lookup = asyncio.ensure_future(self._reverse(address))
+            self._lookups.add(lookup)
+            lookup.add_done_callback(self._lookups.discard)
+
+    def _on_error(self, family):
+        now = time.perf_counter()
+        sock = self._sockets[family]
+        time_exceeded, unreachable = ICMP_TYPES[family]
+        while True:
+            try:
+                data, ancdata, _, destination = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            error = parse_error(family, ancdata)
+            if error is None:
+                continue
+            icmp_type, code, address = error
+            if icmp_type not in (time_exceeded, unreachable):
+                continue
+            if len(data) >= 4:
+                pending = self._pending.get(struct.unpack_from("!I", data)[0])
+            else:
+                pending = self._oldest(destination)
+            if pending is None or pending[2].done():
+                continue
+            path, _, waiter = pending
+            # Unreachable from the target itself means it answered; from a
+            # router it means the router gave up on the path
+            waiter.set_result((now, address, icmp_type == unreachable and address == path.address))
+
+    def _oldest(self, destination):
+        """The oldest unanswered probe sent to this (address, port)"""
+        host, port = destination[:2]
+        ttl = port - self.port + 1
+        for pending in self._pending.values():
+            path, probe_ttl, waiter = pending
+            if probe_ttl == ttl and path.address == host and not waiter.done():
+                return pending
+        return None
+
+    async def _reverse(self, address):
+        """Reverse DNS in the background; unresolvable addresses keep None"""
+        loop = asyncio.get_running_loop()
+        try:
+            host, _ = await asyncio.wait_for(
+                loop.getnameinfo((address, 0), socket.NI_NAMEREQD), self.timeout)
+            self.names[address] = host
+        except Exception:
+            pass
+
+    def summary(self):
+        """[{target, address, reached, distance, hops: [...]}] plus unresolvable targets"""
+        rows = []
+        with self._lock:
+            for path in self.paths.values():
+                hops = path.hops[:path.distance] if path.distance else self._trim(path.hops)
+                rows.append({
+                    "target": path.target,
+                    "address": path.address,
+                    "reached": path.distance is not None,
+                    "distance": path.distance,
+                    "hops": [self._hop_row(hop) for hop in hops],
+                })
+        rows.extend({"target": target, "error": error} for target, error in self.errors.items())
+        return rows
+
+    @staticmethod
+    def _trim(hops):
+        """Hops up to one past the last that ever answered"""
+        answered = [hop.ttl for hop in hops if hop.addresses]
+        return hops[:min(len(hops), (answered[-1] if answered else 0) + 1)]
+
+    def _hop_row(self, hop):
+        stats = hop.stats.summary()
+        address = hop.address
+        return {
+            "ttl": hop.ttl,
+            "address": address,
+            "name": self.names.get(address) if address else None,
+            "others": sorted(set(hop.addresses) - {address}),
+            "sent": stats["sent"],
+            "loss": stats["loss"],
+            "last": stats["last"],
+            "min": stats["min"],
+            "mean": stats["mean"],
+            "p95": stats["p95"],
+            "max": stats["max"],
+            "jitter": stats["jitter"],
+        }
+
+
+def format_path(row):
+    """Human readable mtr-like report of one target"""
+    if "error" in row:
+        return f"{row['target']}: {row['error']}\n"
+
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+    state = f"{row['distance']} hops" if row["reached"] else "not reached"
+    lines = [f"{row['target']} ({row['address']}), {state}"]
+    for hop in row["hops"]:
+        host = hop["name"] or hop["address"] or "???"
+        if hop["name"] and hop["address"]:
+            host = f"{hop['name']} ({hop['address']})"
+        lines.append(f"{hop['ttl']:3}. {host:40} loss {hop['loss']:6.1%}  last {ms(hop['last']):>6}  "
+                     f"avg {ms(hop['mean']):>6}  best {ms(hop['min']):>6}  "
+                     f"worst {ms(hop['max']):>6}  jitter {ms(hop['jitter']):>5}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,208 @@
+"""Live per-interface traffic rates sampled into fixed-size ring buffers
+
+A background thread reads the interface byte counters every `interval`
+seconds and stores rx/tx rates (bytes/s) in preallocated arrays, so a
+monitor left running for hours keeps the same memory footprint.
+"""
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def psutil_counters():
+    """Byte counters per interface: {nic: (bytes_recv, bytes_sent)}"""
+    import psutil
+
+    return {nic: (c.bytes_recv, c.bytes_sent)
+            for nic, c in psutil.net_io_counters(pernic=True).items()}
+
+
+def is_loopback(nic):
+    """lo on Linux, lo0 on macOS, "Loopback Pseudo-Interface 1" on Windows"""
+    return nic.startswith("lo") or "loopback" in nic.lower()
+
+
+def format_rate(rate):
+    """Human readable bytes/s"""
+    for unit in ("B/s", "kB/s", "MB/s", "GB/s"):
+        if rate < 1000 or unit == "GB/s":
+            return f"{rate:.0f} {unit}" if unit == "B/s" else f"{rate:.1f} {unit}"
+        rate /= 1000.0
+
+
+class RingBuffer:
+    """Fixed-capacity float buffer of `columns` values per row"""
+
+    def __init__(self, capacity, columns=1):
+        if numpy is None:
+            raise RuntimeError("numpy is required for the traffic monitor")
+        self.capacity = capacity
+        self.data = numpy.zeros((capacity, columns))
+        self.count = 0
+        self.head = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def grow_columns(self, columns):
+        """Widen every row (new columns start at zero)"""
+        extra = columns - self.data.shape[1]
+        if extra > 0:
+            self.data = numpy.hstack([self.data, numpy.zeros((self.capacity, extra))])
+
+    def ordered(self, out=None):
+        """Rows oldest to newest, copied into `out` when given (no allocation)"""
+        if out is None:
+            out = numpy.empty((self.count, self.data.shape[1]))
+        if self.count < self.capacity:
+            out[:] = self.data[:self.count]
+        else:
+            tail = self.capacity - self.head
+            out[:tail] = self.data[self.head:]
+            out[tail:] = self.data[:self.head]
+        return out
+
+    def latest(self):
+        return self.data[(self.head - 1) % self.capacity]
+
+
+class TrafficMonitor:
+    """Sample interface counters and keep a rolling window of rates
+
+    Rates are stored per interface as rx, tx column pairs; the window holds
+    the last `window` samples (60 s at the default 10 Hz).
+    """
+
+    def __init__(self, interval=0.1, window=600, counters=None):
+        self.interval = interval
+        self.window = window
+        self.counters = counters or psutil_counters
+        self.interfaces = []
+        self._index = {}
+        self._external = []
+        self._last = None
+        self._last_time = None
+        self._times = RingBuffer(window, 1)
+        self._rates = RingBuffer(window, 0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.samples = 0
+
+    def _column(self, nic):
+        index = self._index.get(nic)
+        if index is None:
+            index = self._index[nic] = len(self.interfaces)
+            self.interfaces.append(nic)
+            if not is_loopback(nic):
+                self._external.append(index)
+            self._rates.grow_columns(2 * len(self.interfaces))
+        return index
+
+    def sample(self, now=None):
+        """Read the counters once and record rates since the previous read"""
+        counters = self.counters()
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._last is not None and now > self._last_time:
+                elapsed = now - self._last_time
+                for nic in counters:
+                    self._column(nic)
+                row = numpy.zeros(2 * len(self.interfaces))
+                for nic, (rx, tx) in counters.items():
+                    previous = self._last.get(nic)
+                    if previous is None:
+                        continue
+                    i = 2 * self._index[nic]
+                    # Counters reset when an interface goes down; skip the negative delta
+                    row[i] = max(rx - previous[0], 0) / elapsed
+                    row[i + 1] = max(tx - previous[1], 0) / elapsed
+                self._times.append(now)
+                self._rates.append(row)
+                self.samples += 1
+            self._last = counters
+            self._last_time = now
+
+    def _run(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            # Fixed schedule so slow reads don't make the sampling rate drift
+            deadline += self.interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        """Sample in a daemon thread until stop()"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="traffic", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def series(self, nic=None, out=None):
+        """(seconds ago, rx, tx) arrays for one interface, or summed over all
+        non-loopback interfaces
+
+        `out` may be a (window, 3) array reused between calls.
+        """
+        with self._lock:
+            count = len(self._times)
+            if out is None:
+                out = numpy.empty((count, 3))
+            view = out[:count]
+            if count:
+                self._times.ordered(view[:, 0:1])
+                view[:, 0] -= self._times.latest()[0]
+                rates = self._rates.data
+                if nic is None:
+                    columns = numpy.array(self._external, dtype=int) * 2
+                    rx = rates[:, columns].sum(axis=1)
+                    tx = rates[:, columns + 1].sum(axis=1)
+                else:
+                    i = 2 * self._index[nic] if nic in self._index else None
+                    rx = rates[:, i] if i is not None else numpy.zeros(self.window)
+                    tx = rates[:, i + 1] if i is not None else numpy.zeros(self.window)
+                self._fill(view[:, 1], rx)
+                self._fill(view[:, 2], tx)
+        return view[:, 0], view[:, 1], view[:, 2]
+
+    def _fill(self, target, column):
+        head, count = self._rates.head, len(self._rates)
+        if count < self.window:
+            target[:] = column[:count]
+        else:
+            tail = self.window - head
+            target[:tail] = column[head:]
+            target[tail:] = column[:head]
+
+    def current(self):
+        """Latest {nic: (rx, tx)} rates in bytes/s"""
+        with self._lock:
+            if not len(self._rates):
+                return {}
+            row = self._rates.latest()
+            return {nic: (float(row[2 * i]), float(row[2 * i + 1]))
+                    for i, nic in enumerate(self.interfaces)}
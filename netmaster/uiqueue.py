@@ -0,0 +1,81 @@
+"""Thread-safe queue of UI updates, drained in batches on the UI thread
+
+Worker threads never touch widgets: they post callables here and the UI
+thread runs them from a periodic drain with a per-frame time budget.
+Updates posted under the same key coalesce (only the latest runs), and
+append() gathers items for one callback, so thousands of results become a
+single widget update per frame.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+_BATCH = object()
+
+
+class UpdateQueue:
+    """Ordered, coalescing queue of pending UI callbacks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._ids = itertools.count()
+        self.posted = 0
+        self.coalesced = 0
+        self.ran = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def post(self, func, *args, key=None):
+        """Run func(*args) on the UI thread
+
+        A pending update with the same key is dropped in favour of this one.
+        """
+        with self._lock:
+            self.posted += 1
+            if key is None:
+                key = (_BATCH, next(self._ids))
+            elif self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            self._pending[key] = (func, args)
+
+    def append(self, key, func, item):
+        """Collect item for one func(items) call at the next drain"""
+        with self._lock:
+            self.posted += 1
+            entry = self._pending.get(key)
+            if entry is not None and entry[0] is _BATCH:
+                entry[1][1].append(item)
+                self.coalesced += 1
+            else:
+                self._pending[key] = (_BATCH, (func, [item]))
+
+    def drain(self, budget=0.012):
+        """Run pending updates in order until `budget` seconds are used
+
+        Returns the number of callbacks run; the rest wait for the next frame.
+        """
+        deadline = time.perf_counter() + budget
+        ran = 0
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+                _, (func, args) = self._pending.popitem(last=False)
+            if func is _BATCH:
+                func, args = args[0], (args[1],)
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"UI update failed: {e}")
+            ran += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.ran += ran
+        return ran
+
+    def stats(self):
+        return {"pending": len(self._pending), "posted": self.posted,
+                "coalesced": self.coalesced, "ran": self.ran}
@@ -0,0 +1,34 @@
+"""Address extraction from free text"""
+import pytest
+
+from netmaster.bulk import IP_PATTERN, extract_ips, unique_ips
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("GET / from 1.2.3.4:8080", ["1.2.3.4"]),
+    ("client ip:9.9.9.9 (ok)", ["9.9.9.9"]),
+    ("blocked 8.8.8.8.", ["8.8.8.8"]),
+    ("resolver [::1]:53 answered", ["::1"]),
+    ("route 2001:db8::1/64 via fe80::1%eth0", ["2001:db8::1", "fe80::1"]),
+    ("mapped ::ffff:192.0.2.1", ["::ffff:c000:201"]),
+    ("full 2001:db8:0:0:1:0:0:1", ["2001:db8::1:0:0:1"]),
+    ("bad octet 999.1.1.1", []),
+])
+def test_extracts_addresses(line, expected):
+    assert [str(ip) for ip in extract_ips(line)] == expected
+
+
+@pytest.mark.parametrize("line", [
+    "12:30:45 job finished",
+    "link aa:bb:cc:dd:ee:ff up",
+    "netmaster 1.2.3 and v1.2.3.4",
+    "oid 1.3.6.1.4.1",
+    "std::vector<int>",
+])
+def test_address_lookalikes_are_not_candidates(line):
+    assert IP_PATTERN.findall(line) == []
+
+
+def test_unique_ips_keeps_first_seen_order():
+    lines = ["10.0.0.2 10.0.0.1", "10.0.0.2 ::1", "::0:1 10.0.0.3"]
+    assert list(unique_ips(lines)) == ["10.0.0.2", "10.0.0.1", "::1", "10.0.0.3"]
@@ -0,0 +1,36 @@
+"""Lookup cache persistence"""
+import sqlite3
+
+from netmaster import cache as cache_module
+from netmaster.cache import LookupCache
+
+
+def rows_on_disk(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def test_writes_are_committed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "COMMIT_EVERY", 10)
+    path = str(tmp_path / "cache.sqlite")
+    cache = LookupCache(path)
+    for i in range(15):
+        cache.set(f"key{i}", {"value": i})
+    # Another connection only sees committed rows
+    assert rows_on_disk(path) == 10
+    cache.flush()
+    assert rows_on_disk(path) == 15
+    cache.set("key15", {"value": 15})
+    cache.close()
+    assert rows_on_disk(path) == 16
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LookupCache(path)
+    cache.set("ipinfo.io:192.0.2.1", {"city": "Sydney"})
+    cache.close()
+
+    cache = LookupCache(path)
+    assert cache.get("ipinfo.io:192.0.2.1") == {"city": "Sydney"}
+    cache.close()
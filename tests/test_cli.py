@@ -0,0 +1,28 @@
+"""Command line output files"""
+import csv
+
+import pytest
+
+from netmaster import cli
+
+
+def test_ports_csv_keeps_every_column(tmp_path, capsys):
+    output = tmp_path / "ports.csv"
+    cli.main(["-o", str(output), "ports", "nonexistent.invalid", "127.0.0.1", "-p", "1,2",
+              "--all", "--timeout", "0.5"])
+    capsys.readouterr()
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ["host", "port", "state", "error"]
+    assert rows[0]["host"] == "nonexistent.invalid" and rows[0]["error"]
+    scanned = [row for row in rows if row["host"] == "127.0.0.1"]
+    assert sorted(row["port"] for row in scanned) == ["1", "2"]
+    assert all(row["state"] for row in scanned)
+
+
+def test_geo_rejects_an_unknown_provider(capsys):
+    with pytest.raises(SystemExit) as exit:
+        cli.main(["geo", "-p", "example.com", "192.0.2.1"])
+    assert exit.value.code == 2
+    assert "invalid choice" in capsys.readouterr().err
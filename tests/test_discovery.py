@@ -0,0 +1,25 @@
+"""Subnet sweep probes"""
+import asyncio
+import socket
+
+from netmaster import discovery
+from netmaster.discovery import DeviceScanner
+
+
+def test_refused_connection_counts_as_alive():
+    scanner = DeviceScanner(ports=(1,), timeout=0.5, resolve_names=False)
+    assert asyncio.run(scanner.probe_host("127.0.0.1")) is True
+
+
+def test_out_of_sockets_is_no_answer(monkeypatch):
+    real = socket.socket
+
+    def exhausted(family=-1, type=-1, proto=-1, fileno=None):
+        # The event loop wraps its self-pipe with fileno; only new sockets fail
+        if fileno is None:
+            raise OSError(24, "Too many open files")
+        return real(family, type, proto, fileno)
+
+    monkeypatch.setattr(discovery.socket, "socket", exhausted)
+    scanner = DeviceScanner(ports=(80, 443), timeout=0.5, resolve_names=False)
+    assert asyncio.run(scanner.probe_host("127.0.0.1")) is False
@@ -0,0 +1,34 @@
+"""Nameserver ranking against stub resolvers with injected delays"""
+import pytest
+
+pytest.importorskip("dns")
+
+from netmaster.dnsbench import NameserverBenchmark, rank
+from netmaster.stubdns import StubDNSServer
+
+
+def test_ranks_by_injected_delay():
+    delays = {"fast": 0.002, "medium": 0.02, "slow": 0.06}
+    servers = {name: StubDNSServer(delay=delay).start() for name, delay in delays.items()}
+    try:
+        labels = {f"127.0.0.1:{server.port}": name for name, server in servers.items()}
+        results = NameserverBenchmark(list(labels), corpus=["a.test", "b.test", "c.test"],
+                                      rounds=2, timeout=1.0, include_system=False).run()
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    assert [labels[result["server"]] for result in results] == ["fast", "medium", "slow"]
+    assert [result["rank"] for result in results] == [1, 2, 3]
+    for result in results:
+        assert result["timeouts"] == 0
+        assert result["answered"] == result["queries"]
+        # Every answer takes at least the injected delay
+        assert result["warm"]["min"] >= delays[labels[result["server"]]] * 1000
+
+
+def test_unanswering_server_ranks_last():
+    results = rank([{"server": "dead", "expected_ms": None},
+                    {"server": "slow", "expected_ms": 80.0},
+                    {"server": "fast", "expected_ms": 5.0}])
+    assert [result["server"] for result in results] == ["fast", "slow", "dead"]
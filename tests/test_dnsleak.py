@@ -0,0 +1,46 @@
+"""DNS leak test against the local stand-in authority"""
+import pytest
+
+pytest.importorskip("dns")
+
+from netmaster.dnsleak import DNSLeakTest, LocalAuthority
+
+
+@pytest.fixture
+def authority():
+    authority = LocalAuthority()
+    yield authority
+    authority.close()
+
+
+def test_authority_logs_every_query(authority):
+    paths, queries = 2, 4
+    test = DNSLeakTest(authority, [authority.address] * paths, use_os=False, queries=queries,
+                       timeout=1.0, expected=["127.0.0.0/8"])
+    report = test.run()
+
+    assert len(report["paths"]) == paths
+    for path in report["paths"]:
+        assert path["sent"] == path["answered"] == queries
+        assert path["resolvers"] == ["127.0.0.1"]
+    assert len(authority.server.queries) == paths * queries
+    assert report["resolvers"][0]["resolver"] == "127.0.0.1"
+    assert report["resolvers"][0]["queries"] == paths * queries
+    assert report["leak"] is False
+
+
+def test_unexpected_resolver_is_a_leak(authority):
+    report = DNSLeakTest(authority, [authority.address], use_os=False, queries=2, timeout=1.0,
+                         expected=["10.0.0.0/8"]).run()
+    assert report["leak"] is True
+    assert "127.0.0.1" in report["conclusion"]
+
+
+def test_allow_list_matches_by_network():
+    test = DNSLeakTest(expected=["1.1.1.1", "9.9.9.0/24", "2606:4700::/32"])
+    assert test.allowed("1.1.1.1")
+    assert not test.allowed("1.1.1.10")
+    assert test.allowed("9.9.9.9")
+    assert test.allowed("2606:4700:4700::1111")
+    assert not test.allowed("8.8.8.8")
+    assert not test.allowed("not-an-address")
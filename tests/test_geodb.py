@@ -0,0 +1,85 @@
+"""Offline range database compiler and lookups"""
+import ipaddress
+
+import pytest
+
+from netmaster.geodb import GeoDatabase, _flatten, compile_csv
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    def compile_rows(text):
+        source = tmp_path / "ranges.csv"
+        source.write_text(text, encoding="utf-8")
+        target = tmp_path / "geo.nmdb"
+        counts = compile_csv(str(source), str(target))
+        return str(target), counts
+    return compile_rows
+
+
+def city(database, ip):
+    return (database.lookup(ip) or {}).get("city")
+
+
+def test_nested_ranges_most_specific_wins(compiled):
+    path, counts = compiled("start,end,country,city\n"
+                            "1.0.0.0,1.0.0.255,AU,Big\n"
+                            "1.0.0.4,1.0.0.7,AU,Sydney\n"
+                            "1.0.0.6,1.0.0.6,AU,Tiny\n")
+    with GeoDatabase(path) as database:
+        assert city(database, "1.0.0.3") == "Big"
+        assert city(database, "1.0.0.5") == "Sydney"
+        assert city(database, "1.0.0.6") == "Tiny"
+        assert city(database, "1.0.0.7") == "Sydney"
+        assert city(database, "1.0.0.8") == "Big"
+        assert city(database, "1.0.1.0") is None
+    assert counts == (5, 0)
+
+
+def test_flatten_keeps_disjoint_ranges():
+    assert _flatten([(10, 19, 1), (0, 9, 0)]) == [(0, 9, 0), (10, 19, 1)]
+    # Partial overlap: the narrower range wins where they meet
+    assert _flatten([(0, 9, 0), (5, 24, 1), (20, 21, 2)]) == [
+        (0, 9, 0), (10, 19, 1), (20, 21, 2), (22, 24, 1)]
+    # Equal widths: the later row wins
+    assert _flatten([(0, 9, 0), (0, 9, 1)]) == [(0, 9, 1)]
+
+
+def test_networks_and_ipv6(compiled):
+    path, counts = compiled("network,country,city\n"
+                            "10.0.0.0/8,ZZ,Private\n"
+                            "10.1.0.0/16,ZZ,Lab\n"
+                            "2001:db8::/32,ZZ,Docs\n")
+    assert counts == (3, 1)
+    with GeoDatabase(path) as database:
+        assert city(database, "10.2.3.4") == "Private"
+        assert city(database, "10.1.3.4") == "Lab"
+        assert city(database, "2001:db8::1") == "Docs"
+        assert city(database, "2001:db9::1") is None
+
+
+def test_lookup_many_rejects_out_of_range_integers(compiled):
+    numpy = pytest.importorskip("numpy")
+    path, _ = compiled("start,end,country,city\n0.0.0.0,0.0.0.255,ZZ,Zero\n")
+    with GeoDatabase(path) as database:
+        inside = int(ipaddress.ip_address("0.0.0.5"))
+        result = database.lookup_many(numpy.array([inside, inside + 2 ** 32, -1, 2 ** 40]))
+        assert list(result) == [0, -1, -1, -1]
+
+
+def test_recompile_replaces_the_file(compiled, tmp_path):
+    path, _ = compiled("start,end,country,city\n1.0.0.0,1.0.0.255,AU,Old\n")
+    path, _ = compiled("start,end,country,city\n1.0.0.0,1.0.0.255,AU,New\n")
+    with GeoDatabase(path) as database:
+        assert city(database, "1.0.0.1") == "New"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["geo.nmdb", "ranges.csv"]
+
+
+@pytest.mark.parametrize("cut", [0, 10, -1])
+def test_truncated_file_is_rejected(compiled, tmp_path, cut):
+    path, _ = compiled("start,end,country,city\n1.0.0.0,1.0.0.255,AU,Sydney\n")
+    data = open(path, "rb").read()
+    broken = tmp_path / "broken.nmdb"
+    broken.write_bytes(data[:cut])
+    with pytest.raises(ValueError):
+        GeoDatabase(str(broken))
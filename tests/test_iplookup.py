@@ -0,0 +1,25 @@
+"""Offline database switching in the lookup service"""
+from netmaster.cache import LookupCache
+from netmaster.geodb import compile_csv
+from netmaster.iplookup import IPLookupService
+
+
+def test_switching_leaves_the_old_database_readable(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETWORKMASTER_GEODB", str(tmp_path / "missing.nmdb"))
+    source = tmp_path / "ranges.csv"
+    source.write_text("start,end,country,city\n192.0.2.0,192.0.2.255,AU,Sydney\n")
+    compile_csv(str(source), str(tmp_path / "a.nmdb"))
+    compile_csv(str(source), str(tmp_path / "b.nmdb"))
+    service = IPLookupService(client=object(), cache=LookupCache(persist=False))
+    assert service.offline is None
+
+    service.load_offline(str(tmp_path / "a.nmdb"))
+    in_use = service.offline
+    service.load_offline(str(tmp_path / "b.nmdb"))
+    # A lookup that started before the switch can still finish
+    assert in_use.locate("192.0.2.1")["city"] == "Sydney"
+    assert service.locate("192.0.2.1")["city"] == "Sydney"
+
+    service.unload_offline()
+    assert service.offline is None
+    assert in_use.locate("192.0.2.1")["city"] == "Sydney"
@@ -0,0 +1,24 @@
+"""Metrics fed from monitor rows"""
+from netmaster.metrics import Metrics
+
+
+def row(check, result, seconds=2.5):
+    return {"time": 1700000000.0, "check": check, "status": "ok", "seconds": seconds,
+            "result": result}
+
+
+def test_dns_histogram_takes_the_lookup_time():
+    metrics = Metrics(interfaces=False)
+    metrics.record(row("dns", {"nameservers": ["127.0.0.53"], "test_address": "192.0.2.1",
+                               "lookup_ms": 12.0}))
+    histogram = metrics.series["netmaster_dns_lookup_seconds"][()]
+    assert histogram.count == 1
+    assert histogram.sum == 0.012
+    assert "netmaster_dns_lookup_seconds_count 1" in metrics.render()
+
+
+def test_dns_without_a_lookup_time_is_not_observed():
+    metrics = Metrics(interfaces=False)
+    metrics.record(row("dns", {"nameservers": ["127.0.0.53"]}))
+    assert not metrics.series["netmaster_dns_lookup_seconds"]
+    assert 'netmaster_check_runs_total{check="dns",status="ok"} 1' in metrics.render()
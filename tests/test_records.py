@@ -0,0 +1,111 @@
+"""Snapshot encoding, decoding and diffs"""
+import pytest
+
+from netmaster.records import (MAGIC, Device, Failure, PortTable, Snapshot, diff, dumps, loads,
+                               summarize)
+
+RESULTS = {
+    "ip_info": {"ip": "198.51.100.7", "city": "Sydney", "org": "AS64500 Example",
+                "anycast": True},
+    "network_info": {"hostname": "box", "local_ip": "192.168.1.10"},
+    "dns_info": {"nameservers": ["192.168.1.1"], "test_domain": "google.com",
+                 "test_address": "142.250.1.1"},
+    "speed_test": {"error": "no servers"},
+    "devices": [{"ip": "192.168.1.1", "mac": "aa:bb:cc:dd:ee:01", "hostname": "router",
+                 "vendor": "", "method": "tcp"},
+                {"ip": "192.168.1.20", "mac": "aa:bb:cc:dd:ee:20", "hostname": "",
+                 "vendor": "", "method": "arp"}],
+    "location": {},
+    "ports": PortTable([("192.168.1.1", 22, "open"), ("192.168.1.1", 80, "closed"),
+                        ("192.168.1.20", 443, "filtered"), ("192.168.1.20", 8080, "error")]),
+}
+
+
+@pytest.fixture
+def snapshot():
+    return Snapshot.from_results(RESULTS, when=1700000000.5)
+
+
+def test_from_results_types_each_section(snapshot):
+    assert snapshot.ip_info.city == "Sydney"
+    assert snapshot.ip_info["anycast"] is True
+    assert isinstance(snapshot.speed_test, Failure)
+    assert [device.ip for device in snapshot.devices] == ["192.168.1.1", "192.168.1.20"]
+    # {} means the stage never ran
+    assert snapshot.location is None
+
+
+@pytest.mark.parametrize("name", ["snap.nmsnap", "snap.json"])
+def test_save_and_load_round_trip(snapshot, tmp_path, name):
+    path = str(tmp_path / name)
+    snapshot.save(path)
+    loaded = Snapshot.load(path)
+
+    assert loaded == snapshot
+    assert loaded.ports.mapping() == RESULTS["ports"].mapping()
+    assert loaded.speed_test.error == "no servers"
+    assert diff(snapshot, loaded) == []
+
+
+def test_binary_encoding_of_plain_values():
+    value = {"n": None, "flags": [True, False], "int": -2 ** 40, "float": 0.25, "text": "é"}
+    assert loads(dumps(value)) == value
+
+
+def test_corrupt_data_is_rejected(snapshot):
+    data = dumps(snapshot)
+    with pytest.raises(ValueError):
+        loads(b"not a snapshot")
+    with pytest.raises(ValueError):
+        loads(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        loads(MAGIC + b"?")
+
+
+def test_empty_device_list_is_kept(snapshot, tmp_path):
+    empty = Snapshot.from_results(dict(RESULTS, devices=[]), when=1700000100.0)
+    assert empty.devices == []
+    path = str(tmp_path / "empty.nmsnap")
+    empty.save(path)
+    assert Snapshot.load(path).devices == []
+
+    changes = diff(snapshot, empty)
+    assert sorted(change["ip"] for change in changes
+                  if change["change"] == "device_removed") == ["192.168.1.1", "192.168.1.20"]
+
+
+def test_diff_reports_each_kind_of_change(snapshot):
+    results = dict(RESULTS)
+    results["ip_info"] = dict(RESULTS["ip_info"], ip="198.51.100.8")
+    results["dns_info"] = dict(RESULTS["dns_info"], nameservers=["1.1.1.1"])
+    results["devices"] = [dict(RESULTS["devices"][0], mac="aa:bb:cc:dd:ee:99"),
+                          {"ip": "192.168.1.30", "mac": "", "hostname": "", "vendor": "",
+                           "method": "tcp"}]
+    results["ports"] = PortTable([("192.168.1.1", 22, "closed"), ("192.168.1.1", 80, "open"),
+                                  ("192.168.1.20", 443, "filtered"),
+                                  ("192.168.1.20", 8080, "error")])
+    changes = diff(snapshot, Snapshot.from_results(results, when=1700000200.0))
+
+    kinds = sorted(change["change"] for change in changes)
+    assert kinds == ["device_added", "device_mac", "device_removed", "nameservers", "port",
+                     "port", "public_ip"]
+    ports = {(change["port"], change["old"], change["new"]) for change in changes
+             if change["change"] == "port"}
+    assert ports == {(22, "open", "closed"), (80, "closed", "open")}
+    assert summarize(changes) == ("public IP changed, nameservers changed, 1 new device, "
+                                  "1 device gone, 1 device MAC changed, 2 ports changed")
+
+
+def test_skipped_sections_are_not_compared(snapshot):
+    partial = Snapshot.from_results({"ip_info": RESULTS["ip_info"]}, when=1700000300.0)
+    assert diff(snapshot, partial) == []
+    assert summarize([]) == ""
+
+
+def test_port_changes_on_different_probe_sets():
+    old = PortTable([("10.0.0.1", 22, "open"), ("10.0.0.1", 23, "closed")])
+    new = PortTable([("10.0.0.1", 80, "open"), ("10.0.0.1", 23, "filtered")])
+    assert sorted(old.changes(new)) == [("10.0.0.1", 22, "open", None),
+                                        ("10.0.0.1", 23, "closed", "filtered"),
+                                        ("10.0.0.1", 80, None, "open")]
+    assert Device.from_dict({"ip": "10.0.0.1"}).to_dict() == {"ip": "10.0.0.1"}
@@ -0,0 +1,51 @@
+"""Bulk resolver against the local stub DNS server"""
+import pytest
+
+pytest.importorskip("dns")
+
+from netmaster.resolver import BulkResolver, NXDOMAIN, NODATA, OK, SERVFAIL, read_names
+from netmaster.stubdns import StubDNSServer
+
+
+@pytest.fixture
+def stub():
+    with StubDNSServer() as server:
+        yield server
+
+
+def test_status_counts(stub):
+    rows = []
+    resolver = BulkResolver(["127.0.0.1"], port=stub.port, concurrency=20, timeout=1.0,
+                            cache=False)
+    summary = resolver.resolve(["a.test", "nx1.test", "fail1.test", "b.test"], ["A", "MX"],
+                               rows.append)
+
+    assert summary["queries"] == len(rows) == 8
+    assert summary[OK] == 2
+    assert summary[NODATA] == 2
+    assert summary[NXDOMAIN] == 2
+    assert summary[SERVFAIL] == 2
+    statuses = {(row["domain"], row["type"]): row["status"] for row in rows}
+    assert statuses[("a.test", "A")] == OK
+    assert statuses[("nx1.test", "A")] == NXDOMAIN
+    assert statuses[("fail1.test", "MX")] == SERVFAIL
+    answered = next(row for row in rows if row["domain"] == "a.test" and row["type"] == "A")
+    assert answered["answers"] and answered["ttl"] == stub.ttl
+
+
+def test_repeated_names_hit_the_cache(stub):
+    resolver = BulkResolver(["127.0.0.1"], port=stub.port, concurrency=1, timeout=1.0)
+    summary = resolver.resolve(["a.test", "b.test", "a.test", "a.test"], ["A"])
+
+    assert summary[OK] == 4
+    assert summary["cache_hits"] == 2
+    # Only the two distinct names reached the server
+    assert len(stub.queries) == 2
+
+
+def test_read_names_drops_repeats_within_the_window():
+    lines = ["a.test", "# comment", "", "B.test.  # trailing", "a.test", "c.test", "b.test"]
+    assert list(read_names(lines)) == ["a.test", "b.test", "c.test"]
+    # Beyond the window a name comes round again
+    assert list(read_names(["a.test", "b.test", "c.test", "a.test"], window=2)) == [
+        "a.test", "b.test", "c.test", "a.test"]
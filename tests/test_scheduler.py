@@ -0,0 +1,180 @@
+"""Schedules, cron arithmetic and the monitor's overlap and run accounting"""
+import datetime
+import threading
+import time
+
+import pytest
+
+from netmaster.scheduler import (ERROR, OK, QUEUE, SKIPPED, Cron, Interval, Monitor,
+                                 parse_duration, parse_schedule)
+
+
+def at(*fields):
+    """Local timestamp for (year, month, day, hour, minute)"""
+    return datetime.datetime(*fields).timestamp()
+
+
+def next_run(spec, *fields):
+    return datetime.datetime.fromtimestamp(Cron(spec).next_after(at(*fields)))
+
+
+@pytest.mark.parametrize("spec, now, expected", [
+    ("*/15 * * * *", (2026, 10, 16, 10, 7), (2026, 10, 16, 10, 15)),
+    ("*/15 * * * *", (2026, 10, 16, 10, 45), (2026, 10, 16, 11, 0)),
+    # Strictly after: a run at the slot itself moves on to the next one
+    ("*/15 * * * *", (2026, 10, 16, 10, 15), (2026, 10, 16, 10, 30)),
+    # Friday morning to Monday
+    ("0 6 * * 1-5", (2026, 10, 16, 7, 0), (2026, 10, 19, 6, 0)),
+    ("@hourly", (2026, 10, 16, 23, 30), (2026, 10, 17, 0, 0)),
+    # November has no 31st
+    ("0 0 31 * *", (2026, 11, 5, 0, 0), (2026, 12, 31, 0, 0)),
+    ("30 23 31 12 *", (2026, 12, 31, 23, 31), (2027, 12, 31, 23, 30)),
+    ("0 12 29 2 *", (2026, 3, 1, 0, 0), (2028, 2, 29, 12, 0)),
+    # Day and weekday both restricted: either one matches (the 13th, a Tuesday)
+    ("0 0 13 * 5", (2026, 10, 10, 0, 0), (2026, 10, 13, 0, 0)),
+    ("0 0 13 * 5", (2026, 10, 14, 0, 0), (2026, 10, 16, 0, 0)),
+    # Only one restricted: it alone decides
+    ("0 0 * * 0", (2026, 10, 14, 0, 0), (2026, 10, 18, 0, 0)),
+    ("0 0 7 * *", (2026, 10, 14, 0, 0), (2026, 11, 7, 0, 0)),
+])
+def test_cron_next_after(spec, now, expected):
+    assert next_run(spec, *now) == datetime.datetime(*expected)
+
+
+def test_cron_fields():
+    cron = Cron("5/20 1-3,22 */10 * 7")
+    assert cron.minutes == {5, 25, 45}
+    assert cron.hours == {1, 2, 3, 22}
+    assert cron.days == {1, 11, 21, 31}
+    assert cron.months == set(range(1, 13))
+    # 7 is Sunday, like 0
+    assert cron.weekdays == {0}
+
+
+@pytest.mark.parametrize("spec", ["60 * * * *", "* 24 * * *", "* * 0 * *", "*/0 * * * *",
+                                  "5-1 * * * *", "a * * * *", "* * * *", "@sometimes"])
+def test_cron_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        Cron(spec)
+
+
+def test_cron_that_never_matches():
+    with pytest.raises(ValueError):
+        Cron("0 0 30 2 *").next_after(at(2026, 1, 1, 0, 0))
+
+
+def test_intervals_keep_their_slots():
+    interval = Interval(60, start=1000)
+    assert interval.first() == 1000
+    assert interval.next_after(1000) == 1060
+    # Slots missed while asleep are skipped, not replayed
+    assert interval.next_after(1000 + 60 * 10 + 5) == 1660
+    assert interval.next_after(500) == 1000
+
+
+@pytest.mark.parametrize("text, seconds", [("90", 90), ("30s", 30), ("5m", 300),
+                                           ("1.5h", 5400), ("1d", 86400), (" 2M ", 120)])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["0", "-5m", "soon", "5x"])
+def test_parse_duration_rejects(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+
+
+def test_parse_schedule_picks_the_kind():
+    assert isinstance(parse_schedule("5m"), Interval)
+    assert isinstance(parse_schedule("@daily"), Cron)
+    assert isinstance(parse_schedule("0 6 * * *"), Cron)
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def finish(monitor):
+    monitor._thread.join(5)
+    assert not monitor.running
+
+
+def test_skip_records_missed_slots_while_running():
+    rows = []
+    release = threading.Event()
+    monitor = Monitor(on_result=rows.append, max_runs=1)
+    job = monitor.add("slow", lambda: release.wait(5), "0.05", jitter=0)
+    monitor.start()
+    assert wait_for(lambda: job.skipped >= 2)
+    release.set()
+    finish(monitor)
+
+    statuses = [row["status"] for row in rows]
+    assert statuses[-1] == OK
+    assert statuses[:-1] == [SKIPPED] * job.skipped
+    assert job.runs == 1
+
+
+def test_queue_runs_once_for_several_missed_slots():
+    rows = []
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(time.monotonic())
+        release.wait(5)
+
+    monitor = Monitor(on_result=rows.append, max_runs=2)
+    job = monitor.add("slow", slow, "0.05", jitter=0, overlap=QUEUE)
+    monitor.start()
+    # Several slots pass while the first run blocks
+    time.sleep(0.3)
+    assert len(calls) == 1 and job.pending
+    release.set()
+    finish(monitor)
+
+    assert len(calls) == 2
+    assert [row["status"] for row in rows] == [OK, OK]
+    assert job.skipped == 0
+
+
+def test_max_runs_counts_every_job():
+    rows = []
+    monitor = Monitor(on_result=rows.append, max_runs=5)
+    monitor.add("a", lambda: {"value": 1}, "0.02", jitter=0)
+    monitor.add("b", lambda: {"error": "down"}, "0.02", jitter=0)
+    monitor.start()
+    finish(monitor)
+
+    assert monitor.finished == 5
+    assert len(rows) == 5
+    failures = sum(job.failures for job in monitor.jobs.values())
+    assert failures == sum(row["status"] == ERROR for row in rows)
+    assert {row["check"] for row in rows} == {"a", "b"}
+
+
+def test_exceptions_become_error_rows():
+    rows = []
+
+    def broken():
+        raise RuntimeError("no route")
+
+    monitor = Monitor(on_result=rows.append, max_runs=1)
+    monitor.add("broken", broken, "1m", jitter=0)
+    monitor.start()
+    finish(monitor)
+
+    assert rows[0]["status"] == ERROR
+    assert rows[0]["result"] == {"error": "no route"}
+
+
+def test_duplicate_and_bad_jobs_are_rejected():
+    monitor = Monitor()
+    monitor.add("a", lambda: None, "1m")
+    with pytest.raises(ValueError):
+        monitor.add("a", lambda: None, "1m")
+    with pytest.raises(ValueError):
+        monitor.add("b", lambda: None, "1m", overlap="later")
@@ -0,0 +1,53 @@
+"""Throughput test against a local server"""
+import time
+
+import pytest
+
+from netmaster.throughput import ThroughputServer, ThroughputTest
+
+
+@pytest.fixture
+def server():
+    with ThroughputServer("127.0.0.1", 0) as server:
+        yield server
+
+
+def settled(read, expected, timeout=2.0):
+    """The server adds a stream's total just after answering it"""
+    deadline = time.monotonic() + timeout
+    while read() != expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return read()
+
+
+def test_upload_bytes_match_server(server):
+    result = ThroughputTest("127.0.0.1", server.port, streams=3, duration=0.5,
+                            interval=0.1).run()
+
+    assert result["errors"] == []
+    assert result["bytes"] > 0
+    assert result["bytes"] == sum(result["per_stream"])
+    assert settled(lambda: server.received, result["bytes"]) == result["bytes"]
+    assert server.streams == 3
+
+
+def test_download_bytes_match_server(server):
+    result = ThroughputTest("127.0.0.1", server.port, streams=2, duration=0.5, interval=0.1,
+                            reverse=True).run()
+
+    assert result["errors"] == []
+    assert result["bytes"] > 0
+    assert settled(lambda: server.sent, result["bytes"]) == result["bytes"]
+
+
+def test_intervals_cover_the_run(server):
+    interval = 0.1
+    result = ThroughputTest("127.0.0.1", server.port, streams=2, duration=0.55,
+                            interval=interval).run()
+    intervals = result["intervals"]
+
+    assert sum(row["bytes"] for row in intervals) == sum(result["per_stream"])
+    for earlier, later in zip(intervals, intervals[1:]):
+        assert later["start"] == earlier["end"]
+    # The last few milliseconds are folded into the row before them
+    assert intervals[-1]["end"] - intervals[-1]["start"] >= interval / 10
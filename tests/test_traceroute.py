@@ -0,0 +1,47 @@
+"""Path tracer on the loopback interface"""
+import pytest
+
+from netmaster.traceroute import SUPPORTED, UNSUPPORTED, PathTracer
+
+pytestmark = pytest.mark.skipif(not SUPPORTED, reason=UNSUPPORTED)
+
+
+class QuotelessTracer(PathTracer):
+    """Sends empty probes, as if every hop quoted only the UDP header back"""
+
+    def _send(self, path, ttl, payload):
+        super()._send(path, ttl, b"")
+
+
+def test_loopback_is_one_hop():
+    rows = PathTracer(["127.0.0.1"], max_hops=5, interval=0.1, timeout=1.0,
+                      resolve_names=False).run(rounds=2)
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["reached"] is True
+    assert row["distance"] == 1
+    assert [hop["ttl"] for hop in row["hops"]] == [1]
+    hop = row["hops"][0]
+    assert hop["address"] == "127.0.0.1"
+    assert hop["sent"] == 2
+    assert hop["loss"] == 0
+
+
+def test_unresolvable_target_is_reported():
+    rows = PathTracer(["127.0.0.1", "nonexistent.invalid"], max_hops=2, interval=0.1,
+                      timeout=0.5, resolve_names=False).run(rounds=1)
+
+    errors = [row for row in rows if "error" in row]
+    assert [row["target"] for row in errors] == ["nonexistent.invalid"]
+    assert any(row.get("reached") for row in rows)
+
+
+def test_probes_match_by_port_without_a_payload():
+    rows = QuotelessTracer(["127.0.0.1"], max_hops=3, interval=0.1, timeout=1.0,
+                           resolve_names=False).run(rounds=2)
+
+    row = rows[0]
+    assert row["reached"] is True
+    assert row["distance"] == 1
+    assert row["hops"][0]["loss"] == 0